@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Measures the throughput of `BinanceConnection` against a local `MockBinanceServer`.
+
+    python benchmarks/crawler.py --years 4 --latency 0.05 --workers 1 2 4 8
+"""
+import argparse
+import datetime
+import json
+import logging
+import sys
+import time
+
+from deltaconv.crawler import BinanceConnection
+from deltaconv.mockserver import MockBinanceServer
+from deltaconv.retry import RetryPolicy
+
+
+def parse_arguments():
+    """Parses the arguments the user passed to this script """
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark the Binance crawler against a local mock server.')
+
+    arg_parser.add_argument('--years', help='The length of the crawled history in years.', type=float, default=3)
+    arg_parser.add_argument('--latency', help='The delay of each response in seconds.', type=float, default=0.02)
+    arg_parser.add_argument('--density', help='The number of trades per day.', type=float, default=30)
+    arg_parser.add_argument(
+        '--transfer-density', help='The number of deposits and withdrawals per day.', type=float, default=1
+    )
+    arg_parser.add_argument(
+        '--page-limit', help='The maximum number of records returned per query.', type=int, default=1000
+    )
+    arg_parser.add_argument(
+        '--throttle-rate', help='The fraction of queries answered with HTTP 429.', type=float, default=0.0
+    )
+    arg_parser.add_argument(
+        '--workers', help='The numbers of concurrent queries to compare.', type=int, nargs='+', default=[1, 2, 4]
+    )
+    arg_parser.add_argument('--json', help='Print the results as JSON.', action='store_true')
+
+    return arg_parser.parse_args()
+
+
+def run(server, method, workers, start, end):
+    """
+    Crawl the history of `start` to `end` with the given method of `BinanceConnection`.
+
+    Returns:
+        dict: The measured throughput
+
+    """
+    # do not wait for seconds on injected throttling - we measure the crawler, not the backoff
+    conn = BinanceConnection(
+        csrftoken='',
+        cookies='',
+        workers=workers,
+        url=server.url,
+        retry_policy=RetryPolicy(max_retries=10, base_delay=0.01, max_delay=0.1)
+    )
+
+    server.reset()
+
+    started = time.perf_counter()
+    rows = len(getattr(conn, method)(start, end))
+    seconds = time.perf_counter() - started
+
+    return {
+        'method': method,
+        'workers': workers,
+        'seconds': seconds,
+        'requests': server.requests,
+        'throttled': server.throttled,
+        'rows': rows,
+        'requests/s': server.requests / seconds,
+        'rows/s': rows / seconds,
+        'failures': len(conn.failures),
+    }
+
+
+def main(arguments):
+    end = datetime.datetime(2021, 1, 1)
+    start = end - datetime.timedelta(days=365 * arguments.years)
+
+    results = []
+
+    with MockBinanceServer(
+        latency=arguments.latency,
+        density=arguments.density,
+        transfer_density=arguments.transfer_density,
+        page_limit=arguments.page_limit,
+        throttle_rate=arguments.throttle_rate,
+        retry_after=0
+    ) as server:
+        for method in ['trades', 'deposits', 'withdrawals']:
+            for workers in arguments.workers:
+                results.append(run(server, method, workers, start, end))
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print('{:<12} {:>7} {:>9} {:>9} {:>9} {:>9} {:>11} {:>11} {:>8}'.format(
+        'method', 'workers', 'seconds', 'requests', 'throttled', 'rows', 'requests/s', 'rows/s', 'failures'
+    ))
+
+    for r in results:
+        print('{:<12} {:>7} {:>9.2f} {:>9} {:>9} {:>9} {:>11.1f} {:>11.1f} {:>8}'.format(
+            r['method'], r['workers'], r['seconds'], r['requests'], r['throttled'], r['rows'], r['requests/s'],
+            r['rows/s'], r['failures']
+        ))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.ERROR, stream=sys.stderr)
+
+    main(parse_arguments())
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Measures `parse()` and `export()` of each format in `PARSER` on synthetic files.
+
+Each measurement runs in a fresh process, so the reported peak RSS belongs to the measured call alone. Save the
+results of a release with --json and compare the next release against them with --baseline.
+
+    python benchmarks/parsers.py --rows 10000 100000 --json > results.json
+    python benchmarks/parsers.py --rows 10000 100000 --baseline results.json
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from deltaconv.registry import PARSER, init_parser, readers, writers
+from deltaconv.synthetic import GENERATORS, XLSX_MAX_ROWS, generate
+
+# The formats whose files provide the transactions to export and the extension of the exported file. The binance
+# exporters always append .xlsx.
+EXPORTS = {
+    'binance-trades': ('binancecrawler-trades', ''),
+    'binance-deposit': ('binancecrawler-deposit', ''),
+    'delta': ('binancecrawler-trades', '.csv'),
+}
+
+# The formats only written as csv, e.g. by binancecrawler
+_CSV_ONLY = ['binancecrawler-trades', 'binancecrawler-deposit', 'bitpanda', 'delta']
+
+# The formats whose parser queries the list of coins from coinmarketcap for each row. Their parse time would measure
+# the network, so only their export is benchmarked.
+_NETWORK = ['binance-trades']
+
+
+def parse_arguments():
+    """Parses the arguments the user passed to this script """
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark parse() and export() of all formats.')
+
+    arg_parser.add_argument(
+        '--rows', help='The numbers of rows of the synthetic files.', type=int, nargs='+', default=[10000]
+    )
+    arg_parser.add_argument('--formats', help='Only benchmark these formats.', nargs='+', choices=list(PARSER))
+    arg_parser.add_argument('--json', help='Print the results as JSON.', action='store_true')
+    arg_parser.add_argument('--baseline', help='A JSON file with the results of a previous run to compare with.')
+
+    return arg_parser.parse_args()
+
+
+def _peak_rss():
+    # kilobytes on linux, bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def _measure_parse(format_name, file):
+    parser = init_parser(format_name)
+
+    before = _peak_rss()
+    started = time.perf_counter()
+
+    transactions = parser.parse(file)
+
+    return time.perf_counter() - started, _peak_rss() - before, len(transactions)
+
+
+def _measure_export(format_name, source_format, source, file):
+    transactions = init_parser(source_format).parse(source)
+    parser = init_parser(format_name)
+
+    before = _peak_rss()
+    started = time.perf_counter()
+
+    parser.export(transactions, file)
+
+    return time.perf_counter() - started, _peak_rss() - before, len(transactions)
+
+
+def _run(func, *args):
+    """ Run the measurement in a fresh process """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(func, *args).result()
+
+
+def benchmark(formats, sizes, directory):
+    """
+    Measure all formats with files of the given sizes.
+
+    Returns:
+        list[dict]: The results
+    """
+    results = []
+
+    def record(operation, format_name, extension, rows, func, *args):
+        result = {'operation': operation, 'format': format_name, 'extension': extension, 'rows': rows}
+
+        try:
+            seconds, memory, count = _run(func, *args)
+            result.update(seconds=seconds, peak_rss=memory, transactions=count, rows_per_second=rows / seconds)
+        except Exception as e:
+            result['error'] = '{}: {}'.format(type(e).__name__, e)
+
+        results.append(result)
+
+    for rows in sizes:
+        for format_name in formats:
+            if format_name in readers() and format_name in GENERATORS and format_name not in _NETWORK:
+                for extension in ['.csv', '.xlsx']:
+                    if extension == '.xlsx' and (format_name in _CSV_ONLY or rows >= XLSX_MAX_ROWS):
+                        continue
+
+                    file = generate(
+                        format_name, os.path.join(directory, '{}-{}{}'.format(format_name, rows, extension)), rows
+                    )
+
+                    record('parse', format_name, extension, rows, _measure_parse, format_name, file)
+
+            if format_name in writers() and format_name in EXPORTS:
+                source_format, extension = EXPORTS[format_name]
+                source = os.path.join(directory, '{}-{}.csv'.format(source_format, rows))
+
+                if not os.path.exists(source):
+                    generate(source_format, source, rows)
+
+                output = os.path.join(directory, 'export-{}-{}{}'.format(format_name, rows, extension))
+
+                record('export', format_name, extension or '.xlsx', rows, _measure_export, format_name, source_format,
+                       source, output)
+
+    return results
+
+
+def _key(result):
+    return result['operation'], result['format'], result['extension'], result['rows']
+
+
+def main(arguments):
+    formats = arguments.formats or list(PARSER)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = benchmark(formats, arguments.rows, directory)
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    baseline = {}
+    if arguments.baseline:
+        with open(arguments.baseline) as file_:
+            baseline = {_key(result): result for result in json.load(file_)}
+
+    print('{:<8} {:<24} {:<6} {:>10} {:>10} {:>12} {:>10} {:>10}'.format(
+        'op', 'format', 'ext', 'rows', 'seconds', 'rows/s', 'RSS MB', 'change'
+    ))
+
+    for result in results:
+        if 'error' in result:
+            print('{:<8} {:<24} {:<6} {:>10d}  {}'.format(
+                result['operation'], result['format'], result['extension'], result['rows'], result['error']
+            ))
+            continue
+
+        previous = baseline.get(_key(result), {}).get('seconds')
+
+        print('{:<8} {:<24} {:<6} {:>10d} {:>10.3f} {:>12.0f} {:>10.1f} {:>10}'.format(
+            result['operation'], result['format'], result['extension'], result['rows'], result['seconds'],
+            result['rows_per_second'], result['peak_rss'] / 1E6,
+            '{:+.0%}'.format(result['seconds'] / previous - 1) if previous else ''
+        ))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(parse_arguments()))
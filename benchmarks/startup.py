@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Enforces the start-up time budget of the command line tools.
+
+The time of `tradingconv --help` and `binancecrawler --help` is compared to the start-up of a bare interpreter. The
+script fails if the overhead of a tool exceeds the budget.
+
+    python benchmarks/startup.py --budget 0.1
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# The commands to measure
+COMMANDS = {
+    'tradingconv': ['-m', 'deltaconv.converter', '--help'],
+    'binancecrawler': ['-m', 'deltaconv.crawler', '--help'],
+}
+
+# The allowed start-up overhead in seconds
+BUDGET = 0.1
+
+
+def parse_arguments():
+    """Parses the arguments the user passed to this script """
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark the start-up time of the command line tools.')
+
+    arg_parser.add_argument(
+        '--budget', help='The allowed start-up overhead in seconds.', type=float, default=BUDGET
+    )
+    arg_parser.add_argument(
+        '--repeat', help='The number of runs of each command. The fastest run counts.', type=int, default=10
+    )
+
+    return arg_parser.parse_args()
+
+
+def measure(args, repeat):
+    """
+    Get the fastest wall time of running the interpreter with the given arguments.
+
+    Returns:
+        float: The time in seconds
+
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+
+    times = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL, env=env)
+        times.append(time.perf_counter() - started)
+
+    return min(times)
+
+
+def main(arguments):
+    baseline = measure(['-c', 'pass'], arguments.repeat)
+
+    print('{:<16} {:>10} {:>10}'.format('command', 'seconds', 'overhead'))
+    print('{:<16} {:>10.3f} {:>10}'.format('python', baseline, ''))
+
+    failed = False
+
+    for name, args in COMMANDS.items():
+        seconds = measure(args, arguments.repeat)
+        overhead = seconds - baseline
+
+        failed = failed or overhead > arguments.budget
+
+        print('{:<16} {:>10.3f} {:>10.3f}{}'.format(
+            name, seconds, overhead, '' if overhead <= arguments.budget else '  exceeds the budget'
+        ))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(parse_arguments()))
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+
+class CacheMissError(LookupError):
+    """ Raise this exception if a response is not cached but the cache is used offline.
+
+    """
+    pass
+
+
+class ResponseCache(object):
+    """
+    An on-disk cache for the responses of Binance.
+
+    Each response is stored as a JSON file in `directory`, named after a hash of the key
+    (endpoint, mode, start, end, page). Only windows that ended longer than the settle time of their mode ago are
+    stored since their content will not change anymore, e.g. deposits may stay pending for a while.
+    """
+
+    # The time after which the records of a window do not change anymore
+    SETTLE = datetime.timedelta(hours=1)
+
+    # The settle time of modes whose records change their status, e.g. from pending to completed. The crawler caches
+    # deposits and withdrawals with the type of the exchange endpoint as mode.
+    SETTLE_MODES = {
+        'deposit': datetime.timedelta(days=7),
+        'withdraw': datetime.timedelta(days=7),
+        'withdrawal': datetime.timedelta(days=7),
+    }
+
+    def __init__(self, directory, offline=False):
+        """
+
+        Args:
+            directory (str):    The directory to store the responses in. Will be created if missing.
+            offline (bool):     If set, a cache miss raises a `CacheMissError` instead of querying Binance.
+        """
+        super().__init__()
+
+        self._directory = directory
+        self._offline = offline
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        os.makedirs(self._directory, exist_ok=True)
+
+    @property
+    def offline(self):
+        """
+        Whether the cache is used to replay responses without querying Binance.
+
+        Returns:
+            bool: True, if the cache is offline.
+
+        """
+        return self._offline
+
+    @property
+    def hits(self):
+        """
+        The number of responses served from the cache.
+
+        Returns:
+            int: The number of cache hits
+
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of responses not found in the cache.
+
+        Returns:
+            int: The number of cache misses
+
+        """
+        return self._misses
+
+    @classmethod
+    def cacheable(cls, end, mode=None, now=None):
+        """
+        Check whether the window ending at `end` is settled and can thus be cached permanently.
+
+        Args:
+            end (datetime.datetime):    The end of the query window
+            mode (str):                 The crawler mode, e.g. trading or deposit (optional)
+            now (datetime.datetime):    The current time (optional)
+
+        Returns:
+            bool: True, if the window ended longer than the settle time of the mode ago.
+
+        """
+        return end + cls.SETTLE_MODES.get(mode, cls.SETTLE) < (now or datetime.datetime.now())
+
+    def _path(self, endpoint, mode, start, end, page):
+        key = json.dumps([endpoint, mode, start.isoformat(), end.isoformat(), page])
+
+        return os.path.join(self._directory, '{}.json'.format(hashlib.sha1(key.encode()).hexdigest()))
+
+    def get(self, endpoint, mode, start, end, page):
+        """
+        Get the cached response of the given window.
+
+        Args:
+            endpoint (str):             The URL of the queried endpoint
+            mode (str):                 The crawler mode, e.g. trading or deposit
+            start (datetime.datetime):  The start of the window
+            end (datetime.datetime):    The end of the window
+            page (int):                 The page of the window
+
+        Raises:
+            CacheMissError: If the cache is offline and the window is not cached.
+
+        Returns:
+            any: The cached response or None if the window is not cached.
+
+        """
+        path = self._path(endpoint, mode, start, end, page)
+
+        try:
+            with open(path, 'r') as file_:
+                result = json.load(file_)
+        except (OSError, ValueError):
+            result = None
+
+        with self._lock:
+            if result is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if result is None and self._offline:
+            raise CacheMissError('The {} window from {} to {} (page {}) is not cached.'.format(mode, start, end, page))
+
+        return result
+
+    def put(self, endpoint, mode, start, end, page, response):
+        """
+        Store the response of the given window if the window is settled.
+
+        Args:
+            endpoint (str):             The URL of the queried endpoint
+            mode (str):                 The crawler mode, e.g. trading or deposit
+            start (datetime.datetime):  The start of the window
+            end (datetime.datetime):    The end of the window
+            page (int):                 The page of the window
+            response (any):             The JSON serializable response
+
+        Returns:
+            bool: True, if the response was stored.
+
+        """
+        if not self.cacheable(end, mode):
+            return False
+
+        path = self._path(endpoint, mode, start, end, page)
+
+        # write into a temporary file first so that concurrent readers never see partial files
+        tmp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+
+        with open(tmp_path, 'w') as file_:
+            json.dump(response, file_)
+
+        os.replace(tmp_path, path)
+
+        return True
@@ -13,49 +13,57 @@
 # GNU General Public License for more details.
 
 import argparse
+import copy
+import datetime
 import logging
 import sys
 
-from deltaconv.parser.binance import BinanceTradeParser, BinanceCrawlerTradeParser, BinanceCrawlerDepositParser, BinanceDepositParser
-from deltaconv.parser.bitpanda import BitpandaParser
-from deltaconv.parser.delta import DeltaParser
-from deltaconv.parser.parser import ParserOutdatedError
-
-PARSER = {
-    'binance-trades': {
-        'parser': BinanceTradeParser, 'config': {
-            'delimiter': ",",
-        }
-    },
-    'binance-deposit': {
-        'parser': BinanceDepositParser, 'config': {
-            'delimiter': ",",
-        }
-    },
-    'delta': {
-        'parser': DeltaParser, 'config': {
-            'delimiter': ',',
-        }
-    },
-    'binancecrawler-trades': {
-        'parser': BinanceCrawlerTradeParser, 'config': {
-            'delimiter': ';',
-        }
-    },
-    'binancecrawler-deposit': {
-        'parser': BinanceCrawlerDepositParser, 'config': {
-            'delimiter': ';',
-        }
-    },
-    'bitpanda': {
-        'parser': BitpandaParser, 'config': {
-            'delimiter': ','
-        }
-    }
-}
-
-# The list of available csv file exporter
-# EXPORTER = {name: PARSER[name] for name in ['binance', 'delta']}
+from deltaconv.fanout import ExportError, export_all, output_files
+from deltaconv.fees import FIAT, TARGETS, FeeNormalizer
+from deltaconv.index import transaction_time
+from deltaconv.parser.parser import ParserOutdatedError, Where
+from deltaconv.profiling import PROFILER, add_profile_arguments, report_profile
+from deltaconv.registry import PARSER, RECORDS_DEPOSITS, detect_formats, init_parser, writers
+from deltaconv.timezones import UTC, TimezoneError, ZoneConverter, get_zone
+from deltaconv.transaction import Deposit, Withdrawal
+from deltaconv.validate import SAMPLE_SIZE, validate
+
+
+def add_filter_arguments(arg_parser):
+    """
+    Add the arguments of the filters evaluated while reading
+
+    Args:
+        arg_parser (argparse.ArgumentParser): The parser of the command line arguments
+    """
+    group = arg_parser.add_argument_group(
+        'Filter', 'Only the rows matching all given filters are converted. The filters are evaluated while reading.'
+    )
+
+    group.add_argument(
+        '--start', help='Skip transactions before this UTC date in format YYYY-MM-DD[ HH:MM:SS].', type=_datetime
+    )
+
+    group.add_argument(
+        '--end', help='Skip transactions at or after this UTC date in format YYYY-MM-DD[ HH:MM:SS].', type=_datetime
+    )
+
+    group.add_argument('--type', help='Only convert transactions of these types, e.g. BUY SELL.', nargs='+')
+
+    group.add_argument('--currency', help='Only convert transactions involving one of these currencies.', nargs='+')
+
+
+def where_from_arguments(arguments):
+    """
+    Get the filter given on the command line
+
+    Returns:
+        Where: The filter or None if no filter is given
+    """
+    if any([arguments.start, arguments.end, arguments.type, arguments.currency]):
+        return Where(start=arguments.start, end=arguments.end, types=arguments.type, currencies=arguments.currency)
+
+    return None
 
 
 def parse_arguments():
@@ -68,66 +76,411 @@ def parse_arguments():
             Binance.'''
     )
 
-    arg_parser.add_argument('--file', help="The csv file", required=True)
+    arg_parser.add_argument('--file', help="The csv file", required=False)
 
-    arg_parser.add_argument('--format', help="The output transaction format.", required=True, choices=PARSER.keys())
+    arg_parser.add_argument(
+        '--format', help="The output transaction formats. The file is parsed once and exported into each format.",
+        choices=writers(), nargs='+'
+    )
 
     arg_parser.add_argument(
         '--output',
-        help="The name of the file to save the transactions into without extension.",
+        help="The files to save the transactions into; one per format or a single one the name of each format is "
+             "inserted into, e.g. history.csv becomes history.delta.csv. Formats writing xlsx files, e.g. "
+             "binance-trades, replace the extension by .xlsx.",
         required=False,
-        default=None
+        default=None,
+        nargs='+'
     )
 
-    return arg_parser.parse_args()
+    add_filter_arguments(arg_parser)
 
+    group = arg_parser.add_argument_group('Valuation', 'Value each trade in a fiat currency based on local prices.')
 
-def init_parser(source_format):
-    """ Initialize a Parser based on the given source format
+    group.add_argument('--prices', help='The directory of the candle files, see deltaconv.prices.')
 
-    Args:
-        source_format: The format of the source file, e.g. binance.
+    group.add_argument('--fiat', help='The fiat currency of the values. Default: %(default)s', default='EUR')
+
+    group.add_argument(
+        '--fees', help='Convert each fee into the quote currency of its trade or into --fiat. Fees in coins other than '
+        'the ones of the trade require --prices.', choices=TARGETS
+    )
+
+    group = arg_parser.add_argument_group(
+        'Transaction store',
+        'Keep the history in a SQLite database. With --file, the parsed transactions are added to the store. Without '
+        '--file, the transactions matching the filters are read from the store and exported.'
+    )
+
+    group.add_argument('--store', help='The path of the SQLite database.')
+
+    group = arg_parser.add_argument_group(
+        'Transfers', 'Link the deposits of --file to the withdrawals they resulted in and export the transfers.'
+    )
+
+    group.add_argument('--withdrawals', help='The file of withdrawals, e.g. from another exchange.')
+
+    group.add_argument(
+        '--window', help='The maximum number of hours between a withdrawal and its deposit. Default: %(default)s',
+        type=float, default=24
+    )
+
+    group = arg_parser.add_argument_group('Time zones', 'The times are converted through UTC.')
+
+    group.add_argument(
+        '--timezone', help='The time zone of the exported times, e.g. Europe/Berlin or +01:00. Default: %(default)s',
+        default=UTC, type=_timezone
+    )
+
+    group.add_argument(
+        '--source-timezone', help='The time zone of the times in --file. Defaults to the one of its format, e.g. UTC '
+        'for Binance.', type=_timezone
+    )
+
+    add_profile_arguments(arg_parser)
+
+    group = arg_parser.add_argument_group(
+        'Validation', 'Check the header, delimiter and column types of the file instead of converting it.'
+    )
+
+    group.add_argument('--validate', help='Validate the file based on a sample of its rows.', action='store_true')
+
+    group.add_argument(
+        '--full-scan', help='Validate every row of the file and report each bad row.', action='store_true'
+    )
+
+    group.add_argument(
+        '--sample', help='The number of rows to validate. Default: %(default)s', type=int, default=SAMPLE_SIZE
+    )
+
+    arguments = arg_parser.parse_args()
+
+    if not arguments.file and not arguments.store:
+        arg_parser.error('the following arguments are required: --file or --store')
+
+    if (arguments.validate or arguments.full_scan) and not arguments.file:
+        arg_parser.error('the following arguments are required: --file')
+
+    if not arguments.format and not (arguments.validate or arguments.full_scan or arguments.store):
+        arg_parser.error('the following arguments are required: --format')
+
+    if not arguments.format and not arguments.file:
+        arg_parser.error('the following arguments are required: --format')
+
+    if arguments.withdrawals and (not arguments.file or arguments.format != ['delta']):
+        arg_parser.error('--withdrawals requires --file with deposits and --format delta')
+
+    if arguments.format:
+        if not arguments.output:
+            arg_parser.error('the following arguments are required: --output')
+
+        try:
+            arguments.output = output_files(arguments.output, arguments.format)
+        except ValueError as e:
+            arg_parser.error(str(e))
+
+        if not arguments.file and len({PARSER[name].get('records') for name in arguments.format}) > 1:
+            arg_parser.error('--store requires formats of either trades or deposits')
+
+    return arguments
+
+
+def _datetime(value):
+    """ Parse a date given on the command line """
+    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d']:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+
+    raise argparse.ArgumentTypeError('The date {} has to be in format YYYY-MM-DD[ HH:MM:SS].'.format(value))
+
+
+def _timezone(value):
+    """ Check a time zone given on the command line """
+    try:
+        get_zone(value)
+    except TimezoneError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+    return value
+
+
+def _validate(arguments):
+    """ Validate the file instead of converting it
+
+    Returns:
+        int: The exit code
     """
+    result = validate(arguments.file, sample=arguments.sample, full=arguments.full_scan)
 
-    choice = PARSER[source_format]
+    if result.format is None:
+        logging.error('The header of %s does not match any supported format.', arguments.file)
 
-    return choice['parser'](**choice['config'])
+        return 1
 
+    for problem in result.problems:
+        location = 'line {}'.format(problem.line) if problem.line is not None else 'byte {}'.format(problem.offset)
+
+        if problem.column is None:
+            logging.error('%s: %s', location, problem.message)
+        else:
+            logging.error('%s: %s, got %r in column %s', location, problem.message, problem.value, problem.column)
+
+    logging.info(
+        '%s %s as %s - checked %d rows, found %d problems.',
+        arguments.file, 'is valid' if result.valid else 'is invalid', result.format, result.checked,
+        len(result.problems)
+    )
+
+    return 0 if result.valid else 1
 
-if __name__ == "__main__":
-    arguments = parse_arguments()
 
-    formatter = logging.Formatter(fmt='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+def _to_utc(transaction_list, zone):
+    """ Convert the times of the trades or deposits from the given time zone into UTC """
+    with PROFILER.stage('timezone') as stage:
+        times = ZoneConverter(zone).to_utc([transaction_time(t) for t in transaction_list])
 
-    screenhandler = logging.StreamHandler(stream=sys.stdout)
-    screenhandler.setFormatter(formatter)
+        for t, time in zip(transaction_list, times):
+            if isinstance(t, Deposit):
+                t.timestamp = time
+            else:
+                t.datetime = time
 
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    logger.addHandler(screenhandler)
+        stage.rows += len(times)
 
-    transaction_list = []
-    parser = None
 
-    logging.info('Try to parse the file %s', arguments.file)
-    for name in PARSER:
+def _parse_file(file, where, timezone=None):
+    """ Parse the file with the first parser matching its format
+
+    Args:
+        file (str):         The file
+        where (Where):      The filter in UTC
+        timezone (str):     The time zone of the times in the file. Defaults to the one of its format.
+
+    Returns:
+        list[Transaction]: The transactions with times in UTC or None if no parser supports the file. The list is
+            empty if the filter does not match any transaction.
+    """
+    logging.info('Try to parse the file %s', file)
+
+    result = None
+
+    # only the parsers of the formats matching the header of the file are imported
+    for name in detect_formats(file):
         try:
             parser = init_parser(name)
+            zone = get_zone(timezone or PARSER[name].get('timezone', UTC))
+            converter = ZoneConverter(zone)
+
+            # the filter is evaluated on the times as they are in the file
+            where_ = where
+            if where is not None and not converter.is_utc:
+                where_ = copy.copy(where)
+                where_.start, where_.end = (
+                    converter.to_local([value])[0] if value else value for value in (where.start, where.end)
+                )
+
+            # without the nested stages, e.g. read, the time of the stage is the time to create the transactions
+            with PROFILER.stage('construct') as stage:
+                transaction_list = parser.parse(file, where=where_)
+                stage.rows += len(transaction_list)
+
+            if transaction_list:
+                if not converter.is_utc:
+                    _to_utc(transaction_list, zone)
 
-            transaction_list = parser.parse(arguments.file)
+                return transaction_list
 
-            break
+            # another format matching the header may still parse the file
+            result = transaction_list
         except (ParserOutdatedError, NotImplementedError):
             pass
 
-    if not transaction_list:
-        logging.error('The format of the given file is currently not supported.')
+    return result
+
+
+def _query_store(store, arguments, where):
+    """ Read the transactions of the kind of the output formats from the store
+
+    Returns:
+        list[Transaction]: The transactions
+    """
+    with PROFILER.stage('query') as stage:
+        if PARSER[arguments.format[0]].get('records') == RECORDS_DEPOSITS:
+            transaction_list = list(store.deposits(where))
+        else:
+            transaction_list = list(store.trades(where))
+
+        stage.rows += len(transaction_list)
+
+    logging.info('Read %d transactions from %s.', len(transaction_list), arguments.store)
+
+    return transaction_list
+
+
+def _match_transfers(deposits, arguments, where):
+    """ Link the deposits to the withdrawals of the withdrawals file
+
+    Returns:
+        list[Transfer|Deposit|Withdrawal]: The transfers and the deposits and withdrawals without a match in the order
+            of their time or None if the withdrawals file is not supported
+    """
+    from deltaconv.transfers import match_transfers
+
+    withdrawals = _parse_file(arguments.withdrawals, where)
+
+    if withdrawals is None:
+        return None
+
+    with PROFILER.stage('match') as stage:
+        transfers, withdrawals, deposits = match_transfers(
+            withdrawals, deposits, window=datetime.timedelta(hours=arguments.window)
+        )
+        stage.rows += len(transfers)
+
+    logging.info('Matched %d transfers, %d withdrawals and %d deposits are left without a match.', len(transfers),
+                 len(withdrawals), len(deposits))
+
+    # the records without a match are exported on their own
+    return sorted(
+        transfers + [Withdrawal.from_deposit(w) for w in withdrawals] + deposits, key=transaction_time
+    )
+
+
+def main(arguments=None):
+    """ Entry point of tradingconv
+
+    Args:
+        arguments (argparse.Namespace): The command line arguments. Will be parsed if not given.
+
+    Returns:
+        int: The exit code
+    """
+    if arguments is None:
+        formatter = logging.Formatter(fmt='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+        screenhandler = logging.StreamHandler(stream=sys.stdout)
+        screenhandler.setFormatter(formatter)
+
+        logger = logging.getLogger()
+        logger.setLevel(logging.INFO)
+        logger.addHandler(screenhandler)
+
+        # tradingconv report ...
+        if sys.argv[1:2] == ['report']:
+            from deltaconv.report import main as report
+
+            return report(sys.argv[2:])
+
+        arguments = parse_arguments()
+
+    if arguments.validate or arguments.full_scan:
+        return _validate(arguments)
+
+    PROFILER.enabled = bool(arguments.profile)
+
+    where = where_from_arguments(arguments)
+
+    store = None
+    if arguments.store:
+        from deltaconv.store import TransactionStore
+
+        store = TransactionStore(arguments.store)
+
+    if arguments.file:
+        transaction_list = _parse_file(arguments.file, where, arguments.source_timezone)
+
+        if transaction_list is None:
+            logging.error('The format of the given file is currently not supported.')
+
+            return 1
+
+        if not transaction_list:
+            logging.warning('The file does not contain any transactions matching the filters.')
 
-    else:
         logging.info('Parsing was successful.')
-        logging.info('Export %d transactions to %s.', len(transaction_list), arguments.output)
-        parser = init_parser(arguments.format)
+    else:
+        transaction_list = _query_store(store, arguments, where)
+
+        if not transaction_list:
+            logging.error('The store does not contain any matching transactions.')
+
+            return 1
+
+    if arguments.prices:
+        from deltaconv.prices import PriceStore
+
+        with PROFILER.stage('valuation') as stage:
+            missing = PriceStore(arguments.prices).enrich(
+                [t for t in transaction_list if hasattr(t, 'trading_pair')], arguments.fiat
+            )
+            stage.rows += len(transaction_list)
+
+        if missing:
+            logging.warning('%d transaction(s) could not be valued in %s.', missing, arguments.fiat)
+
+    if store is not None and arguments.file:
+        with PROFILER.stage('store') as stage:
+            added = store.add(transaction_list)
+            stage.rows += len(transaction_list)
 
-        parser.export(transaction_list, arguments.output)
+        logging.info('Added or updated %d of %d transactions in %s.', added, len(transaction_list), arguments.store)
 
-        logging.info('Finished - will exit gracefully.')
+    # only the exported transactions are converted - the store keeps the fees as they were charged
+    if arguments.fees:
+        from deltaconv.prices import PriceStore
+
+        prices = PriceStore(arguments.prices) if arguments.prices else None
+
+        with PROFILER.stage('fees') as stage:
+            trades = [t for t in transaction_list if hasattr(t, 'trading_pair')]
+            missing = FeeNormalizer(prices).normalize(
+                trades, fiat=arguments.fiat if arguments.fees == FIAT else None
+            )
+            stage.rows += len(trades)
+
+        if missing:
+            logging.warning('%d fee(s) could not be converted and are kept in their coin.', missing)
+
+    if arguments.withdrawals:
+        transaction_list = _match_transfers(transaction_list, arguments, where)
+
+        if transaction_list is None:
+            logging.error('The format of the withdrawals file %s is currently not supported.', arguments.withdrawals)
+
+            return 1
+
+    if arguments.format:
+        targets = []
+
+        for name, output in zip(arguments.format, arguments.output):
+            logging.info('Export %d transactions to %s.', len(transaction_list), output)
+            parser = init_parser(name)
+            parser.timezone = get_zone(arguments.timezone)
+            targets.append((parser, output))
+
+        with PROFILER.stage('export') as stage:
+            if len(targets) == 1:
+                parser, output = targets[0]
+                parser.export(transaction_list, output)
+            else:
+                try:
+                    export_all(transaction_list, targets)
+                except ExportError as e:
+                    logging.error('%s', e)
+
+                    return 1
+
+            stage.rows += len(transaction_list)
+
+    if arguments.profile:
+        report_profile(arguments.profile, arguments.profile_output)
+
+    logging.info('Finished - will exit gracefully.')
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
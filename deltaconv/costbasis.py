@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Computes the realized gains of trades based on tax lots.
+
+Each buy creates a lot of the bought currency, each sell consumes lots in the order given by the method:
+
+* fifo: the oldest lots first
+* lifo: the newest lots first
+* hifo: the lots with the highest cost per coin first
+
+Without a valuation, costs and proceeds are measured in the quote currency of the trades, e.g. ETH bought for BTC has
+a cost in BTC, so lots are kept per pair. With a valuation into a single currency, e.g. EUR, lots are kept per
+currency and both sides of a trade count, i.e. buying ETH for BTC also disposes of BTC.
+
+    engine = CostBasis(method=FIFO)
+    engine.process(transactions)
+
+    for gain in engine.gains:
+        ...
+"""
+import collections
+import heapq
+import logging
+
+from deltaconv.index import in_time_order
+
+FIFO = 'fifo'
+
+LIFO = 'lifo'
+
+HIFO = 'hifo'
+
+METHODS = [FIFO, LIFO, HIFO]
+
+# Remainders of lots below this amount are dropped
+_EPSILON = 1E-12
+
+# The part of a disposal covered by a single lot. Disposals without enough lots have an uncovered part with `acquired`
+# set to None and no cost.
+RealizedGain = collections.namedtuple(
+    'RealizedGain', ['currency', 'unit', 'acquired', 'disposed', 'amount', 'cost', 'proceeds']
+)
+
+
+class _Lot(object):
+    __slots__ = ['amount', 'unit_cost', 'acquired']
+
+    def __init__(self, amount, unit_cost, acquired):
+        self.amount = amount
+        self.unit_cost = unit_cost
+        self.acquired = acquired
+
+
+class _Queue(object):
+    """ The lots of a currency consumed oldest (fifo) or newest (lifo) first """
+
+    def __init__(self, newest_first=False):
+        super().__init__()
+
+        self._lots = collections.deque()
+        self._newest_first = newest_first
+
+    def __len__(self):
+        return len(self._lots)
+
+    def push(self, lot):
+        self._lots.append(lot)
+
+    def head(self):
+        return self._lots[-1] if self._newest_first else self._lots[0]
+
+    def pop(self):
+        return self._lots.pop() if self._newest_first else self._lots.popleft()
+
+    def lots(self):
+        return list(self._lots)
+
+
+class _Heap(object):
+    """ The lots of a currency consumed with the highest cost per coin first """
+
+    def __init__(self):
+        super().__init__()
+
+        self._lots = []
+        self._count = 0
+
+    def __len__(self):
+        return len(self._lots)
+
+    def push(self, lot):
+        # the counter keeps lots of the same cost in the order they were acquired
+        heapq.heappush(self._lots, (-lot.unit_cost, self._count, lot))
+        self._count += 1
+
+    def head(self):
+        return self._lots[0][2]
+
+    def pop(self):
+        return heapq.heappop(self._lots)[2]
+
+    def lots(self):
+        return [entry[2] for entry in sorted(self._lots, key=lambda entry: entry[1])]
+
+
+class CostBasis(object):
+    """
+    The lots of all currencies and the gains realized by the processed trades.
+    """
+
+    def __init__(self, method=FIFO, valuation=None, unit=None):
+        """
+
+        Args:
+            method (str):           The order lots are consumed in; FIFO, LIFO or HIFO
+            valuation (Callable):   A function valuing an amount of a currency at a time, i.e.
+                                    `valuation(currency, amount, datetime) -> float` (optional)
+            unit (str):             The currency of the valuation, e.g. EUR (optional)
+        """
+        super().__init__()
+
+        if method not in METHODS:
+            raise ValueError('The method {} is not one of {}.'.format(method, ', '.join(METHODS)))
+
+        self.method = method
+        self.valuation = valuation
+        self.unit = unit
+
+        self.gains = []
+
+        # the number of fees that could not be valued in the quote currency
+        self.unvalued_fees = 0
+
+        self._lots = {}
+
+    def _queue(self, key):
+        queue = self._lots.get(key)
+
+        if queue is None:
+            queue = self._lots[key] = _Heap() if self.method == HIFO else _Queue(newest_first=self.method == LIFO)
+
+        return queue
+
+    def acquire(self, currency, unit, amount, cost, datetime):
+        """
+        Add a lot.
+
+        Args:
+            currency (str):                 The acquired currency, e.g. ETH
+            unit (str):                     The currency of the cost, e.g. BTC
+            amount (float):                 The acquired amount
+            cost (float):                   The cost of the whole amount including fees
+            datetime (datetime.datetime):   The time of the acquisition
+        """
+        if amount > _EPSILON:
+            self._queue((currency, unit)).push(_Lot(amount, cost / amount, datetime))
+
+    def dispose(self, currency, unit, amount, proceeds, datetime):
+        """
+        Consume lots and realize the gains.
+
+        Args:
+            currency (str):                 The disposed currency, e.g. ETH
+            unit (str):                     The currency of the proceeds, e.g. BTC
+            amount (float):                 The disposed amount
+            proceeds (float):               The proceeds of the whole amount after fees
+            datetime (datetime.datetime):   The time of the disposal
+        """
+        if amount <= _EPSILON:
+            return
+
+        queue = self._queue((currency, unit))
+        unit_proceeds = proceeds / amount
+        remaining = amount
+
+        while remaining > _EPSILON and len(queue):
+            lot = queue.head()
+            used = min(lot.amount, remaining)
+
+            self.gains.append(
+                RealizedGain(currency, unit, lot.acquired, datetime, used, used * lot.unit_cost, used * unit_proceeds)
+            )
+
+            lot.amount -= used
+            remaining -= used
+
+            if lot.amount <= _EPSILON:
+                queue.pop()
+
+        if remaining > _EPSILON:
+            # e.g. a deposit of coins bought somewhere else
+            self.gains.append(RealizedGain(currency, unit, None, datetime, remaining, 0.0, remaining * unit_proceeds))
+
+    def _fee(self, transaction, quote, base):
+        """ Get the value of the fee of the transaction in the unit of the gains """
+        fee = transaction.fee
+
+        if not fee.amount:
+            return 0.0
+
+        if self.valuation is not None:
+            return self.valuation(fee.currency, fee.amount, transaction.datetime)
+
+        if fee.currency == quote.currency:
+            return fee.amount
+
+        if fee.currency == base.currency:
+            return fee.amount * transaction.price
+
+        # e.g. a fee paid in BNB without a valuation
+        self.unvalued_fees += 1
+
+        return 0.0
+
+    def add(self, transaction):
+        """
+        Process a single trade. Trades have to be added in the order of their time.
+
+        Args:
+            transaction (CryptoTransaction): The trade
+        """
+        quote, base = transaction.trading_pair
+        side = str(transaction.type).upper()
+
+        if side not in ('BUY', 'SELL'):
+            return
+
+        bought, sold = (base, quote) if side == 'BUY' else (quote, base)
+        unit = quote.currency if self.valuation is None else self.unit
+
+        # a fee paid in a bought coin with lots reduces the amount acquired instead of adding to its cost, e.g. a buy of
+        # 1 ETH with a fee of 0.001 ETH acquires 0.999 ETH. A fee in the unit of account reduces the proceeds.
+        received = bought.amount
+        fee = 0.0
+
+        if transaction.fee.amount and transaction.fee.currency == bought.currency != unit:
+            received -= transaction.fee.amount
+        else:
+            fee = self._fee(transaction, quote, base)
+
+        if self.valuation is None:
+            # the quote currency is the unit of account of the pair
+            if side == 'BUY':
+                self.acquire(base.currency, quote.currency, received, quote.amount + fee, transaction.datetime)
+            else:
+                self.dispose(base.currency, quote.currency, base.amount, quote.amount - fee, transaction.datetime)
+
+            return
+
+        value = self.valuation(quote.currency, quote.amount, transaction.datetime)
+
+        # exchanging one currency for another disposes of the sold one at the value of the trade. The valuation
+        # currency itself has no lots, e.g. when buying coins for euros.
+        if sold.currency == self.unit:
+            self.acquire(bought.currency, self.unit, received, value + fee, transaction.datetime)
+        elif bought.currency == self.unit:
+            self.dispose(sold.currency, self.unit, sold.amount, value - fee, transaction.datetime)
+        else:
+            self.dispose(sold.currency, self.unit, sold.amount, value - fee, transaction.datetime)
+            self.acquire(bought.currency, self.unit, received, value, transaction.datetime)
+
+    def process(self, transactions):
+        """
+        Process the trades in the order of their time.
+
+        Args:
+            transactions (Iterable[CryptoTransaction]): The trades
+
+        Returns:
+            list[RealizedGain]: The gains realized so far
+        """
+        for transaction in in_time_order(transactions):
+            self.add(transaction)
+
+        if self.unvalued_fees:
+            logging.warning('%d fee(s) are paid in a third currency and not included without a valuation.',
+                            self.unvalued_fees)
+
+        return self.gains
+
+    def holdings(self):
+        """
+        Get the lots that were not consumed yet.
+
+        Returns:
+            dict[tuple[str, str], list[tuple[datetime.datetime, float, float]]]: The acquisition time, amount and cost
+            per coin of the lots of each currency and unit
+        """
+        return {
+            key: [(lot.acquired, lot.amount, lot.unit_cost) for lot in queue.lots()]
+            for key, queue in self._lots.items() if len(queue)
+        }
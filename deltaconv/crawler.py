@@ -12,16 +12,28 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU General Public License for more details.
 import argparse
+import collections
+import contextlib
+import csv
 import datetime
+import itertools
 import json
 import logging
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from json.decoder import JSONDecodeError
 from typing import Callable
 
-import pandas as pd
-import requests
+from deltaconv.cache import ResponseCache, CacheMissError
+from deltaconv.fanout import writer_output
+from deltaconv.jsonstream import JSONArrayStream
+from deltaconv.parser.binance import BinanceCrawlerTradeParser, BinanceCrawlerDepositParser
+from deltaconv.profiling import PROFILER, add_profile_arguments, report_profile
+from deltaconv.registry import PARSER, RECORDS_DEPOSITS, RECORDS_TRADES, init_parser, writers
+from deltaconv.retry import AdaptiveLimiter, ResponseError, RetryError, RetryPolicy, ThrottledError
 
 
 class Mode(Enum):
@@ -35,6 +47,247 @@ MODES = {
     Mode.TRADING.value: None, Mode.DEPOSIT.value: None, Mode.WITHDRAWAL.value: None
 }    # type: dict[str, Callable]
 
+# Run all of the modes above
+MODE_ALL = "all"
+
+# The resolution of the timestamps used by Binance
+_RESOLUTION = datetime.timedelta(milliseconds=1)
+
+# A query window that could not be retrieved from Binance
+FailedWindow = collections.namedtuple('FailedWindow', ['mode', 'start', 'end', 'reason'])
+
+# The columns of withdrawals: the ones of deposits and the fee and time of the withdrawal request
+WITHDRAWAL_COLUMNS = BinanceCrawlerDepositParser._COLUMNS + ['transactionFee', 'applyTime']
+
+# The columns written for each mode
+SCHEMAS = {
+    Mode.TRADING.value: BinanceCrawlerTradeParser._COLUMNS,
+    Mode.DEPOSIT.value: BinanceCrawlerDepositParser._COLUMNS,
+    Mode.WITHDRAWAL.value: WITHDRAWAL_COLUMNS,
+}
+
+
+# The parsers converting the records of each mode into transactions
+CONVERTERS = {
+    Mode.TRADING.value: BinanceCrawlerTradeParser,
+    Mode.DEPOSIT.value: BinanceCrawlerDepositParser,
+}
+
+# The kind of records each mode is converted into, see `deltaconv.registry`
+RECORDS = {
+    Mode.TRADING.value: RECORDS_TRADES,
+    Mode.DEPOSIT.value: RECORDS_DEPOSITS,
+}
+
+
+def format_error(format, modes):
+    """
+    Check whether the records of the modes can be converted into the given format.
+
+    Args:
+        format (str):       The tradingconv format, e.g. delta
+        modes (list[str]):  The crawler modes
+
+    Returns:
+        str: The reason why they cannot be converted or None if they can
+    """
+    if not set(modes) <= CONVERTERS.keys():
+        return 'The --format is only supported in the modes {}.'.format(', '.join(CONVERTERS))
+
+    records = PARSER[format].get('records') or RECORDS_TRADES
+    unfit = [mode for mode in modes if RECORDS[mode] != records]
+
+    if unfit:
+        return 'The --format {} exports {}, which does not fit the records of the mode(s) {}.'.format(
+            format, records, ', '.join(unfit)
+        )
+
+    return None
+
+
+def convert_records(records, mode):
+    """
+    Convert the records retrieved from Binance into transactions without writing them into a csv file first.
+
+    Args:
+        records (Iterable[dict]):   The records as retrieved from Binance
+        mode (str):                 The mode the records were retrieved with, e.g. trading
+
+    Yields:
+        CryptoTransaction|Deposit: The converted records
+
+    """
+    parser = CONVERTERS[mode]
+    header = list(parser._COLUMNS)
+
+    for record in records:
+        with PROFILER.stage('construct') as stage:
+            # convert the cells like they were read from a csv file created by the crawler
+            transaction = parser.convert([parser._convert_cell(record.get(c)) for c in header], header)
+            stage.rows += 1
+
+        yield transaction
+
+
+def _store_records(records, mode, store):
+    """
+    Pass the records through while their transactions are written into the store.
+
+    Args:
+        records (Iterable[dict]):   The records as retrieved from Binance
+        mode (str):                 The mode the records were retrieved with, e.g. trading
+        store (TransactionStore):   The store
+
+    Yields:
+        dict: The records
+
+    """
+    with store.writer() as writer:
+        for record in records:
+            for transaction in convert_records([record], mode):
+                writer.add(transaction)
+
+            yield record
+
+
+class RecordWriter(object):
+    """
+    Writes the records retrieved from Binance into a `;` separated csv file while they are retrieved.
+
+    The columns are taken from a declared schema so that they do not depend on the first record. Fields that are
+    not part of the schema are skipped, missing fields are left empty.
+    """
+
+    # The number of records after which the file is flushed
+    _FLUSH_INTERVAL = 1000
+
+    def __init__(self, file, fieldnames=None):
+        """
+
+        Args:
+            file (str):             The path of the csv file
+            fieldnames (list[str]): The columns of the file. If not given, the fields of the first record are used.
+        """
+        super().__init__()
+
+        self._path = file
+        self._fieldnames = fieldnames
+
+        self._file = None
+        self._writer = None
+        self._count = 0
+        self._unknown = set()
+
+    @property
+    def count(self):
+        """
+        The number of records written so far.
+
+        Returns:
+            int: The number of records
+
+        """
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, record):
+        """
+        Write a single record.
+
+        Args:
+            record (dict): The record as retrieved from Binance
+
+        """
+        if self._writer is None:
+            # the file is created with the first record to not leave empty files behind
+            self._fieldnames = self._fieldnames or list(record.keys())
+
+            self._file = open(self._path, 'w', newline='')
+            self._writer = csv.DictWriter(
+                self._file, fieldnames=self._fieldnames, delimiter=';', restval='', extrasaction='ignore'
+            )
+            self._writer.writeheader()
+
+        unknown = record.keys() - set(self._fieldnames) - self._unknown
+        if unknown:
+            logging.warning('Skip the unknown field(s) %s', ', '.join(sorted(unknown)))
+
+            self._unknown.update(unknown)
+
+        self._writer.writerow(record)
+        self._count += 1
+
+        if self._count % self._FLUSH_INTERVAL == 0:
+            self._file.flush()
+
+    def write_all(self, records):
+        """
+        Write all records of the iterable.
+
+        Args:
+            records (Iterable[dict]): The records as retrieved from Binance
+
+        """
+        for record in records:
+            with PROFILER.stage('write') as stage:
+                self.write(record)
+                stage.rows += 1
+
+    def close(self):
+        """ Flush and close the file. """
+        if self._file is not None:
+            with PROFILER.stage('write') as stage:
+                stage.bytes += self._file.tell()
+                self._file.close()
+
+            self._file = None
+
+
+def plan_intervals(start, end, size=datetime.timedelta(weeks=4)):
+    """
+    Split the interval from `start` to `end` into windows of the given size.
+
+    The windows are gap-free and do not overlap: each window ends one millisecond - the resolution of the timestamps
+    of Binance - before the next one starts. The last window ends at `end` and may thus be shorter than `size`.
+
+    Args:
+        start (datetime.datetime):  The start time
+        end (datetime.datetime):    The end time (inclusive)
+        size (datetime.timedelta):  The size of each window
+
+    Yields:
+        tuple[datetime.datetime, datetime.datetime]: The start and end of each window
+
+    """
+    if size <= _RESOLUTION:
+        raise ValueError('The window size has to be larger than {}.'.format(_RESOLUTION))
+
+    while start <= end:
+        window_end = min(start + size - _RESOLUTION, end)
+
+        yield start, window_end
+
+        start = window_end + _RESOLUTION
+
+
+def _timestamp(value):
+    """
+    Convert the given datetime into a Binance timestamp.
+
+    Args:
+        value (datetime.datetime): The datetime
+
+    Returns:
+        int: The milliseconds since the epoch
+
+    """
+    return int(round(value.timestamp() * 1000))
+
 
 def fetch_trades(connection, arguments):
     """
@@ -45,7 +298,7 @@ def fetch_trades(connection, arguments):
         arguments (argparse.Namespace): The command line arguments.
 
     Returns:
-        list[dict]: A list of trades
+        Iterable[dict]: The trades as they are retrieved
     """
     try:
         start_date = datetime.datetime.strptime(arguments.start, '%Y-%m-%d %H:%M:%S')
@@ -63,6 +316,7 @@ def fetch_trades(connection, arguments):
     return connection.trades(
         start=start_date,
         end=end_date,
+        stream=True,
     )
 
 
@@ -75,7 +329,7 @@ def fetch_deposits(connection, arguments):
         arguments (argparse.Namespace): The command line arguments.
 
     Returns:
-        list[dict]: A list of deposits
+        Iterable[dict]: The deposits as they are retrieved
     """
     try:
         start_date = datetime.datetime.strptime(arguments.start, '%Y-%m-%d %H:%M:%S')
@@ -93,6 +347,7 @@ def fetch_deposits(connection, arguments):
     return connection.deposits(
         start=start_date,
         end=end_date,
+        stream=True,
     )
 
 
@@ -105,7 +360,7 @@ def fetch_withdrawals(connection, arguments):
         arguments (argparse.Namespace): The command line arguments.
 
     Returns:
-        list[dict]: A list of withdrawals
+        Iterable[dict]: The withdrawals as they are retrieved
     """
     try:
         start_date = datetime.datetime.strptime(arguments.start, '%Y-%m-%d %H:%M:%S')
@@ -120,7 +375,7 @@ def fetch_withdrawals(connection, arguments):
     else:
         end_date = arguments.end
 
-    return connection.withdrawals(start=start_date, end=end_date)
+    return connection.withdrawals(start=start_date, end=end_date, stream=True)
 
 
 def parse_arguments():
@@ -139,15 +394,34 @@ def parse_arguments():
     arg_parser.add_argument(
         '--cookies',
         help='A file containing the cookies for a Binance session.',
-        required=True,
+        required=False,
         type=argparse.FileType('rt')
     )
 
-    arg_parser.add_argument('--token', help='The csrftoken in the HTTP header.', required=True)
+    arg_parser.add_argument('--token', help='The csrftoken in the HTTP header.', required=False)
 
-    arg_parser.add_argument('--output', help='The name of the CSV file with format.', required=True)
+    arg_parser.add_argument(
+        '--output',
+        help='The name of the CSV file with format. If multiple modes are given, the mode is appended to the name, '
+        'e.g. binance_deposit.csv. With --accounts, the directory to write the files of each account into.',
+        required=True
+    )
 
-    arg_parser.add_argument('--mode', choices=MODES, required=True)
+    arg_parser.add_argument(
+        '--mode',
+        help='One or more modes to run concurrently or "{}" for all modes.'.format(MODE_ALL),
+        choices=[*MODES, MODE_ALL],
+        nargs='+',
+        required=False
+    )
+
+    arg_parser.add_argument(
+        '--accounts',
+        help='A JSON file with the accounts to crawl concurrently. Each account may specify a name, cookies (the path '
+        'of the cookie file), token, mode, start, end and workers. Missing values are taken from the command line.',
+        required=False,
+        default=None
+    )
 
     group = arg_parser.add_argument_group('Trade history')
 
@@ -161,27 +435,257 @@ def parse_arguments():
         default=datetime.datetime.now()
     )
 
+    arg_parser.add_argument(
+        '--url',
+        help='The base URL of Binance, e.g. of a local mock server started with python -m deltaconv.mockserver.',
+        required=False,
+        default=None
+    )
+
+    group.add_argument(
+        '--window',
+        help='The size of the windows the interval is split into in days. Binance returns at most 1000 records per '
+        'window.',
+        type=float,
+        default=28
+    )
+
+    group = arg_parser.add_argument_group('Conversion')
+
+    group.add_argument(
+        '--format',
+        help='Convert the records directly into the given tradingconv format instead of writing the crawler csv '
+        'format, e.g. delta for trades or binance-deposit for deposits. Not supported for withdrawals.',
+        choices=writers(),
+        required=False,
+        default=None
+    )
+
+    group.add_argument(
+        '--store',
+        help='Also write the trades and deposits into this SQLite transaction store, see tradingconv --store.',
+        required=False,
+        default=None
+    )
+
+    group = arg_parser.add_argument_group('Response cache')
+
+    group.add_argument(
+        '--cache',
+        help='A directory to cache the responses of closed historical windows in.',
+        required=False,
+        default=None
+    )
+
+    group.add_argument(
+        '--offline',
+        help='Replay the responses from the --cache directory without querying Binance.',
+        action='store_true'
+    )
+
+    group = arg_parser.add_argument_group('Throttling')
+
+    group.add_argument(
+        '--workers',
+        help='The maximum number of concurrent queries. Will be reduced automatically if Binance throttles us.',
+        type=int,
+        default=2
+    )
+
+    group.add_argument(
+        '--global-workers',
+        help='The maximum number of concurrent queries of all --accounts together.',
+        type=int,
+        default=8
+    )
+
+    group.add_argument(
+        '--retries',
+        help='The number of retries before a query window is given up.',
+        type=int,
+        default=RetryPolicy().max_retries
+    )
+
+    add_profile_arguments(arg_parser)
+
     args = arg_parser.parse_args()
 
-    if args.mode == 'trading' and not args.start:
+    if args.offline and not args.cache:
+        arg_parser.error('The --cache directory is required in offline mode.')
+
+    # the remaining arguments are checked per account
+    if args.accounts:
+        return args
+
+    if not args.mode:
+        arg_parser.error('The --mode is required unless --accounts is given.')
+
+    args.mode = _expand_modes(args.mode)
+
+    error = format_error(args.format, args.mode) if args.format else None
+    if error:
+        arg_parser.error(error)
+
+    if Mode.TRADING.value in args.mode and not args.start:
         arg_parser.error('The --start time is required in "trading" mode.')
 
+    if not args.offline and not (args.cookies and args.token):
+        arg_parser.error('The --cookies and --token are required unless running in offline mode.')
+
     return args
 
 
+def _expand_modes(modes):
+    """
+    Expand the given modes into a list of distinct modes.
+
+    Args:
+        modes (str|list[str]): One or more modes, e.g. "all" or ["trading", "deposit"]
+
+    Returns:
+        list[str]: The modes in the given order
+
+    """
+    modes = [modes] if isinstance(modes, str) else modes
+
+    for mode in modes:
+        if mode not in MODES and mode != MODE_ALL:
+            raise ValueError('The mode {} is unknown.'.format(mode))
+
+    return list(MODES) if MODE_ALL in modes else list(dict.fromkeys(modes))
+
+
+def load_accounts(file, arguments):
+    """
+    Load the accounts to crawl from the given JSON file.
+
+    The file contains an object with a list of `accounts`. Values not given for an account are taken from the
+    command line `arguments`:
+
+        {
+            "accounts": [
+                {"name": "alice", "cookies": "alice.txt", "token": "...", "mode": "all", "start": "2018-01-01 00:00:00"}
+            ]
+        }
+
+    Args:
+        file (str):                     The path of the JSON file
+        arguments (argparse.Namespace): The command line arguments.
+
+    Returns:
+        list[argparse.Namespace]: The arguments of each account with the cookies read in.
+
+    """
+    with open(file, 'r') as file_:
+        config = json.load(file_)
+
+    # the cookies of the command line are shared by all accounts without their own
+    default_cookies = arguments.cookies.readline().strip() if arguments.cookies else None
+
+    accounts = []
+
+    for idx, entry in enumerate(config['accounts']):
+        account = argparse.Namespace(**vars(arguments))
+
+        account.name = entry.get('name', 'account{}'.format(idx))
+        account.token = entry.get('token', arguments.token)
+        account.mode = _expand_modes(entry.get('mode', arguments.mode or MODE_ALL))
+        account.start = entry.get('start', arguments.start)
+        account.end = entry.get('end', arguments.end)
+        account.workers = entry.get('workers', arguments.workers)
+
+        # each account has its own directory of output files and responses
+        account.output = os.path.join(arguments.output, account.name, 'binance.csv')
+        account.cache = os.path.join(arguments.cache, account.name) if arguments.cache else None
+
+        if 'cookies' in entry:
+            # the path of the cookie file is relative to the account file
+            with open(os.path.join(os.path.dirname(file), entry['cookies']), 'r') as cookies:
+                account.cookies = cookies.readline().strip()
+        else:
+            account.cookies = default_cookies
+
+        if not account.start:
+            raise ValueError('The start time of account {} is missing.'.format(account.name))
+
+        error = format_error(arguments.format, account.mode) if arguments.format else None
+        if error:
+            raise ValueError('{} - see account {}.'.format(error, account.name))
+
+        if not arguments.offline and not (account.cookies and account.token):
+            raise ValueError('The cookies and token of account {} are missing.'.format(account.name))
+
+        if account.name in [a.name for a in accounts]:
+            raise ValueError('The account name {} is used more than once.'.format(account.name))
+
+        accounts.append(account)
+
+    return accounts
+
+
 class BinanceConnection(object):
     # Restricts the number of trades returned per request
     # We are currently sending multiple small requests
     # instead of one huge one to not stress Binance website.
     _MAX_TRADE_QUERY_COUNT = 1000
 
+    # The number of bytes of a response decoded at once
+    _CHUNK_SIZE = 64 * 1024
+
     class Exchange(Enum):
         DEPOSIT = "deposit"
         WITHDRAWAL = "withdraw"
 
-    def __init__(self, csrftoken, cookies):
+    _URL = 'https://www.binance.com'
+
+    _URL_TRADES = '{}/exchange-api/v1/private/streamer/trade/get-user-trades'
+
+    _URL_EXCHANGES = '{}/gateway-api/v1/private/capital/{}/list'
+
+    def __init__(
+        self,
+        csrftoken,
+        cookies,
+        cache=None,
+        workers=2,
+        retry_policy=None,
+        shared_limiter=None,
+        url=None,
+        window=datetime.timedelta(weeks=4)
+    ):
+        """
+
+        Args:
+            csrftoken (str):                    The csrftoken of the Binance session
+            cookies (str):                      The cookies of the Binance session as a `;` separated string
+            cache (ResponseCache):              A cache for the responses of closed windows (optional)
+            workers (int):                      The maximum number of concurrent queries
+            retry_policy (RetryPolicy):         The policy for retrying failed queries (optional)
+            shared_limiter (AdaptiveLimiter):   A limit of concurrent queries shared with other connections (optional)
+            url (str):                          The base URL of Binance, e.g. of a local `MockBinanceServer` (optional)
+            window (datetime.timedelta):        The size of the windows a query is split into
+        """
         super().__init__()
 
+        self._window = window
+
+        self._url = (url or self._URL).rstrip('/')
+
+        self._cache = cache
+
+        # requests is imported on first use to keep the start-up fast
+        import requests
+
+        # all queries share one pool of connections
+        self._session = requests.Session()
+        self._session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=max(1, workers)))
+        self._session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=max(1, workers)))
+
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._limiter = AdaptiveLimiter(workers)
+        self._shared_limiter = shared_limiter
+        self._failures = []
+
         self._headers = {
             'authority':
                 'www.binance.com',
@@ -210,13 +714,171 @@ class BinanceConnection(object):
         self._cookies = {}
 
         # create a dict of the given cookie string
-        cookie_list = cookies.split(';')
+        cookie_list = cookies.split(';') if cookies else []
 
         for cookie in cookie_list:
             name, value = cookie.split('=')
 
             self._cookies[name] = value.strip()
 
+    @property
+    def cache(self):
+        """
+        The response cache of this connection.
+
+        Returns:
+            ResponseCache: The cache or None if responses are not cached.
+
+        """
+        return self._cache
+
+    @property
+    def failures(self):
+        """
+        The query windows that could not be retrieved, even after all retries.
+
+        Returns:
+            list[FailedWindow]: The failed windows
+
+        """
+        return self._failures
+
+    def _throttle(self):
+        """ Reduce the number of concurrent queries of this and all other connections. """
+        self._limiter.throttle()
+
+        if self._shared_limiter is not None:
+            self._shared_limiter.throttle()
+
+    def _send(self, url, post_data, path):
+        """
+        Send a single query to Binance.
+
+        The response is decoded while it is received, so only the records of the array at `path` are kept in memory.
+
+        Args:
+            url (str):          The URL of the endpoint
+            post_data (dict):   The data of the query
+            path (list[str]):   The keys leading to the array of records in the response, e.g. ['data', 'rows']
+
+        Raises:
+            ThrottledError: If Binance asks us to slow down.
+            ResponseError:  If the response does not contain any records, e.g. if the session is invalid.
+
+        Returns:
+            list[dict]: The records
+
+        """
+        with self._limiter, self._shared_limiter or contextlib.nullcontext(), PROFILER.stage('http') as stage:
+            r = self._session.post(
+                url=url, headers=self._headers, data=json.dumps(post_data), cookies=self._cookies, stream=True
+            )
+
+            with contextlib.closing(r):
+                if r.status_code in (418, 429):
+                    raise ThrottledError(
+                        'Binance throttled the query with HTTP {}'.format(r.status_code),
+                        retry_after=self._retry_policy.retry_after(r.headers)
+                    )
+
+                if self._retry_policy.overweight(r.headers):
+                    self._throttle()
+
+                r.raise_for_status()
+
+                def chunks():
+                    for chunk in r.iter_content(chunk_size=self._CHUNK_SIZE):
+                        stage.bytes += len(chunk)
+                        yield chunk
+
+                records = JSONArrayStream(chunks(), path)
+                result = list(records)
+
+                stage.rows += len(result)
+
+        if not records.found:
+            raise ResponseError('The response of {} does not contain any records - is the session still valid?'.format(
+                url
+            ))
+
+        return result
+
+    def _post(self, url, mode, start, end, page, post_data, path):
+        """
+        Send the query to Binance or serve it from the response cache.
+
+        Args:
+            url (str):                  The URL of the endpoint
+            mode (str):                 The crawler mode, e.g. trading or deposit
+            start (datetime.datetime):  The start of the window
+            end (datetime.datetime):    The end of the window
+            page (int):                 The page of the window
+            post_data (dict):           The data of the query
+            path (list[str]):           The keys leading to the array of records in the response
+
+        Returns:
+            list[dict]: The records
+
+        Raises:
+            RetryError:     If the query still fails after all retries.
+            ResponseError:  If the response does not contain any records.
+
+        """
+        if self._cache is not None:
+            response = self._cache.get(url, mode, start, end, page)
+
+            if response is not None:
+                for key in path:
+                    response = response[key]
+
+                return response
+
+        import requests
+
+        attempt = 0
+
+        while True:
+            try:
+                result = self._send(url, post_data, path)
+
+                self._limiter.success()
+
+                if self._shared_limiter is not None:
+                    self._shared_limiter.success()
+
+                break
+            except (ThrottledError, JSONDecodeError, requests.RequestException) as e:
+                if isinstance(e, ThrottledError):
+                    self._throttle()
+
+                if attempt >= self._retry_policy.max_retries:
+                    raise RetryError(
+                        'Giving up the {} window from {} to {} after {} retries: {}'.format(
+                            mode, start, end, attempt, e
+                        )
+                    )
+
+                delay = self._retry_policy.delay(attempt, getattr(e, 'retry_after', None))
+
+                logging.debug('Query of the %s window from %s to %s failed (%s) - retry in %.1fs', mode, start, end, e,
+                              delay)
+
+                time.sleep(delay)
+
+                attempt += 1
+
+        # never cache failed queries - they would be replayed forever
+        if self._cache is not None:
+            response = result
+
+            # store the records the same way Binance responded with them
+            for key in reversed(path):
+                response = {key: response}
+
+            self._cache.put(url, mode, start, end, page, response)
+
+        return result
+
     def _get_intervals(self, start: datetime.datetime, end: datetime.datetime):
         """Split up the interval into equally-sized parts
 
@@ -225,13 +887,11 @@ class BinanceConnection(object):
             end (datetime.datetime): The end time
 
         Returns:
-            Tuple[List, List: The lists of start and end times 
+            Tuple[List, List]: The lists of start and end times
         """
+        intervals = list(plan_intervals(start, end, self._window))
 
-        dates = pd.date_range(start, end, freq='4W')
-
-        # ensure the last date is not after the specified end date
-        return dates[:-1], [*dates[1:-1], end]
+        return [s for s, _ in intervals], [e for _, e in intervals]
 
     def _get_trades(self, start: datetime.datetime, end: datetime.datetime, type=None):
         """
@@ -243,15 +903,15 @@ class BinanceConnection(object):
             type (str):                 The type of transaction; 'BUY' or 'SELL'
 
         Returns:
-            dict:           All records within that interval
+            list[dict]:     All records within that interval
 
         """
 
         logging.info('Get trades from %s to %s', start, end)
 
         post_data = {
-            'startTime': int(start.timestamp()) * 1000,
-            'endTime': int(end.timestamp()) * 1000,
+            'startTime': _timestamp(start),
+            'endTime': _timestamp(end),
             'page': 1,
 
         # take care of choosing this value - binance may reach out to you if you
@@ -263,15 +923,10 @@ class BinanceConnection(object):
             'hideCancel': 'false'
         }
 
-        r = requests.post(
-            url='https://www.binance.com/exchange-api/v1/private/streamer/trade/get-user-trades',
-            headers=self._headers,
-            data=json.dumps(post_data),
-            cookies=self._cookies
+        result = self._post(
+            self._URL_TRADES.format(self._url), Mode.TRADING.value, start, end, post_data['page'], post_data, ['data']
         )
 
-        result = json.loads(r.text)['data']
-
         return result
 
     def _get_exchanges(self, start: datetime.datetime, end: datetime.datetime, type, symbol=None):
@@ -291,8 +946,8 @@ class BinanceConnection(object):
         logging.info(f'Get {type}(s) from %s to %s', start, end)
 
         post_data = {
-            'startTime': int(start.timestamp()) * 1000,
-            'endTime': int(end.timestamp()) * 1000,
+            'startTime': _timestamp(start),
+            'endTime': _timestamp(end),
             'page': {
                 'offset': 0, 'limit': self._MAX_TRADE_QUERY_COUNT
             },
@@ -301,34 +956,83 @@ class BinanceConnection(object):
             'txId': '',
         }
 
-        r = requests.post(
-            url=f'https://www.binance.com/gateway-api/v1/private/capital/{type}/list',
-            headers=self._headers,
-            data=json.dumps(post_data),
-            cookies=self._cookies
+        result = self._post(
+            self._URL_EXCHANGES.format(self._url, type),
+            type,
+            start,
+            end,
+            post_data['page']['offset'],
+            post_data,
+            ['data', 'rows']
         )
 
-        result = json.loads(r.text)['data']['rows']
-
         return result
 
-    def _query(self, start: datetime.datetime, end: datetime.datetime, func, *args, **kwargs):
+    def _stream(self, start: datetime.datetime, end: datetime.datetime, func, *args, **kwargs):
+        """
+        Query all windows between `start` and `end` concurrently and yield the records as each window completes.
+
+        Args:
+            start (datetime.datetime):  The start date
+            end (datetime.datetime):    Date of last transaction
+            func (Callable):            The function to query a single window with
+            *args:                      Passed to `func`
+            **kwargs:                   Passed to `func`
 
-        trades = []
+        Notes:
+            The records are yielded in the order of the windows. Only a bounded number of windows is queried in
+            advance so that memory does not grow with the length of the history.
 
-        # ensure the last date is not after the specified end date
-        for t_start, t_end in zip(*self._get_intervals(start, end)):
-            try:
-                t_trades = func(t_start, t_end, *args, **kwargs)
+        Yields:
+            dict: The records of all windows
+
+        """
+        mode = Mode[self.Exchange(kwargs['type']).name].value if func == self._get_exchanges else Mode.TRADING.value
+
+        count = 0
+
+        with ThreadPoolExecutor(max_workers=self._limiter.max_limit) as executor:
+            intervals = zip(*self._get_intervals(start, end))
+
+            pending = collections.deque()
+
+            def submit():
+                interval = next(intervals, None)
+
+                if interval is not None:
+                    pending.append((*interval, executor.submit(func, *interval, *args, **kwargs)))
+
+            # query a few windows in advance to keep all workers busy
+            for _ in range(2 * self._limiter.max_limit):
+                submit()
+
+            while pending:
+                # keep the order of the windows, even if later ones finish first
+                t_start, t_end, future = pending.popleft()
+
+                try:
+                    t_trades = future.result()
+                except (RetryError, ResponseError, CacheMissError) as e:
+                    logging.error(e)
+
+                    self._failures.append(FailedWindow(mode=mode, start=t_start, end=t_end, reason=str(e)))
+
+                    t_trades = None
+
+                # refill the queue of windows
+                submit()
 
                 if t_trades is not None:
-                    trades.extend(t_trades)
-            except JSONDecodeError:
-                pass
+                    count += len(t_trades)
+
+                    yield from t_trades
 
-        logging.info('Found %d transactions', len(trades))
+        logging.info('Found %d transactions', count)
 
-        return trades
+    def _query(self, start: datetime.datetime, end: datetime.datetime, func, *args, stream=False, **kwargs):
+        records = self._stream(start, end, func, *args, **kwargs)
+
+        return records if stream else list(records)
 
     def trades(self, start, end, **kwargs):
         """
@@ -339,6 +1043,7 @@ class BinanceConnection(object):
             end (datetime.datetime):     Date of last transaction
             **kwargs:
                 type (str):     The type of transaction; 'BUY' or 'SELL'
+                stream (bool):  If set, return a generator yielding the trades as each window completes
 
         Returns:
             list: A list of `Transaction`s
@@ -354,6 +1059,7 @@ class BinanceConnection(object):
             start (datetime.datetime):   The start date
             end (datetime.datetime):     Date of last transaction
             **kwargs:
+                stream (bool):  If set, return a generator yielding the deposits as each window completes
 
         Returns:
             list[dict[str:any]]: A list transactions
@@ -367,7 +1073,10 @@ class BinanceConnection(object):
         Get all withdrawals.
 
         Args:
+            start (datetime.datetime):   The start date
+            end (datetime.datetime):     Date of last transaction
             **kwargs:
+                stream (bool):  If set, return a generator yielding the withdrawals as each window completes
 
         Returns:
             list[dict[str:any]]: A list transactions
@@ -376,39 +1085,194 @@ class BinanceConnection(object):
         return self._query(start, end, self._get_exchanges, type=self.Exchange.WITHDRAWAL.value, **kwargs)
 
 
-def main(arguments):
+def _output_file(output, mode):
+    """
+    Get the name of the output file of the given mode.
+
+    Args:
+        output (str):   The name of the output file given by the user, e.g. binance.csv
+        mode (str):     The mode, e.g. deposit
+
+    Returns:
+        str: The name of the output file, e.g. binance_deposit.csv
+
+    """
+    name, extension = os.path.splitext(output)
+
+    return '{}_{}{}'.format(name, mode, extension or '.csv')
+
+
+def crawl(arguments, shared_limiter=None):
+    """
+    Crawl all modes of a single account concurrently.
+
+    Args:
+        arguments (argparse.Namespace):     The arguments of the account with the cookies as a string
+        shared_limiter (AdaptiveLimiter):   A limit of concurrent queries shared with other accounts (optional)
+
+    Returns:
+        tuple[list[dict], list[FailedWindow]]: The timing of each mode and the windows that could not be retrieved
+
+    """
+    name = getattr(arguments, 'name', None)
+
+    cache = ResponseCache(arguments.cache, offline=arguments.offline) if arguments.cache else None
+
+    conn = BinanceConnection(
+        csrftoken=arguments.token,
+        cookies=arguments.cookies,
+        cache=cache,
+        workers=arguments.workers,
+        retry_policy=RetryPolicy(max_retries=arguments.retries),
+        shared_limiter=shared_limiter,
+        url=arguments.url,
+        window=datetime.timedelta(days=arguments.window)
+    )
+
+    store = None
+    if getattr(arguments, 'store', None):
+        from deltaconv.store import TransactionStore
+
+        store = TransactionStore(arguments.store)
+
+    def run(mode):
+        partitioned = len(arguments.mode) > 1 or name is not None
+        output = _output_file(arguments.output, mode) if partitioned else arguments.output
+
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+        started = time.monotonic()
+
+        records = MODES[mode](conn, arguments)
+
+        if store is not None and mode in CONVERTERS:
+            records = _store_records(records, mode, store)
+
+        if getattr(arguments, 'format', None):
+            # hand the records over to the exporter without an intermediate csv file
+            transactions = convert_records(records, mode)
+            first = next(transactions, None)
+            count = 0
+
+            def counted():
+                nonlocal count
+
+                for transaction in itertools.chain([first], transactions):
+                    count += 1
+                    yield transaction
+
+            # no file is written without any records
+            if first is not None:
+                with PROFILER.stage('export') as stage:
+                    init_parser(arguments.format).export(counted(), writer_output(output, arguments.format))
+                    stage.rows += count
+        else:
+            # write the records while they are retrieved
+            with RecordWriter(output, fieldnames=SCHEMAS[mode]) as writer:
+                writer.write_all(records)
+
+            count = writer.count
+
+        logging.info('Wrote %d record(s) to %s', count, output)
+
+        return {'account': name or '-', 'mode': mode, 'records': count, 'seconds': time.monotonic() - started}
+
+    # all modes share the connection and thus the limit of concurrent queries
+    with ThreadPoolExecutor(max_workers=len(arguments.mode)) as executor:
+        timings = [future.result() for future in [executor.submit(run, mode) for mode in arguments.mode]]
+
+    if cache is not None:
+        logging.info('Response cache: %d hit(s), %d miss(es)', cache.hits, cache.misses)
+
+    for failure in conn.failures:
+        logging.error('Missing %s window from %s to %s: %s', failure.mode, failure.start, failure.end, failure.reason)
+
+    for timing in timings:
+        timing['failures'] = len([f for f in conn.failures if f.mode == timing['mode']])
+
+    return timings, conn.failures
+
+
+def _log_report(timings, seconds):
+    """
+    Log the timing of all crawled accounts and modes as a table.
+
+    Args:
+        timings (list[dict]):   The timing of each account and mode
+        seconds (float):        The wall time of the whole run
+
+    """
+    logging.info('%-20s %-12s %10s %10s %10s', 'account', 'mode', 'records', 'seconds', 'failures')
+
+    for timing in timings:
+        logging.info(
+            '%-20s %-12s %10d %10.1f %10d', timing['account'], timing['mode'], timing['records'], timing['seconds'],
+            timing['failures']
+        )
+
+    logging.info(
+        '%-20s %-12s %10d %10.1f %10d', 'total', '', sum(t['records'] for t in timings), seconds,
+        sum(t['failures'] for t in timings)
+    )
+
+
+def main(arguments=None):
+    """
+    Entry point of binancecrawler
+
+    Args:
+        arguments (argparse.Namespace): The command line arguments. Will be parsed if not given.
+
+    Returns:
+        int: The exit code
+
+    """
+    if arguments is None:
+        arguments = parse_arguments()
+
+        formatter = logging.Formatter(fmt='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+        screenhandler = logging.StreamHandler(stream=sys.stdout)
+        screenhandler.setFormatter(formatter)
+
+        logger = logging.getLogger()
+        logger.setLevel(logging.INFO)
+        logger.addHandler(screenhandler)
+
+    PROFILER.enabled = bool(getattr(arguments, 'profile', None))
+
     # init the mode functions
     MODES[Mode.TRADING.value] = fetch_trades
     MODES[Mode.DEPOSIT.value] = fetch_deposits
     MODES[Mode.WITHDRAWAL.value] = fetch_withdrawals
 
-    # read in the cookies
-    cookies = arguments.cookies.readlines()[0]
+    started = time.monotonic()
 
-    conn = BinanceConnection(csrftoken=arguments.token, cookies=cookies)
+    if arguments.accounts:
+        accounts = load_accounts(arguments.accounts, arguments)
 
-    result = MODES[arguments.mode](conn, arguments)
+        # all accounts share one global limit of concurrent queries
+        shared_limiter = AdaptiveLimiter(arguments.global_workers)
 
-    if result:
-        # now write to the csv file
-        with open(arguments.output, 'w') as file:
-            import csv
+        with ThreadPoolExecutor(max_workers=len(accounts) or 1) as executor:
+            results = [
+                future.result() for future in [executor.submit(crawl, account, shared_limiter) for account in accounts]
+            ]
+    else:
+        # read in the cookies
+        arguments.cookies = arguments.cookies.readlines()[0] if arguments.cookies else None
 
-            writer = csv.DictWriter(file, fieldnames=result[0].keys(), delimiter=';')
-            writer.writeheader()
-            writer.writerows(result)
+        results = [crawl(arguments)]
 
+    timings = [timing for result in results for timing in result[0]]
 
-if __name__ == '__main__':
-    args = parse_arguments()
+    _log_report(timings, time.monotonic() - started)
 
-    formatter = logging.Formatter(fmt='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    if PROFILER.enabled:
+        report_profile(arguments.profile, arguments.profile_output)
 
-    screenhandler = logging.StreamHandler(stream=sys.stdout)
-    screenhandler.setFormatter(formatter)
+    return 1 if any(failures for _, failures in results) else 0
 
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    logger.addHandler(screenhandler)
 
-    main(args)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Exports the same transactions into several formats at once.
+
+Each exporter runs in its own thread and consumes the transactions from a bounded queue, so the transactions are only
+parsed once and a slow exporter does not hold back the others until its queue is full.
+
+    export_all(transactions, [(init_parser('delta'), 'delta.csv'), (init_parser('binance-trades'), 'binance')])
+"""
+import logging
+import os
+import queue
+import threading
+
+from deltaconv.registry import PARSER
+
+# The number of transactions passed to the exporters at once
+CHUNK_SIZE = 1000
+
+# The number of chunks queued for each exporter
+QUEUE_SIZE = 16
+
+# Marks the end of the transactions in a queue
+_END = object()
+
+# The extensions of files given as output that are replaced by the one a writer appends itself
+_EXTENSIONS = ['.csv', '.xls', '.xlsx']
+
+
+class ExportError(RuntimeError):
+    """ Raise this exception if at least one export failed. """
+
+    def __init__(self, errors):
+        """
+
+        Args:
+            errors (dict[str, Exception]): The error of each failed export by its file
+        """
+        super().__init__('The export of {} failed: {}'.format(
+            ', '.join(errors), '; '.join('{}'.format(e) for e in errors.values())
+        ))
+
+        self.errors = errors
+
+
+def writer_output(file, name):
+    """
+    Get the file to pass to the writer of a format. The extension of the file is dropped if the writer appends its own,
+    e.g. binance.csv becomes binance, which the writer of binance-trades saves as binance.xlsx.
+
+    Args:
+        file (str): The file given by the user
+        name (str): The format
+
+    Returns:
+        str: The file to pass to the writer
+    """
+    root, extension = os.path.splitext(file)
+
+    if PARSER[name].get('extension') and extension.lower() in _EXTENSIONS:
+        return root
+
+    return file
+
+
+def output_files(output, formats):
+    """
+    Get the file to pass to the writer of each format.
+
+    Args:
+        output (list[str]):     The files given by the user; one per format or a single one the name of each format is
+                                inserted into, e.g. history.csv becomes history.delta.csv and history.binance-trades
+                                (.xlsx is appended by the writer)
+        formats (list[str]):    The formats
+
+    Returns:
+        list[str]: The file of each format
+    """
+    if len(formats) == 1 or len(output) == len(formats):
+        return [writer_output(file, name) for file, name in zip(output, formats)]
+
+    if len(output) != 1:
+        raise ValueError('Give either one output or one output per format, got {} for {} formats.'.format(
+            len(output), len(formats)
+        ))
+
+    root, extension = os.path.splitext(output[0])
+
+    return [writer_output('{}.{}{}'.format(root, name, extension), name) for name in formats]
+
+
+def _transactions(chunks, done):
+    """ Yield the transactions of the chunks in a queue until its end and set `done` at the end """
+    while True:
+        chunk = chunks.get()
+
+        if chunk is _END:
+            done.set()
+
+            return
+
+        yield from chunk
+
+
+def export_all(transactions, targets, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE):
+    """
+    Export the transactions with each parser into its file concurrently.
+
+    Args:
+        transactions (Iterable[Transaction]):               The transactions
+        targets (list[tuple[TradeHistoryParser, str]]):     The parser and the file of each export
+        chunk_size (int):                                   The number of transactions passed at once
+        queue_size (int):                                   The number of chunks queued for each export
+
+    Raises:
+        ExportError: If at least one export failed. The other exports are completed.
+    """
+    errors = {}
+    lock = threading.Lock()
+
+    def export(parser, file, chunks):
+        done = threading.Event()
+
+        try:
+            parser.export(_transactions(chunks, done), file)
+        except Exception as e:
+            logging.exception('The export of %s failed.', file)
+
+            with lock:
+                errors[file] = e
+
+            # keep consuming, so the producer is never blocked by a failed export
+            if not done.is_set():
+                for _ in _transactions(chunks, done):
+                    pass
+
+    queues = []
+    threads = []
+
+    for parser, file in targets:
+        chunks = queue.Queue(maxsize=queue_size)
+        thread = threading.Thread(target=export, args=(parser, file, chunks), name='export-{}'.format(file))
+        thread.start()
+
+        queues.append(chunks)
+        threads.append(thread)
+
+    try:
+        chunk = []
+
+        for transaction in transactions:
+            chunk.append(transaction)
+
+            if len(chunk) >= chunk_size:
+                for chunks in queues:
+                    chunks.put(chunk)
+
+                chunk = []
+
+        if chunk:
+            for chunks in queues:
+                chunks.put(chunk)
+    finally:
+        for chunks in queues:
+            chunks.put(_END)
+
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise ExportError(errors)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Converts the fees of trades into a single currency, so they can be summed up across trades.
+
+Binance charges fees in the base or quote currency of a trade or in BNB. A fee in the base currency is converted with
+the price of the trade itself. Fees in any other coin are converted with the historical prices of a
+`deltaconv.prices.PriceStore`; the rates are looked up in a single batch per coin and cached per coin and minute.
+
+    normalizer = FeeNormalizer(prices=PriceStore('candles'))
+    normalizer.normalize(transactions)              # into the quote currency of each trade
+    normalizer.normalize(transactions, fiat='EUR')  # into EUR
+"""
+import collections
+import logging
+
+from deltaconv.transaction import Fee
+
+QUOTE = 'quote'
+
+FIAT = 'fiat'
+
+TARGETS = [QUOTE, FIAT]
+
+
+def _minute(value):
+    return value.replace(second=0, microsecond=0)
+
+
+class FeeNormalizer(object):
+    """
+    Converts the fees of trades into their quote currency or a fiat currency.
+    """
+
+    def __init__(self, prices=None):
+        """
+
+        Args:
+            prices (deltaconv.prices.PriceStore): The prices to convert fees in other coins than the ones of the trade.
+                Without prices, only fees in the base or quote currency can be converted.
+        """
+        super().__init__()
+
+        self.prices = prices
+
+        # the rate of each (coin, target currency, minute)
+        self._rates = {}
+
+    def _lookup(self, keys):
+        """ Look up the rates of the given (coin, target, minute) keys that are not cached yet """
+        by_pair = collections.defaultdict(set)
+
+        for coin, target, minute in keys:
+            if (coin, target, minute) not in self._rates:
+                by_pair[(coin, target)].add(minute)
+
+        if not by_pair:
+            return
+
+        from deltaconv.prices import PriceNotFoundError
+
+        for (coin, target), minutes in by_pair.items():
+            minutes = sorted(minutes)
+
+            if self.prices is None:
+                rates = [None] * len(minutes)
+            else:
+                try:
+                    rates = self.prices.rates(coin, target, minutes)
+                except PriceNotFoundError as e:
+                    logging.warning('%s', e)
+                    rates = [None] * len(minutes)
+
+            for minute, rate in zip(minutes, rates):
+                self._rates[(coin, target, minute)] = rate
+
+    def normalize(self, transactions, fiat=None):
+        """
+        Replace the fee of each trade by its amount in the quote currency of the trade or in the fiat currency.
+
+        Args:
+            transactions (list[CryptoTransaction]): The trades
+            fiat (str):                             The fiat currency, e.g. EUR. Defaults to the quote currency.
+
+        Returns:
+            int: The number of fees that could not be converted and were kept as they are
+        """
+        fiat = fiat.upper() if fiat else None
+
+        # the fees converted with the price of their trade and the ones requiring a rate of another coin
+        updates = []
+        pending = []
+
+        for t in transactions:
+            quote, base = t.trading_pair
+            fee = t.fee
+            target = fiat or quote.currency
+
+            if not fee.amount or fee.currency == target:
+                continue
+
+            amount, currency = fee.amount, fee.currency
+
+            if currency == base.currency:
+                amount, currency = amount * t.price, quote.currency
+
+            if currency == target:
+                updates.append((t, amount, target))
+            else:
+                pending.append((t, amount, currency, target, _minute(t.datetime)))
+
+        self._lookup((currency, target, minute) for _, _, currency, target, minute in pending)
+
+        missing = 0
+
+        for t, amount, currency, target, minute in pending:
+            rate = self._rates[(currency, target, minute)]
+
+            if rate is None:
+                missing += 1
+            else:
+                updates.append((t, amount * rate, target))
+
+        for t, amount, currency in updates:
+            t.fee = Fee(amount=amount, currency=currency)
+
+        return missing
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Computes the balance of each currency at any time.
+
+The changes of the balances are collected from trades, their fees, deposits and withdrawals. Once queried, the changes
+of each currency are sorted by time and summed up into cumulative balances, so the balance at a time is a binary search
+instead of a replay of the history.
+
+    holdings = Holdings()
+    holdings.add_transactions(transactions)
+    holdings.add_deposits(deposits)
+
+    holdings.balance('BTC', datetime.datetime(2019, 1, 1))
+"""
+import bisect
+import csv
+import datetime
+import itertools
+
+DAILY = 'daily'
+
+MONTHLY = 'monthly'
+
+FREQUENCIES = [DAILY, MONTHLY]
+
+
+def _next_period(value, frequency):
+    """ Get the start of the period following the one containing `value` """
+    if frequency == DAILY:
+        return datetime.datetime(value.year, value.month, value.day) + datetime.timedelta(days=1)
+
+    if frequency == MONTHLY:
+        return datetime.datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+    raise ValueError('The frequency {} is not one of {}.'.format(frequency, ', '.join(FREQUENCIES)))
+
+
+class Holdings(object):
+    """
+    The balances of all currencies over time
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        # the unsorted changes of the balance of each currency
+        self._changes = {}
+
+        # the sorted times and cumulative balances of each currency
+        self._times = {}
+        self._balances = {}
+
+    def _change(self, currency, time, amount):
+        if currency and amount:
+            self._changes.setdefault(currency, []).append((time, amount))
+
+            # the balances of the currency have to be summed up again
+            self._times.pop(currency, None)
+
+    def add_transactions(self, transactions):
+        """
+        Add the changes of the balances by trades.
+
+        Args:
+            transactions (Iterable[CryptoTransaction]): The trades
+        """
+        for t in transactions:
+            quote, base = t.trading_pair
+            side = str(t.type).upper()
+
+            if side == 'BUY':
+                self._change(base.currency, t.datetime, base.amount)
+                self._change(quote.currency, t.datetime, -quote.amount)
+            elif side == 'SELL':
+                self._change(base.currency, t.datetime, -base.amount)
+                self._change(quote.currency, t.datetime, quote.amount)
+            else:
+                continue
+
+            self._change(t.fee.currency, t.datetime, -t.fee.amount)
+
+    def add_deposits(self, deposits):
+        """
+        Add the changes of the balances by deposits.
+
+        Args:
+            deposits (Iterable[Deposit]): The deposits
+        """
+        for d in deposits:
+            self._change(d.currency, d.timestamp, d.amount)
+
+            # fees without a currency are paid in the deposited one
+            self._change(d.transactionfee.currency or d.currency, d.timestamp, -d.transactionfee.amount)
+
+    def add_withdrawals(self, withdrawals):
+        """
+        Add the changes of the balances by withdrawals.
+
+        Args:
+            withdrawals (Iterable[Deposit]): The withdrawals with positive amounts
+        """
+        for w in withdrawals:
+            self._change(w.currency, w.timestamp, -w.amount)
+            self._change(w.transactionfee.currency or w.currency, w.timestamp, -w.transactionfee.amount)
+
+    def _index(self, currency):
+        """ Get the sorted times and cumulative balances of the currency """
+        if currency not in self._times:
+            changes = sorted(self._changes.get(currency, []), key=lambda change: change[0])
+
+            self._times[currency] = [time for time, _ in changes]
+            self._balances[currency] = list(itertools.accumulate(amount for _, amount in changes))
+
+        return self._times[currency], self._balances[currency]
+
+    @property
+    def currencies(self):
+        """
+        The currencies with at least one change of their balance
+
+        Returns:
+            list[str]: The sorted currencies
+        """
+        return sorted(self._changes)
+
+    def balance(self, currency, time, inclusive=True):
+        """
+        Get the balance of a currency at a time.
+
+        Args:
+            currency (str):             The currency, e.g. BTC
+            time (datetime.datetime):   The time
+            inclusive (bool):           Whether to include the changes at exactly `time`
+
+        Returns:
+            float: The balance
+        """
+        times, balances = self._index(currency)
+
+        idx = (bisect.bisect_right if inclusive else bisect.bisect_left)(times, time)
+
+        return balances[idx - 1] if idx else 0.0
+
+    def balances(self, time, inclusive=True):
+        """
+        Get the balances of all currencies at a time.
+
+        Returns:
+            dict[str, float]: The balance of each currency
+        """
+        return {currency: self.balance(currency, time, inclusive=inclusive) for currency in self.currencies}
+
+    def snapshots(self, frequency=DAILY, start=None, end=None):
+        """
+        Get the balances at the end of each day or month.
+
+        Args:
+            frequency (str):            DAILY or MONTHLY
+            start (datetime.datetime):  The first snapshot is taken at the end of the period containing this time.
+                                        Defaults to the first change.
+            end (datetime.datetime):    The last snapshot is taken at the end of the period containing this time.
+                                        Defaults to the last change.
+
+        Yields:
+            tuple[datetime.datetime, dict[str, float]]: The start of each period and the balances at its end
+        """
+        indices = [self._index(currency)[0] for currency in self.currencies]
+
+        if not indices:
+            return
+
+        start = start or min(times[0] for times in indices)
+        end = end or max(times[-1] for times in indices)
+
+        period = _next_period(start, frequency)
+        label = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if frequency == MONTHLY:
+            label = label.replace(day=1)
+
+        while label <= end:
+            yield label, self.balances(period, inclusive=False)
+
+            label, period = period, _next_period(period, frequency)
+
+    def export_snapshots(self, file, frequency=DAILY, start=None, end=None):
+        """
+        Write the snapshots into a csv file with a column per currency.
+
+        Args:
+            file (str):                 The path of the csv file
+            frequency (str):            DAILY or MONTHLY
+            start (datetime.datetime):  See `snapshots`
+            end (datetime.datetime):    See `snapshots`
+        """
+        currencies = self.currencies
+
+        with open(file, 'w', newline='') as file_:
+            writer = csv.writer(file_)
+            writer.writerow(['Date'] + currencies)
+
+            for label, balances in self.snapshots(frequency, start=start, end=end):
+                writer.writerow([label.strftime('%Y-%m-%d')] + ['{:f}'.format(balances[c]) for c in currencies])
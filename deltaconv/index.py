@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+An index of parsed transactions to query them by time, currency, pair, exchange and type.
+
+The transactions are sorted by time once. Each secondary index holds the positions of its transactions in that order,
+so a query is a binary search for the time range within the positions of a single key.
+
+    index = TransactionIndex(parser.parse('binance_trades.csv'))
+
+    q3 = index.query(start=datetime.datetime(2019, 7, 1), end=datetime.datetime(2019, 10, 1), currency='ETH')
+
+The index is a sequence in the order of time, so it can be passed to any exporter without sorting it again.
+"""
+import bisect
+import collections.abc
+
+
+def transaction_time(transaction):
+    """
+    Get the time of a trade or deposit
+
+    Returns:
+        datetime.datetime: The time
+    """
+    try:
+        return transaction.datetime
+    except AttributeError:
+        return transaction.timestamp
+
+
+def in_time_order(transactions):
+    """
+    Get the transactions in the order of their time without sorting them if they already are, e.g. because they
+    are a `TransactionIndex` or were queried from a `deltaconv.store.TransactionStore`.
+
+    Args:
+        transactions (Iterable[Transaction|Deposit]): The trades or deposits
+
+    Returns:
+        Sequence: The transactions in the order of time
+    """
+    if isinstance(transactions, TransactionIndex):
+        return transactions
+
+    transactions = list(transactions)
+    times = [transaction_time(t) for t in transactions]
+
+    if all(a <= b for a, b in zip(times, times[1:])):
+        return transactions
+
+    return sorted(transactions, key=transaction_time)
+
+
+def _keys(transaction):
+    """ Get the keys of the secondary indexes of a transaction """
+    keys = [('exchange', transaction.exchange)]
+
+    pair = getattr(transaction, 'trading_pair', None)
+
+    if pair is not None:
+        quote, base = pair
+
+        keys += [
+            ('currency', base.currency),
+            ('currency', quote.currency),
+            ('pair', (base.currency, quote.currency)),
+            ('type', str(transaction.type).upper()),
+        ]
+    else:
+        keys.append(('currency', transaction.currency))
+
+    return keys
+
+
+class TransactionIndex(collections.abc.Sequence):
+    """
+    The transactions in the order of their time with secondary indexes
+    """
+
+    def __init__(self, transactions):
+        """
+
+        Args:
+            transactions (Iterable[Transaction|Deposit]): The trades or deposits in any order
+        """
+        super().__init__()
+
+        self._transactions = sorted(transactions, key=transaction_time)
+        self._times = [transaction_time(t) for t in self._transactions]
+
+        # the positions of the transactions of each key in the order of time
+        self._positions = {}
+
+        for position, transaction in enumerate(self._transactions):
+            for key in set(_keys(transaction)):
+                self._positions.setdefault(key, []).append(position)
+
+    def __len__(self):
+        return len(self._transactions)
+
+    def __getitem__(self, item):
+        return self._transactions[item]
+
+    def __iter__(self):
+        return iter(self._transactions)
+
+    def _bounds(self, start, end):
+        """ Get the first and the last position (exclusive) of the transactions from `start` to `end` (exclusive) """
+        lo = bisect.bisect_left(self._times, start) if start is not None else 0
+        hi = bisect.bisect_left(self._times, end) if end is not None else len(self._times)
+
+        return lo, hi
+
+    def range(self, start=None, end=None):
+        """
+        Get the transactions from `start` to `end`.
+
+        Args:
+            start (datetime.datetime):  The first time (inclusive). Defaults to the first transaction.
+            end (datetime.datetime):    The last time (exclusive). Defaults to the last transaction.
+
+        Returns:
+            list: The transactions in the order of time
+        """
+        lo, hi = self._bounds(start, end)
+
+        return self._transactions[lo:hi]
+
+    def query(self, start=None, end=None, currency=None, pair=None, exchange=None, type=None):
+        """
+        Get the transactions from `start` to `end` matching all given keys.
+
+        Args:
+            start (datetime.datetime):  The first time (inclusive)
+            end (datetime.datetime):    The last time (exclusive)
+            currency (str):             The base or quote currency of a trade or the currency of a deposit, e.g. ETH
+            pair (tuple[str, str]):     The base and quote currency of a trade, e.g. ('ETH', 'BTC')
+            exchange (str):             The exchange, e.g. Binance
+            type (str):                 The type of a trade, e.g. BUY (case-insensitive)
+
+        Returns:
+            list: The transactions in the order of time
+        """
+        keys = [
+            (name, value) for name, value in [
+                ('currency', currency), ('pair', tuple(pair) if pair else None), ('exchange', exchange),
+                ('type', type.upper() if type else None)
+            ] if value is not None
+        ]
+
+        lo, hi = self._bounds(start, end)
+
+        if not keys:
+            return self._transactions[lo:hi]
+
+        # search the time range within the most selective key and check the others on the result
+        positions = min((self._positions.get(key, []) for key in keys), key=len)
+        others = [self._positions.get(key, []) for key in keys]
+
+        first, last = bisect.bisect_left(positions, lo), bisect.bisect_left(positions, hi)
+        result = positions[first:last]
+
+        for other in others:
+            if other is not positions:
+                members = set(other[bisect.bisect_left(other, lo):bisect.bisect_left(other, hi)])
+                result = [p for p in result if p in members]
+
+        return [self._transactions[p] for p in result]
+
+    def keys(self, name):
+        """
+        Get the values of a secondary index
+
+        Args:
+            name (str): The index; currency, pair, exchange or type
+
+        Returns:
+            list: The values, e.g. the currencies
+        """
+        return sorted(value for key, value in self._positions if key == name)
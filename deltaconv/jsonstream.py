@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+import codecs
+import json
+from json.decoder import JSONDecodeError
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JSONArrayStream(object):
+    """
+    Decodes the items of an array nested in a JSON document while the document is read.
+
+    Only the items of the array at `path` are decoded - one at a time - so neither the raw document nor the whole
+    object tree have to be kept in memory, e.g.
+
+        for record in JSONArrayStream(response.iter_content(65536), path=['data', 'rows']):
+            ...
+
+    If the value at `path` is missing or null, no items are yielded and `found` remains False.
+    """
+
+    def __init__(self, chunks, path):
+        """
+
+        Args:
+            chunks (Iterable[bytes|str]):   The chunks of the JSON document
+            path (list[str]):               The keys of the nested objects leading to the array
+        """
+        super().__init__()
+
+        self._chunks = iter(chunks)
+        self._path = list(path)
+
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+        self.found = False
+
+    def _fill(self):
+        """
+        Read the next chunk into the buffer.
+
+        Returns:
+            bool: False, if the document is exhausted
+
+        """
+        if self._exhausted:
+            return False
+
+        # drop the consumed part of the buffer
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._text_decoder.decode(chunk)
+
+            if chunk:
+                self._buffer += chunk
+                return True
+
+        self._exhausted = True
+        self._buffer += self._text_decoder.decode(b'', final=True)
+
+        return False
+
+    def _peek(self):
+        """ Get the next non-whitespace character without consuming it. """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill():
+                raise JSONDecodeError('Unexpected end of document', self._buffer, self._pos)
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise JSONDecodeError('Expecting {!r}'.format(char), self._buffer, self._pos)
+
+        self._pos += 1
+
+    def _value(self):
+        """ Decode the next value of the document. """
+        self._peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+
+                # a value ending with the buffer may be cut off, e.g. a number
+                if end < len(self._buffer) or self._exhausted:
+                    self._pos = end
+                    return value
+            except JSONDecodeError:
+                if self._exhausted:
+                    raise
+
+            self._fill()
+
+    def __iter__(self):
+        for depth, key in enumerate(self._path):
+            if self._peek() != '{':
+                # e.g. "data": null
+                return
+
+            self._pos += 1
+
+            # search the key within the object and skip all other values
+            while True:
+                if self._peek() == '}':
+                    return
+
+                name = self._value()
+                self._expect(':')
+
+                if name == key:
+                    break
+
+                self._value()
+
+                if self._peek() == ',':
+                    self._pos += 1
+
+        if self._peek() != '[':
+            return
+
+        self._pos += 1
+        self.found = True
+
+        if self._peek() == ']':
+            return
+
+        while True:
+            yield self._value()
+
+            if self._peek() == ']':
+                return
+
+            self._expect(',')
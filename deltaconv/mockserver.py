@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+import argparse
+import collections
+import datetime
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Answers the queries of `BinanceConnection` with synthetic records.
+
+    """
+
+    _PATH_TRADES = re.compile(r'^/exchange-api/v1/private/streamer/trade/get-user-trades$')
+
+    _PATH_EXCHANGES = re.compile(r'^/gateway-api/v1/private/capital/(deposit|withdraw)/list$')
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+    def _reply(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server    # type: MockBinanceServer
+
+        query = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        weight, throttled = server._request()
+        headers = {'X-MBX-USED-WEIGHT-1M': str(weight)}
+
+        if throttled:
+            headers['Retry-After'] = str(server.retry_after)
+            self._reply(429, headers=headers)
+            return
+
+        trades = self._PATH_TRADES.match(self.path)
+        exchanges = self._PATH_EXCHANGES.match(self.path)
+
+        if trades:
+            rows = server.trades(query['startTime'], query['endTime'], query.get('rows', server.page_limit))
+            body = {'code': '000000', 'data': rows, 'success': True}
+
+        elif exchanges:
+            rows = server.exchanges(
+                exchanges.group(1), query['startTime'], query['endTime'],
+                query.get('page', {}).get('limit', server.page_limit)
+            )
+            body = {'code': '000000', 'data': {'rows': rows, 'total': len(rows)}, 'success': True}
+
+        else:
+            self._reply(404, {'code': '404', 'data': None, 'success': False}, headers)
+            return
+
+        server._served(len(rows))
+
+        self._reply(200, body, headers)
+
+
+class MockBinanceServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the private Binance endpoints queried by `BinanceConnection`.
+
+    The records are generated on the fly: trades, deposits and withdrawals are spread evenly over time with the given
+    density per day, so the same window always returns the same records. Use it to measure or test the crawler
+    without hitting the live site, e.g.
+
+        with MockBinanceServer(latency=0.05, density=100) as server:
+            BinanceConnection(csrftoken='', cookies='', url=server.url).trades(start, end)
+    """
+
+    daemon_threads = True
+
+    # The origin of the synthetic records
+    _EPOCH = datetime.datetime(2017, 7, 14)
+
+    _SYMBOLS = [('ETH', 'BTC'), ('BNB', 'BTC'), ('ADA', 'ETH'), ('BTC', 'USDT')]
+
+    _COINS = ['BTC', 'ETH', 'BNB', 'ADA']
+
+    def __init__(
+        self,
+        address=('127.0.0.1', 0),
+        latency=0.0,
+        density=10.0,
+        transfer_density=0.1,
+        page_limit=1000,
+        throttle_rate=0.0,
+        retry_after=1,
+        seed=0
+    ):
+        """
+
+        Args:
+            address (tuple[str, int]):  The address to listen on. Port 0 picks a free port.
+            latency (float):            The delay of each response in seconds
+            density (float):            The number of trades per day
+            transfer_density (float):   The number of deposits and withdrawals per day each
+            page_limit (int):           The maximum number of records returned per query
+            throttle_rate (float):      The fraction of queries answered with HTTP 429
+            retry_after (int):          The value of the `Retry-After` header of throttled queries in seconds
+            seed (int):                 The seed for choosing the throttled queries
+        """
+        super().__init__(address, _Handler)
+
+        self.latency = latency
+        self.density = density
+        self.transfer_density = transfer_density
+        self.page_limit = page_limit
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # the times of the queries within the last minute to report the used weight
+        self._recent = collections.deque()
+
+        self.requests = 0
+        self.rows = 0
+        self.throttled = 0
+
+    @property
+    def url(self):
+        """
+        The base URL of the server to pass to `BinanceConnection`.
+
+        Returns:
+            str: The base URL
+
+        """
+        host, port = self.server_address[:2]
+
+        return 'http://{}:{}'.format(host, port)
+
+    def __enter__(self):
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """ Serve the queries in a background thread. """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop serving and release the socket. """
+        self.shutdown()
+        self.server_close()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        """ Reset the request statistics. """
+        with self._lock:
+            self.requests = 0
+            self.rows = 0
+            self.throttled = 0
+
+    def _request(self):
+        """
+        Count a new query.
+
+        Returns:
+            tuple[int, bool]: The number of queries within the last minute and whether the query is throttled.
+
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self.requests += 1
+
+            self._recent.append(now)
+            while self._recent[0] < now - 60:
+                self._recent.popleft()
+
+            throttled = self._random.random() < self.throttle_rate
+            if throttled:
+                self.throttled += 1
+
+            return len(self._recent), throttled
+
+    def _served(self, rows):
+        with self._lock:
+            self.rows += rows
+
+    def _indices(self, density, start, end, limit):
+        """
+        Get the indices of the records within the window.
+
+        Args:
+            density (float):    The number of records per day
+            start (int):        The start of the window in milliseconds
+            end (int):          The end of the window in milliseconds
+            limit (int):        The maximum number of records
+
+        Returns:
+            range: The indices of the records
+
+        """
+        if density <= 0:
+            return range(0)
+
+        step = 86400E3 / density
+        epoch = self._EPOCH.timestamp() * 1E3
+
+        first = max(0, math.ceil((start - epoch) / step))
+        last = math.floor((end - epoch) / step)
+
+        return range(first, max(first, min(last + 1, first + min(limit, self.page_limit))))
+
+    def _time(self, density, index):
+        return int(self._EPOCH.timestamp() * 1E3 + index * 86400E3 / density)
+
+    def trades(self, start, end, limit):
+        """
+        Get the synthetic trades of the window.
+
+        Args:
+            start (int):    The start of the window in milliseconds
+            end (int):      The end of the window in milliseconds
+            limit (int):    The maximum number of trades
+
+        Returns:
+            list[dict]: The trades
+
+        """
+        result = []
+
+        for index in self._indices(self.density, start, end, limit):
+            base, quote = self._SYMBOLS[index % len(self._SYMBOLS)]
+
+            qty = round(0.1 + (index % 97) / 10, 8)
+            price = round(0.01 + (index % 89) / 1000, 8)
+
+            result.append({
+                'time': self._time(self.density, index),
+                'side': 'BUY' if index % 2 else 'SELL',
+                'tradeId': index,
+                'qty': qty,
+                'feeAsset': 'BNB',
+                'symbol': base + quote,
+                'totalQuota': round(qty * price, 8),
+                'realPnl': 0,
+                'quoteAsset': quote,
+                'baseAsset': base,
+                'fee': round(qty * price * 0.00075, 8),
+                'price': price,
+                'activeBuy': bool(index % 3),
+            })
+
+        return result
+
+    def exchanges(self, type, start, end, limit):
+        """
+        Get the synthetic deposits or withdrawals of the window.
+
+        Args:
+            type (str):     The type of the exchange; deposit or withdraw
+            start (int):    The start of the window in milliseconds
+            end (int):      The end of the window in milliseconds
+            limit (int):    The maximum number of records
+
+        Returns:
+            list[dict]: The deposits or withdrawals
+
+        """
+        result = []
+
+        for index in self._indices(self.transfer_density, start, end, limit):
+            coin = self._COINS[index % len(self._COINS)]
+
+            result.append({
+                'txId': '{}{:060x}'.format(type[0], index),
+                'coin': coin,
+                'curConfirmTimes': 12,
+                'status': 1,
+                'id': index,
+                'confirmTimes': '12/12',
+                'assetLabel': coin,
+                'userId': 1,
+                'address': '0x{:040x}'.format(index),
+                'transferAmount': round(1 + (index % 13) / 10, 8),
+                'txUrl': '',
+                'addressUrl': '',
+                'addressTag': '',
+                'insertTime': self._time(self.transfer_density, index),
+                'statusName': 'Completed',
+            })
+
+        return result
+
+
+def parse_arguments():
+    """Parses the arguments the user passed to this script """
+
+    arg_parser = argparse.ArgumentParser(
+        description='Serves synthetic trades, deposits and withdrawals for binancecrawler --url.'
+    )
+
+    arg_parser.add_argument('--host', help='The address to listen on.', default='127.0.0.1')
+    arg_parser.add_argument('--port', help='The port to listen on.', type=int, default=8000)
+    arg_parser.add_argument('--latency', help='The delay of each response in seconds.', type=float, default=0.0)
+    arg_parser.add_argument('--density', help='The number of trades per day.', type=float, default=10.0)
+    arg_parser.add_argument(
+        '--transfer-density', help='The number of deposits and withdrawals per day.', type=float, default=0.1
+    )
+    arg_parser.add_argument(
+        '--page-limit', help='The maximum number of records returned per query.', type=int, default=1000
+    )
+    arg_parser.add_argument(
+        '--throttle-rate', help='The fraction of queries answered with HTTP 429.', type=float, default=0.0
+    )
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', stream=sys.stdout)
+
+    server = MockBinanceServer(
+        address=(args.host, args.port),
+        latency=args.latency,
+        density=args.density,
+        transfer_density=args.transfer_density,
+        page_limit=args.page_limit,
+        throttle_rate=args.throttle_rate
+    )
+
+    logging.info('Serving synthetic Binance records on %s', server.url)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
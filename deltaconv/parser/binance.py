@@ -14,9 +14,19 @@
 import datetime
 
 from deltaconv.transaction import CryptoList, Position, Fee, CryptoTransaction, Deposit
+from deltaconv.index import in_time_order
+from deltaconv.profiling import PROFILER
+from deltaconv.timezones import ZoneConverter, from_milliseconds
 from .parser import TradeHistoryParser, ParserOutdatedError
 
 
+# The quote currencies of the markets of Binance
+QUOTE_ASSETS = [
+    'BTC', 'ETH', 'BNB', 'XRP', 'TRX', 'USDT', 'BUSD', 'TUSD', 'USDC', 'USDS', 'PAX', 'DAI', 'EUR', 'GBP', 'AUD',
+    'BRL', 'RUB', 'TRY', 'ZAR', 'UAH', 'NGN', 'BKRW', 'IDRT', 'BIDR'
+]
+
+
 def _market_to_trading_pair(market):
     """
     This function will convert the market column of the binance file into a trading pair
@@ -86,13 +96,18 @@ class BinanceTradeParser(TradeHistoryParser):
         _COLUMN_FEE_COIN
     ]
 
-    def parse(self, csv_file):
+    _WHERE_DATE = _COLUMN_DATE
+
+    _WHERE_TYPE = _COLUMN_TYPE
 
-        csv_content = self._read_file(csv_file)
+    _WHERE_MARKET = _COLUMN_MARKET
+
+    _WHERE_QUOTES = QUOTE_ASSETS
+
+    def parse(self, csv_file, where=None, columns=None):
 
         # the first line is the header of the csv columns
-        header = csv_content[0]
-        del csv_content[0]
+        header, csv_content = self._read_table(csv_file, where=where, columns=columns)
 
         # check if each entry in the header is in our list
         for c in header:
@@ -106,7 +121,9 @@ class BinanceTradeParser(TradeHistoryParser):
         for row in csv_content:
             row_ = TradeHistoryParser.Row(row=row, header=header)
 
-            base, quota = _market_to_trading_pair(row_[self._COLUMN_MARKET])
+            with PROFILER.stage('trading pair') as stage:
+                base, quota = _market_to_trading_pair(row_[self._COLUMN_MARKET])
+                stage.rows += 1
 
             # old binance files had different way to store datetimes which will not be converted
             # by the xlsx module by default. Thus, we have to check this manually.
@@ -135,19 +152,25 @@ class BinanceTradeParser(TradeHistoryParser):
         Write the list of `CryptoTransaction` into the given `csv_file`.
 
         Args:
-            transaction_list (list[CryptoTransaction]): A list of `Transaction`s.
+            transaction_list (list[CryptoTransaction]): A list of `Transaction`s. Sorted by time unless they already
+                are, e.g. a `deltaconv.index.TransactionIndex`.
             csv_file (str): The path for the csv file.
         """
 
         transactions = []
 
-        transaction_list = sorted(transaction_list, key=lambda t: t.datetime)
+        with PROFILER.stage('sort') as stage:
+            transaction_list = in_time_order(transaction_list)
+            stage.rows += len(transaction_list)
+
+        # the column is in UTC, so the offset is always +00:00
+        dates = ZoneConverter().isoformat([t.datetime for t in transaction_list], timespec='seconds')
 
-        for t in transaction_list:
+        for t, date in zip(transaction_list, dates):
             row = TradeHistoryParser.Row(self._COLUMNS)
 
             values = {
-                self._COLUMN_DATE: t.datetime.strftime("%Y-%m-%d %H:%M:%S"),
+                self._COLUMN_DATE: date,
                 self._COLUMN_MARKET: "{}{}".format(t.trading_pair[1].currency.upper(), t.trading_pair[0].currency),
                 self._COLUMN_TYPE: t.type.upper(),
                 self._COLUMN_PRICE: t.price,
@@ -200,13 +223,24 @@ class BinanceDepositParser(TradeHistoryParser):
         _COLUMN_STATUS
     ]
 
-    def parse(self, file):
+    _WHERE_DATE = _COLUMN_DATE
+
+    _WHERE_CURRENCIES = [_COLUMN_COIN]
+
+    _USED_COLUMNS = [
+        _COLUMN_DATE,
+        _COLUMN_COIN,
+        _COLUMN_AMOUNT,
+        _COLUMN_TRANSACTIONFEE,
+        _COLUMN_ADDRESS,
+        _COLUMN_TXID,
+        _COLUMN_STATUS
+    ]
 
-        content = self._read_file(file)
+    def parse(self, file, where=None, columns=None):
 
         # the first line is the header of the csv columns
-        header = content[0]
-        del content[0]
+        header, content = self._read_table(file, where=where, columns=columns)
 
         # check if each entry in the header is in our list
         for c in header:
@@ -240,19 +274,23 @@ class BinanceDepositParser(TradeHistoryParser):
         Write the list of `Deposit` into the given `file`.
 
         Args:
-            deposits (list[Deposit]): A list of `Deposit`s.
+            deposits (list[Deposit]): A list of `Deposit`s. Sorted by time unless they already are.
             file (str): The path for the file
         """
 
         transactions = []
 
-        deposits = sorted(deposits, key=lambda d: d.timestamp)
+        with PROFILER.stage('sort') as stage:
+            deposits = in_time_order(deposits)
+            stage.rows += len(deposits)
+
+        dates = ZoneConverter().isoformat([d.timestamp for d in deposits], timespec='seconds')
 
-        for d in deposits:
+        for d, date in zip(deposits, dates):
             row = TradeHistoryParser.Row(self._COLUMNS)
 
             values = {
-                self._COLUMN_DATE: d.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                self._COLUMN_DATE: date,
                 self._COLUMN_COIN: d.currency,
                 self._COLUMN_AMOUNT: d.amount,
                 self._COLUMN_TRANSACTIONFEE: d.transactionfee.amount,
@@ -292,6 +330,9 @@ class BinanceCrawlerDepositParser(TradeHistoryParser):
     _COLUMN_APPLY_TIME = "insertTime"
     _COLUMN_STATUS_NAME = "statusName"
 
+    # Only in files of withdrawals, see `deltaconv.crawler.WITHDRAWAL_COLUMNS`
+    _COLUMN_TRANSACTION_FEE = "transactionFee"
+
     _COLUMNS = [
         _COLUMN_TXID,
         _COLUMN_COIN,
@@ -310,12 +351,23 @@ class BinanceCrawlerDepositParser(TradeHistoryParser):
         _COLUMN_STATUS_NAME
     ]
 
-    def parse(self, csv_file):
-        csv_content = self._read_file(csv_file)
+    _WHERE_DATE = _COLUMN_APPLY_TIME
+
+    _WHERE_CURRENCIES = [_COLUMN_COIN]
 
+    _USED_COLUMNS = [
+        _COLUMN_APPLY_TIME,
+        _COLUMN_ADDRESS,
+        _COLUMN_TXID,
+        _COLUMN_COIN,
+        _COLUMN_AMOUNT_TRANSFER,
+        _COLUMN_STATUS,
+        _COLUMN_TRANSACTION_FEE
+    ]
+
+    def parse(self, csv_file, where=None, columns=None):
         # the first line is the header of the csv columns
-        header = csv_content[0]
-        del csv_content[0]
+        header, csv_content = self._read_table(csv_file, where=where, columns=columns)
 
         missing_columns = list(set(self._COLUMNS) - set(header))
         if missing_columns:
@@ -349,13 +401,17 @@ class BinanceCrawlerDepositParser(TradeHistoryParser):
 
         row_ = TradeHistoryParser.Row(row=row, header=header)
 
+        # the fee of a withdrawal is paid in the withdrawn coin
+        fee = row_.get(cls._COLUMN_TRANSACTION_FEE)
+        fee = Fee(amount=fee, currency=row_[cls._COLUMN_COIN]) if fee not in (None, '') else Fee(amount=0, currency="")
+
         return Deposit(
-            timestamp=datetime.datetime.utcfromtimestamp(row_[cls._COLUMN_APPLY_TIME] / 1E3),
+            timestamp=from_milliseconds(row_[cls._COLUMN_APPLY_TIME]),
             address=row_[cls._COLUMN_ADDRESS],
             txid=row_[cls._COLUMN_TXID],
             coin=row_[cls._COLUMN_COIN],
             amount=row_[cls._COLUMN_AMOUNT_TRANSFER],
-            fee=Fee(amount=0, currency=""),
+            fee=fee,
             status=row_[cls._COLUMN_STATUS],
             exchange="Binance",
         )
@@ -397,12 +453,28 @@ class BinanceCrawlerTradeParser(TradeHistoryParser):
         _COLUMN_ACTIVE_BUY,
     ]
 
-    def parse(self, csv_file):
-        csv_content = self._read_file(csv_file)
+    _WHERE_DATE = _COLUMN_TIME
 
+    _WHERE_TYPE = _COLUMN_SIDE
+
+    _WHERE_CURRENCIES = [_COLUMN_BASE_ASSET, _COLUMN_QUOTE_ASSET]
+
+    _USED_COLUMNS = [
+        _COLUMN_TIME,
+        _COLUMN_SIDE,
+        _COLUMN_TRADEID,
+        _COLUMN_QUANTITY,
+        _COLUMN_FEE_COIN,
+        _COLUMN_TOTAL_QUOTA,
+        _COLUMN_QUOTE_ASSET,
+        _COLUMN_BASE_ASSET,
+        _COLUMN_FEE,
+        _COLUMN_PRICE
+    ]
+
+    def parse(self, csv_file, where=None, columns=None):
         # the first line is the header of the csv columns
-        header = csv_content[0]
-        del csv_content[0]
+        header, csv_content = self._read_table(csv_file, where=where, columns=columns)
 
         missing_columns = list(set(self._COLUMNS) - set(header))
         if missing_columns:
@@ -442,8 +514,13 @@ class BinanceCrawlerTradeParser(TradeHistoryParser):
 
         base, quota = row_[cls._COLUMN_BASE_ASSET], row_[cls._COLUMN_QUOTE_ASSET]
 
+        # the id is read as a number
+        trade_id = row_.get(cls._COLUMN_TRADEID)
+        if isinstance(trade_id, float) and trade_id.is_integer():
+            trade_id = int(trade_id)
+
         return CryptoTransaction(
-            datetime=datetime.datetime.utcfromtimestamp(row_[BinanceCrawlerTradeParser._COLUMN_TIME] / 1000),
+            datetime=from_milliseconds(row_[BinanceCrawlerTradeParser._COLUMN_TIME]),
             trading_pair=(
                 Position(amount=row_[BinanceCrawlerTradeParser._COLUMN_TOTAL_QUOTA], currency=quota),
                 Position(amount=row_[BinanceCrawlerTradeParser._COLUMN_QUANTITY], currency=base)
@@ -451,5 +528,6 @@ class BinanceCrawlerTradeParser(TradeHistoryParser):
             trading_type=row_[BinanceCrawlerTradeParser._COLUMN_SIDE],
             price=row_[BinanceCrawlerTradeParser._COLUMN_PRICE],
             fee=Fee(row_[BinanceCrawlerTradeParser._COLUMN_FEE], row_[BinanceCrawlerTradeParser._COLUMN_FEE_COIN]),
-            exchange="Binance"
+            exchange="Binance",
+            trade_id=None if trade_id in (None, '') else str(trade_id)
         )
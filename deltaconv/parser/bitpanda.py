@@ -11,7 +11,7 @@
 # but WITHOUT ANY WARRANTY; without even the implied warranty of
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU General Public License for more details.
-from deltaconv.parser.parser import TradeHistoryParser, ParserOutdatedError
+from deltaconv.parser.parser import TradeHistoryParser, ParserOutdatedError, Where
 from deltaconv.transaction import CryptoTransaction, Position, Fee
 
 
@@ -51,16 +51,41 @@ class BitpandaParser(TradeHistoryParser):
         _COLUMN_STATUS
     ]
 
-    def parse(self, csv_file):
+    _WHERE_DATE = _COLUMN_DATE
 
-        csv_content = self._read_file(csv_file)
+    _WHERE_TYPE = _COLUMN_TYPE
 
-        # the first line is a disclaimer and the second line is the title with the account email address
-        del csv_content[0:2]
+    _WHERE_CURRENCIES = [_COLUMN_FIAT, _COLUMN_CRYPTO]
 
+    _USED_COLUMNS = [
+        _COLUMN_DATE,
+        _COLUMN_TYPE,
+        _COLUMN_FIAT,
+        _COLUMN_FIAT_AMOUNT,
+        _COLUMN_CRYPTO,
+        _COLUMN_CRYPTO_AMOUNT
+    ]
+
+    # only buys and sells are transactions
+    _TYPES = ['buy', 'sell']
+
+    def parse(self, csv_file, where=None, columns=None):
+
+        # only process buy and sells - the filter is evaluated before a row is converted
+        types = [t for t in self._TYPES if where is None or where.types is None or t.upper() in where.types]
+        if not types:
+            return []
+
+        where = Where(
+            start=where.start if where else None,
+            end=where.end if where else None,
+            types=types,
+            currencies=where.currencies if where else None
+        )
+
+        # the first line is a disclaimer and the second line is the title with the account email address
         # the third line is the header
-        header = csv_content[0]
-        del csv_content[0]
+        header, csv_content = self._read_table(csv_file, header_row=2, where=where, columns=columns)
 
         # check if each entry in the header is in our list
         for c in header:
@@ -74,7 +99,7 @@ class BitpandaParser(TradeHistoryParser):
         for row in csv_content:
             row_ = TradeHistoryParser.Row(row=row, header=header)
 
-            if row_[self._COLUMN_TYPE] in ['buy', 'sell']:
+            if row_[self._COLUMN_TYPE] in self._TYPES:
                 # only process buy and sells
 
                 transactions.append(
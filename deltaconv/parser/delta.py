@@ -12,6 +12,9 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU General Public License for more details.
 
+from deltaconv.index import transaction_time
+from deltaconv.timezones import ZoneConverter
+from deltaconv.transaction import Deposit, Transfer, Withdrawal
 from .parser import TradeHistoryParser
 
 
@@ -44,10 +47,10 @@ class DeltaParser(TradeHistoryParser):
     # The currency of the fee
     _COLUMN_FEE_CURRENCY = "Fee currency"
 
-    # Optional, used for an ICO, we'll take this amount as money invested
+    # Optional, used for an ICO, we'll take this amount as money invested. Holds the fiat value of trades if known.
     _COLUMN_COSTS = "Costs / Proceeds"
 
-    # Optional, used for an ICO, the currency of the amount invested
+    # Optional, used for an ICO, the currency of the amount invested or of the fiat value
     _COLUMN_COSTS_CURRENCY = "Costs / Proceeds currency"
 
     # Optional, for trades. When set to 1, the quote will be added to or deducted from your holdings
@@ -88,14 +91,96 @@ class DeltaParser(TradeHistoryParser):
         "IOTA": "MIOTA"
     }
 
+    # The type of a transfer between two exchanges
+    _TYPE_TRANSFER = "TRANSFER"
+
+    _TYPE_DEPOSIT = "DEPOSIT"
+
+    _TYPE_WITHDRAW = "WITHDRAW"
+
+    def _symbol(self, currency):
+        return self._CURRENCY_SYMBOL_MAPPING.get(currency, currency)
+
+    def _transfer_values(self, t, date):
+        """
+        Get the row of a `Transfer` between two exchanges
+
+        Args:
+            t (Transfer):   The transfer
+            date (str):     The formatted time of the transfer
+
+        Returns:
+            dict: The values of the row
+        """
+        return {
+            DeltaParser._COLUMN_DATE: date,
+            DeltaParser._COLUMN_TYPE: self._TYPE_TRANSFER,
+            DeltaParser._COLUMN_EXCHANGE: t.exchange,
+            DeltaParser._COLUMN_BASE_AMOUNT: t.amount,
+            DeltaParser._COLUMN_BASE_CURRENCY: self._symbol(t.currency),
+            DeltaParser._COLUMN_QUOTA_AMOUNT: "",
+            DeltaParser._COLUMN_QUOTA_CURRENCY: "",
+            DeltaParser._COLUMN_FEE: t.fee.amount,
+            DeltaParser._COLUMN_FEE_CURRENCY: self._symbol(t.fee.currency),
+            DeltaParser._COLUMN_COSTS: "",
+            DeltaParser._COLUMN_COSTS_CURRENCY: "",
+            DeltaParser._COLUMN_SYNC_HOLDING: "",
+            DeltaParser._COLUMN_SENT_RECEIVED_FROM: t.exchange,
+            DeltaParser._COLUMN_SENT_TO: t.destination,
+            DeltaParser._COLUMN_NOTES: t.txid or "",
+        }
+
+    def _deposit_values(self, d, date):
+        """
+        Get the row of a `Deposit` or `Withdrawal` of a single account
+
+        Args:
+            d (Deposit):    The deposit or withdrawal
+            date (str):     The formatted time of the deposit
+
+        Returns:
+            dict: The values of the row
+        """
+        return {
+            DeltaParser._COLUMN_DATE: date,
+            DeltaParser._COLUMN_TYPE: self._TYPE_WITHDRAW if isinstance(d, Withdrawal) else self._TYPE_DEPOSIT,
+            DeltaParser._COLUMN_EXCHANGE: d.exchange,
+            DeltaParser._COLUMN_BASE_AMOUNT: d.amount,
+            DeltaParser._COLUMN_BASE_CURRENCY: self._symbol(d.currency),
+            DeltaParser._COLUMN_QUOTA_AMOUNT: "",
+            DeltaParser._COLUMN_QUOTA_CURRENCY: "",
+            DeltaParser._COLUMN_FEE: d.transactionfee.amount or "",
+            DeltaParser._COLUMN_FEE_CURRENCY: self._symbol(d.transactionfee.currency or d.currency),
+            DeltaParser._COLUMN_COSTS: "",
+            DeltaParser._COLUMN_COSTS_CURRENCY: "",
+            DeltaParser._COLUMN_SYNC_HOLDING: "",
+            DeltaParser._COLUMN_SENT_RECEIVED_FROM: "",
+            DeltaParser._COLUMN_SENT_TO: "",
+            DeltaParser._COLUMN_NOTES: d.txid or "",
+        }
+
     def export(self, transaction_list, csv_file):
         transactions = []
 
-        for t in transaction_list:
+        # the dates include the time zone
+        transaction_list = list(transaction_list)
+        dates = ZoneConverter(self.timezone).isoformat([transaction_time(t) for t in transaction_list])
+
+        for t, date in zip(transaction_list, dates):
             row = TradeHistoryParser.Row(self._COLUMNS)
 
+            if isinstance(t, Transfer):
+                row.update(self._transfer_values(t, date))
+                transactions.append(row)
+                continue
+
+            if isinstance(t, Deposit):
+                row.update(self._deposit_values(t, date))
+                transactions.append(row)
+                continue
+
             values = {
-                DeltaParser._COLUMN_DATE: t.datetime,
+                DeltaParser._COLUMN_DATE: date,
                 DeltaParser._COLUMN_TYPE: t.type.upper(),
                 DeltaParser._COLUMN_EXCHANGE: t.exchange,
 
@@ -117,8 +202,8 @@ class DeltaParser(TradeHistoryParser):
                     t.fee.currency
                 ),
 
-                DeltaParser._COLUMN_COSTS: "",
-                DeltaParser._COLUMN_COSTS_CURRENCY: "",
+                DeltaParser._COLUMN_COSTS: t.value.amount if t.value else "",
+                DeltaParser._COLUMN_COSTS_CURRENCY: t.value.currency if t.value else "",
                 DeltaParser._COLUMN_SYNC_HOLDING: 1,
                 DeltaParser._COLUMN_SENT_RECEIVED_FROM: "",
                 DeltaParser._COLUMN_SENT_TO: "",
@@ -129,5 +214,5 @@ class DeltaParser(TradeHistoryParser):
 
             transactions.append(row)
 
-        self._write_transactions(transactions, csv_file)
+        self._write_transactions(self._COLUMNS, transactions, csv_file)
         # writer.writerow(row.export())
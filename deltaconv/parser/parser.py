@@ -17,6 +17,9 @@ import csv
 import datetime
 import os
 
+from deltaconv.profiling import PROFILER
+from deltaconv.timezones import from_milliseconds
+
 
 class ParserOutdatedError(RuntimeError):
     """ Raise this exception if a TradingParser is out of date.
@@ -25,6 +28,149 @@ class ParserOutdatedError(RuntimeError):
     pass
 
 
+def split_market(market, quotes):
+    """
+    Split a market without separator into its base and quote currency, e.g. ETHBUSD into ETH and BUSD.
+
+    Args:
+        market (str):           The market
+        quotes (list[str]):     The known quote currencies
+
+    Returns:
+        tuple[str, str]: The base and quote currency or None if the market does not end with a known quote currency
+    """
+    # the longest quote is checked first, so BUSD is not taken for USD
+    for quote in sorted(quotes, key=len, reverse=True):
+        if market.endswith(quote) and len(market) > len(quote):
+            return market[:-len(quote)], quote
+
+    return None
+
+
+class Where(object):
+    """
+    A filter of the rows of a file.
+
+    The filter is evaluated on the cells of a row as they are read from the file, i.e. before any cell is converted
+    and before any `Transaction` is created. Filters on columns a format does not have are ignored, e.g. the type of
+    deposits.
+    """
+
+    # The formats of datetimes in the supported files
+    _DATETIME_FORMATS = ["%Y-%m-%d %H:%M:%S", "%d.%m.%y %H:%M"]
+
+    def __init__(self, start=None, end=None, types=None, currencies=None):
+        """
+
+        Args:
+            start (datetime.datetime):  Only keep rows at or after this time (UTC)
+            end (datetime.datetime):    Only keep rows before this time (UTC)
+            types (list[str]):          Only keep rows of these types, e.g. BUY or SELL (case-insensitive)
+            currencies (list[str]):     Only keep rows involving one of these currencies, e.g. BTC
+        """
+        super().__init__()
+
+        self.start = start
+        self.end = end
+        self.types = {t.upper() for t in types} if types else None
+        self.currencies = {c.upper() for c in currencies} if currencies else None
+
+    @classmethod
+    def to_datetime(cls, value):
+        """
+        Convert the raw value of a date cell into a naive UTC datetime.
+
+        Args:
+            value: The value of the cell, e.g. a string or a timestamp in milliseconds
+
+        Returns:
+            datetime.datetime: The datetime or None if the value cannot be converted.
+        """
+        if isinstance(value, datetime.datetime):
+            return value
+
+        try:
+            # Binance uses timestamps in milliseconds
+            return from_milliseconds(float(value))
+        except (TypeError, ValueError, OverflowError, OSError):
+            pass
+
+        for fmt in cls._DATETIME_FORMATS:
+            try:
+                return datetime.datetime.strptime(value, fmt)
+            except (TypeError, ValueError):
+                pass
+
+        try:
+            result = datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+        if result.tzinfo is not None:
+            result = result.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        return result
+
+    def compile(self, header, date=None, type=None, currencies=(), market=None, quotes=()):
+        """
+        Create a function evaluating the filter on the raw cells of a row.
+
+        Args:
+            header (list[str]):     The header of the file
+            date (str):             The column of the datetime
+            type (str):             The column of the type, e.g. BUY or SELL
+            currencies (list[str]): The columns holding a currency symbol
+            market (str):           The column holding a market, e.g. ETHBTC
+            quotes (list[str]):     The quote currencies of the markets. A market with another quote currency
+                                    matches if it starts or ends with a currency.
+
+        Returns:
+            Callable[[list], bool]: The function returning True for rows to keep
+        """
+        checks = []
+
+        if (self.start or self.end) and date in header:
+            date_idx = header.index(date)
+
+            def check_date(row):
+                value = self.to_datetime(row[date_idx])
+
+                return value is not None and (not self.start or value >= self.start) and (
+                    not self.end or value < self.end
+                )
+
+            checks.append(check_date)
+
+        if self.types and type in header:
+            type_idx = header.index(type)
+
+            checks.append(lambda row: str(row[type_idx]).upper() in self.types)
+
+        currency_idx = [header.index(c) for c in currencies if c in header]
+        market_idx = header.index(market) if market in header else None
+
+        if self.currencies and (currency_idx or market_idx is not None):
+
+            def check_currency(row):
+                if any(str(row[i]).upper() in self.currencies for i in currency_idx):
+                    return True
+
+                if market_idx is not None:
+                    value = str(row[market_idx]).upper()
+                    pair = split_market(value, quotes)
+
+                    if pair is not None:
+                        return pair[0] in self.currencies or pair[1] in self.currencies
+
+                    return any(value.startswith(c) or value.endswith(c) for c in self.currencies)
+
+                return False
+
+            checks.append(check_currency)
+
+        return lambda row: all(check(row) for check in checks)
+
+
 class TradeHistoryParser(object):
 
     class Row(dict):
@@ -64,18 +210,39 @@ class TradeHistoryParser(object):
 
             return row
 
+    # The columns evaluated by a `Where` filter
+    _WHERE_DATE = None
+
+    _WHERE_TYPE = None
+
+    _WHERE_CURRENCIES = []
+
+    _WHERE_MARKET = None
+
+    # The quote currencies of the markets in `_WHERE_MARKET`
+    _WHERE_QUOTES = ()
+
+    # The columns needed to create the transactions. If None, all columns are converted.
+    _USED_COLUMNS = None
+
+    # The time zone of the exported times. Defaults to UTC.
+    timezone = None
+
     def __init__(self, **kwargs):
 
         super().__init__()
 
         self._cfg = kwargs
 
-    def parse(self, file):
+    def parse(self, file, where=None, columns=None):
         """
         Parses the given file
 
         Args:
-            file (str): The path to the file.
+            file (str):             The path to the file.
+            where (Where):          Only parse the rows matching the filter (optional)
+            columns (list[str]):    Only convert the cells of these columns. Defaults to the columns needed to create
+                                    the transactions. The cells of other columns are passed on as read.
 
         Returns:
             list[Transaction]: A list of `Transaction`s
@@ -97,9 +264,9 @@ class TradeHistoryParser(object):
         """
         raise NotImplementedError('You have to implement the export() function.')
 
-    def _read_file(self, file):
+    def _read_raw(self, file):
         """
-        Get the content of the given `file` as list of rows
+        Get the content of the given `file` as list of rows without converting the cells
 
         Args:
             file: The file to read (either xl(s)x or csv
@@ -111,30 +278,51 @@ class TradeHistoryParser(object):
             list[list[any]]: The content of the file as a list of rows
         """
 
-        if file.endswith('.xlsx'):
-            # parse a excel sheet
-            import xlrd
+        with PROFILER.stage('read') as stage:
+            if file.endswith('.xlsx'):
+                # parse a excel sheet
+                import xlrd
 
-            # open the workbook
-            wb = xlrd.open_workbook(file)
+                # open the workbook
+                wb = xlrd.open_workbook(file)
 
-            # get the first sheet in the book
-            sheet = wb.sheet_by_index(0)
+                # get the first sheet in the book
+                sheet = wb.sheet_by_index(0)
 
-            # convert cells to python types
-            file_rows = [
-                [c.value for c in row]
-                for row in sheet.get_rows()
-            ]
+                # convert cells to python types
+                file_rows = [
+                    [c.value for c in row]
+                    for row in sheet.get_rows()
+                ]
 
-        elif file.endswith('.csv'):
+            elif file.endswith('.csv'):
 
-            with open(file, 'r') as file_:
+                with open(file, 'r') as file_:
 
-                file_rows = list(csv.reader(file_, **self._cfg))
-        else:
-            raise NotImplementedError(
-                'The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+                    file_rows = list(csv.reader(file_, **self._cfg))
+            else:
+                raise NotImplementedError(
+                    'The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+
+            stage.rows += len(file_rows)
+            stage.bytes += os.path.getsize(file)
+
+        return file_rows
+
+    def _read_file(self, file):
+        """
+        Get the content of the given `file` as list of rows
+
+        Args:
+            file: The file to read (either xl(s)x or csv
+
+        Notes:
+            For xlsx files, it is assumed that the trading info is on the first sheet.
+
+        Returns:
+            list[list[any]]: The content of the file as a list of rows
+        """
+        file_rows = self._read_raw(file)
 
         if file_rows:
 
@@ -143,24 +331,93 @@ class TradeHistoryParser(object):
             for row in file_rows:
 
                 # a list for the new row with python datatypes
-                row_ = []
-                for col in row:
-
-                    try:
-                        row_.append(float(col))
-                    except ValueError:
-
-                        # try to parse as datetime
-                        try:
-                            row_.append(datetime.datetime.strptime(col, "%Y-%m-%d %H:%M:%S"))
-                        except ValueError:
-                            row_.append(col)
+                row_ = [self._convert_cell(col) for col in row]
 
                 # append the row to the result
                 result.append(row_)
 
             return result
 
+    def _read_table(self, file, header_row=0, where=None, columns=None):
+        """
+        Get the header of the given `file` and its rows matching the filter
+
+        Only the cells of the given `columns` are converted into python types. The filter is evaluated on the cells as
+        read and the rows are converted while they are iterated, i.e. after the header was checked.
+
+        Args:
+            file (str):             The file to read (either xl(s)x or csv
+            header_row (int):       The index of the row containing the header
+            where (Where):          Only return the rows matching the filter (optional)
+            columns (list[str]):    The columns to convert. Defaults to `_USED_COLUMNS` or all columns.
+
+        Returns:
+            tuple[list, Iterable[list]]: The header and the rows
+        """
+        file_rows = self._read_raw(file) or []
+
+        if len(file_rows) <= header_row:
+            return [], iter([])
+
+        header = [self._convert_cell(c) for c in file_rows[header_row]]
+
+        columns = columns or self._USED_COLUMNS
+        convert = [columns is None or c in columns for c in header]
+
+        keep = where.compile(
+            header,
+            date=self._WHERE_DATE,
+            type=self._WHERE_TYPE,
+            currencies=self._WHERE_CURRENCIES,
+            market=self._WHERE_MARKET,
+            quotes=self._WHERE_QUOTES
+        ) if where else None
+
+        def rows():
+            for row in file_rows[header_row + 1:]:
+                if keep is not None and not keep(row):
+                    continue
+
+                yield [
+                    self._convert_cell(col) if idx >= len(convert) or convert[idx] else col
+                    for idx, col in enumerate(row)
+                ]
+
+        # the rows are filtered and converted while the parser consumes them
+        return header, PROFILER.iterate('convert', rows())
+
+    @staticmethod
+    def _convert_cell(col):
+        """
+        Convert the value of a cell into a python type
+
+        Args:
+            col: The value of the cell, e.g. a string read from a csv file
+
+        Returns:
+            The value as float or datetime if possible. Otherwise, the value is returned unchanged.
+        """
+        try:
+            return float(col)
+        except (TypeError, ValueError):
+
+            # try to parse as datetime
+            try:
+                return datetime.datetime.strptime(col, "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                pass
+
+            # or as ISO 8601 with a time zone as written by the exporters, e.g. 2019-01-01T01:00:00+01:00
+            try:
+                value = datetime.datetime.fromisoformat(col)
+            except (TypeError, ValueError):
+                return col
+
+            if value.tzinfo is not None:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+            return value
+
     def _write_transactions(self, columns, transactions, file):
         """
         Write the transactions into the given file
@@ -174,44 +431,51 @@ class TradeHistoryParser(object):
 
         """
         if transactions:
+            with PROFILER.stage('write') as stage:
+                self._write_file(columns, transactions, file)
 
-            if file.endswith('.xlsx'):
-                # parse a excel sheet
-                import xlwt
+                stage.rows += len(transactions)
+                stage.bytes += os.path.getsize(file)
 
-                # create a new workbook
-                wb = xlwt.Workbook()
+    def _write_file(self, columns, transactions, file):
+        """ Write the non-empty list of transactions into the given file, see `_write_transactions` """
+        if file.endswith('.xlsx'):
+            # parse a excel sheet
+            import xlwt
 
-                # and a sheet
-                sheet = wb.add_sheet('sheet1')
+            # create a new workbook
+            wb = xlwt.Workbook()
 
-                # write the header
-                for c, head in enumerate(columns):
-                    sheet.write(0, c, head)
+            # and a sheet
+            sheet = wb.add_sheet('sheet1')
 
-                # write all values
-                for row, transaction in enumerate(transactions):
-                    for col, value in enumerate(columns):
-                        sheet.write(row + 1, col, transaction[value])
+            # write the header
+            for c, head in enumerate(columns):
+                sheet.write(0, c, head)
 
-                wb.save(file)
+            # write all values
+            for row, transaction in enumerate(transactions):
+                for col, value in enumerate(columns):
+                    sheet.write(row + 1, col, transaction[value])
 
-            elif file.endswith('.csv'):
+            wb.save(file)
 
-                with open(file, mode='w') as file_:
+        elif file.endswith('.csv'):
 
-                    writer = csv.DictWriter(file_, fieldnames=transactions[0].keys(), **self._cfg)
-                    writer.writeheader()
+            with open(file, mode='w') as file_:
 
-                    for t in transactions:
+                writer = csv.DictWriter(file_, fieldnames=transactions[0].keys(), **self._cfg)
+                writer.writeheader()
 
-                        for key, value in t.items():
-                            if isinstance(value, float):
-                                t[key] = "{:f}".format(value)
+                for t in transactions:
 
-                        writer.writerow(t)
-            else:
-                raise NotImplementedError(
-                    'The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+                    for key, value in t.items():
+                        if isinstance(value, float):
+                            t[key] = "{:f}".format(value)
+
+                    writer.writerow(t)
+        else:
+            raise NotImplementedError(
+                'The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
 
 
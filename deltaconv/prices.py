@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+A local store of historical prices to value transactions in a fiat currency.
+
+The store reads candle files from a directory, one file per pair named `<BASE>-<QUOTE>.csv` or
+`<BASE>-<QUOTE>.parquet`, e.g. `ETH-BTC.csv`. Csv files either have a header with the columns `time` and `close` or
+no header in the layout of the Binance kline exports, i.e. the close price in the fifth and the close time in
+milliseconds in the seventh column. The time is either a timestamp in milliseconds or a date, e.g. 2019-01-01 00:00:00
+(UTC).
+
+A close price is keyed by the time the candle closed, not the time it opened, because it is not known before. A
+transaction is thus never valued with a price of the future, e.g. one at 10:30 with the close of the 10:00-11:00 candle.
+The `time` column of files with a header has to be the close time as well.
+
+Pairs without a file are triangulated through bridge currencies, e.g. ADA to EUR via ADA-BTC, BTC-USDT and EUR-USDT.
+"""
+import bisect
+import collections
+import csv
+import datetime
+import logging
+import os
+
+from deltaconv.transaction import Position
+
+PREVIOUS = 'previous'
+
+NEAREST = 'nearest'
+
+# The currencies used to triangulate pairs without candles
+BRIDGES = ['BTC', 'USDT']
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class PriceNotFoundError(LookupError):
+    """ Raise this exception if the price of a pair cannot be determined. """
+    pass
+
+
+def _seconds(value):
+    """ Convert a naive UTC datetime into seconds since the epoch """
+    return (value - _EPOCH).total_seconds()
+
+
+class _Candles(object):
+    """ The sorted close prices of a pair """
+
+    def __init__(self, times, prices):
+        super().__init__()
+
+        self.times = times
+        self.prices = prices
+
+    @classmethod
+    def load(cls, file):
+        if file.endswith('.parquet'):
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise PriceNotFoundError('Reading {} requires pyarrow - install it with pip install pyarrow.'.format(
+                    file
+                ))
+
+            table = pyarrow.parquet.read_table(file, columns=['time', 'close']).to_pydict()
+            rows = zip(table['time'], table['close'])
+        else:
+            with open(file, 'r', newline='') as file_:
+                content = list(csv.reader(file_))
+
+            if content and 'close' in content[0]:
+                time_idx, close_idx = content[0].index('time'), content[0].index('close')
+                content = content[1:]
+            else:
+                # the close time, the open time in the first column would value transactions with later prices
+                time_idx, close_idx = 6, 4
+
+            rows = ((row[time_idx], row[close_idx]) for row in content if row)
+
+        from deltaconv.parser.parser import Where
+
+        candles = []
+
+        for time, close in rows:
+            if isinstance(time, datetime.datetime):
+                seconds = _seconds(time.replace(tzinfo=None))
+            else:
+                value = Where.to_datetime(time)
+
+                if value is None:
+                    continue
+
+                seconds = _seconds(value)
+
+            candles.append((seconds, float(close)))
+
+        candles.sort()
+
+        return cls([time for time, _ in candles], [price for _, price in candles])
+
+    def lookup(self, times, mode=PREVIOUS):
+        """
+        Get the prices at the given times.
+
+        Args:
+            times (list[float]):    The times in seconds since the epoch
+            mode (str):             PREVIOUS for the last price at or before a time, NEAREST for the closest one
+
+        Returns:
+            list[float]: The prices, None if there is no price
+        """
+        result = [None] * len(times)
+
+        # the times are searched in sorted order, so each search starts where the previous one ended
+        lo = 0
+        for idx in sorted(range(len(times)), key=times.__getitem__):
+            time = times[idx]
+            lo = bisect.bisect_right(self.times, time, lo)
+
+            if mode == NEAREST:
+                candidates = [i for i in (lo - 1, lo) if 0 <= i < len(self.times)]
+
+                if candidates:
+                    result[idx] = self.prices[min(candidates, key=lambda i: abs(self.times[i] - time))]
+            elif lo:
+                result[idx] = self.prices[lo - 1]
+
+        return result
+
+
+class PriceStore(object):
+    """
+    The historical prices of all pairs with candle files in a directory.
+    """
+
+    def __init__(self, directory, bridges=None, cache_size=32, mode=PREVIOUS):
+        """
+
+        Args:
+            directory (str):        The directory of the candle files
+            bridges (list[str]):    The currencies to triangulate through. Defaults to `BRIDGES`
+            cache_size (int):       The number of pairs kept in memory
+            mode (str):             PREVIOUS or NEAREST, see `lookup`
+        """
+        super().__init__()
+
+        self.directory = directory
+        self.bridges = BRIDGES if bridges is None else bridges
+        self.cache_size = cache_size
+        self.mode = mode
+
+        # the files of the available pairs
+        self._files = {}
+
+        for name in sorted(os.listdir(directory)):
+            pair, extension = os.path.splitext(name)
+
+            if extension in ('.csv', '.parquet') and pair.count('-') == 1:
+                base, quote = pair.upper().split('-')
+                self._files.setdefault((base, quote), os.path.join(directory, name))
+
+        # the recently used pairs
+        self._cache = collections.OrderedDict()
+
+        self._paths = {}
+
+    @property
+    def pairs(self):
+        return list(self._files)
+
+    def _candles(self, pair):
+        """ Get the candles of a pair from the cache or its file """
+        candles = self._cache.get(pair)
+
+        if candles is not None:
+            self._cache.move_to_end(pair)
+            return candles
+
+        candles = self._cache[pair] = _Candles.load(self._files[pair])
+
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return candles
+
+    def _path(self, base, quote):
+        """
+        Find the shortest chain of pairs converting base into quote
+
+        Returns:
+            list[tuple[tuple[str, str], bool]]: The pairs and whether they are inverted
+        """
+        key = (base, quote)
+
+        if key not in self._paths:
+            # breadth-first search through the bridge currencies
+            previous = {base: None}
+            queue = collections.deque([base])
+
+            while queue and quote not in previous:
+                currency = queue.popleft()
+
+                for (b, q) in self._files:
+                    for source, target, inverted in ((b, q, False), (q, b, True)):
+                        if source != currency or target in previous:
+                            continue
+
+                        if target != quote and target not in self.bridges:
+                            continue
+
+                        previous[target] = (currency, (b, q), inverted)
+                        queue.append(target)
+
+            path = []
+
+            if quote in previous:
+                currency = quote
+
+                while previous[currency] is not None:
+                    currency, pair, inverted = previous[currency]
+                    path.insert(0, (pair, inverted))
+
+            self._paths[key] = path if quote in previous else None
+
+        return self._paths[key]
+
+    def rates(self, base, quote, times):
+        """
+        Get the price of one unit of base in quote at each of the given times.
+
+        Args:
+            base (str):                         The currency to value, e.g. ETH
+            quote (str):                        The currency of the price, e.g. EUR
+            times (list[datetime.datetime]):    The times (UTC)
+
+        Returns:
+            list[float]: The prices, None if there is no price at a time
+
+        Raises:
+            PriceNotFoundError: If there are no candles to convert base into quote
+        """
+        base, quote = base.upper(), quote.upper()
+
+        if base == quote:
+            return [1.0] * len(times)
+
+        path = self._path(base, quote)
+
+        if path is None:
+            raise PriceNotFoundError('There are no prices to convert {} into {}.'.format(base, quote))
+
+        seconds = [_seconds(t) for t in times]
+        result = [1.0] * len(times)
+
+        for pair, inverted in path:
+            for idx, price in enumerate(self._candles(pair).lookup(seconds, self.mode)):
+                if result[idx] is None or not price:
+                    result[idx] = None
+                else:
+                    result[idx] = result[idx] / price if inverted else result[idx] * price
+
+        return result
+
+    def rate(self, base, quote, time):
+        """ Get the price of one unit of base in quote at the given time, see `rates` """
+        return self.rates(base, quote, [time])[0]
+
+    def valuation(self, fiat):
+        """
+        Get a function valuing amounts in the given fiat currency, e.g. for `deltaconv.costbasis.CostBasis`
+
+        Returns:
+            Callable[[str, float, datetime.datetime], float]: The valuation
+        """
+        def value(currency, amount, time):
+            price = self.rate(currency, fiat, time)
+
+            if price is None:
+                raise PriceNotFoundError('There is no price of {} in {} at {}.'.format(currency, fiat, time))
+
+            return amount * price
+
+        return value
+
+    def enrich(self, transactions, fiat):
+        """
+        Set the value of each trade in the given fiat currency based on its quote amount.
+
+        Args:
+            transactions (list[CryptoTransaction]): The trades
+            fiat (str):                             The fiat currency, e.g. EUR
+
+        Returns:
+            int: The number of trades that could not be valued
+        """
+        by_quote = collections.defaultdict(list)
+
+        for t in transactions:
+            by_quote[t.trading_pair[0].currency].append(t)
+
+        missing = 0
+
+        # the trades of each quote currency are valued in a single batch
+        for quote, batch in by_quote.items():
+            try:
+                rates = self.rates(quote, fiat, [t.datetime for t in batch])
+            except PriceNotFoundError as e:
+                logging.warning('%s', e)
+                rates = [None] * len(batch)
+
+            for t, rate in zip(batch, rates):
+                if rate is None:
+                    missing += 1
+                    continue
+
+                t.value = Position(amount=t.trading_pair[0].amount * rate, currency=fiat.upper())
+
+        return missing
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Instrumentation of the stages of a conversion or a crawl.
+
+The parsers, the exporters and the connection to Binance measure their stages with the global `PROFILER`, e.g.
+
+    with PROFILER.stage('read') as stage:
+        rows = ...
+        stage.rows += len(rows)
+
+Stages may be nested. The time of a stage excludes the time of the stages nested in it, so the times of all stages sum
+up to the wall time of the outermost ones. The profiler is disabled by default and then does not measure anything.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+
+
+class _Stats(object):
+    """ The accumulated measurements of a stage """
+
+    def __init__(self, name):
+        super().__init__()
+
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'rows_per_second': self.rows / self.seconds if self.seconds else None,
+            'bytes_per_second': self.bytes / self.seconds if self.seconds else None,
+        }
+
+
+class _Measurement(object):
+    """ A single run of a stage. Add the processed rows and bytes while it is running. """
+
+    def __init__(self, profiler, name):
+        super().__init__()
+
+        self._profiler = profiler
+        self.name = name
+        self.rows = 0
+        self.bytes = 0
+
+        self._started = None
+        self._children = 0.0
+
+    def __enter__(self):
+        self._profiler._stack().append(self)
+        self._started = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._started
+
+        stack = self._profiler._stack()
+        stack.pop()
+
+        if stack:
+            stack[-1]._children += elapsed
+
+        self._profiler._add(self.name, elapsed - self._children, self.rows, self.bytes)
+
+
+class _NullMeasurement(object):
+    """ The measurement of a disabled profiler - everything is discarded """
+
+    rows = 0
+    bytes = 0
+
+    def __setattr__(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL = _NullMeasurement()
+
+
+class Profiler(object):
+    """ Collects the wall time, rows and bytes of named stages """
+
+    def __init__(self, enabled=False):
+        super().__init__()
+
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _add(self, name, seconds, rows, nbytes):
+        with self._lock:
+            stats = self._stats.get(name)
+
+            if stats is None:
+                stats = self._stats[name] = _Stats(name)
+
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.rows += rows
+            stats.bytes += nbytes
+
+    def stage(self, name):
+        """
+        Measure a stage.
+
+        Args:
+            name (str): The name of the stage, e.g. read
+
+        Returns:
+            A context manager yielding the measurement whose `rows` and `bytes` can be increased
+        """
+        if not self.enabled:
+            return _NULL
+
+        return _Measurement(self, name)
+
+    def iterate(self, name, iterable):
+        """
+        Measure the time spent to get the items of the given iterable, e.g. of a generator converting rows.
+
+        Args:
+            name (str):             The name of the stage
+            iterable (Iterable):    The items. Each item counts as a row.
+
+        Returns:
+            Iterable: The items of the iterable
+        """
+        if not self.enabled:
+            return iterable
+
+        return self._iterate(name, iter(iterable))
+
+    def _iterate(self, name, iterator):
+        while True:
+            with self.stage(name) as stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+
+                stage.rows += 1
+
+            yield item
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def report(self):
+        """
+        Get the measurements of all stages in the order they were first measured.
+
+        Returns:
+            dict: The stages and the peak resident set size in bytes (None if unknown)
+        """
+        with self._lock:
+            stages = [stats.to_dict() for stats in self._stats.values()]
+
+        return {'stages': stages, 'peak_rss': peak_rss()}
+
+    def table(self):
+        """
+        Get the report as a table
+
+        Returns:
+            list[str]: The lines of the table
+        """
+        report = self.report()
+
+        lines = [
+            '{:<16} {:>8} {:>10} {:>10} {:>12} {:>12}'.format('stage', 'calls', 'seconds', 'rows', 'rows/s', 'MB/s')
+        ]
+
+        for stage in report['stages']:
+            lines.append('{:<16} {:>8d} {:>10.3f} {:>10d} {:>12} {:>12}'.format(
+                stage['stage'], stage['calls'], stage['seconds'], stage['rows'],
+                '{:.0f}'.format(stage['rows_per_second']) if stage['rows'] and stage['rows_per_second'] else '-',
+                '{:.2f}'.format(stage['bytes_per_second'] / 1E6) if stage['bytes'] and stage['bytes_per_second']
+                else '-'
+            ))
+
+        if report['peak_rss'] is not None:
+            lines.append('peak RSS: {:.1f} MB'.format(report['peak_rss'] / 1E6))
+
+        return lines
+
+    def json(self):
+        """ Get the report as JSON """
+        return json.dumps(self.report(), indent=2)
+
+
+def peak_rss():
+    """
+    Get the peak resident set size of this process
+
+    Returns:
+        int: The size in bytes or None if it is unknown, e.g. on Windows
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on linux, bytes on macOS
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def add_profile_arguments(arg_parser):
+    """ Add the arguments enabling the profiler to the given argument parser """
+
+    arg_parser.add_argument(
+        '--profile',
+        help='Measure the wall time, rows/s and bytes/s of each stage and the peak RSS. Default format: table',
+        nargs='?',
+        const='table',
+        choices=['table', 'json']
+    )
+
+    arg_parser.add_argument('--profile-output', help='Write the profile into this file instead of the log.')
+
+
+def report_profile(format_, output=None):
+    """
+    Write the report of the global profiler
+
+    Args:
+        format_ (str):  Either table or json
+        output (str):   The file to write the report into. Will be logged if not given.
+    """
+    lines = PROFILER.table() if format_ == 'table' else [PROFILER.json()]
+
+    if output:
+        with open(output, 'w') as file_:
+            file_.write('\n'.join(lines) + '\n')
+    else:
+        for line in lines:
+            logging.info(line)
+
+
+# The profiler of the parsers, exporters and the connection to Binance
+PROFILER = Profiler()
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+The registry of supported file formats.
+
+Each format names its parser by import path and declares the header of its files, so that the format of a file can
+be detected without importing any parser. Third-party packages can add formats with an entry point in the group
+`tradingconv.formats` pointing to a dict with the same keys as the entries of `PARSER`:
+
+    entry_points={
+        'tradingconv.formats': ['kraken = tradingconv_kraken.formats:KRAKEN']
+    }
+
+Keep the module of the entry point free of heavy imports - the parser itself is only imported once it is used.
+"""
+import csv
+import importlib
+import logging
+import os
+
+# Each column of the header of a file has to be in the declared header
+MATCH_KNOWN = 'known'
+
+# Each column of the declared header has to be in the header of a file
+MATCH_ALL = 'all'
+
+# The types of the columns checked by `deltaconv.validate`
+TYPE_FLOAT = 'float'
+
+TYPE_DATETIME = 'datetime'
+
+# A timestamp in milliseconds since the epoch
+TYPE_TIMESTAMP = 'timestamp'
+
+# The kinds of records a format holds
+RECORDS_TRADES = 'trades'
+
+RECORDS_DEPOSITS = 'deposits'
+
+# The group of the entry points of third-party formats
+ENTRY_POINT_GROUP = 'tradingconv.formats'
+
+# The available formats. Each parser is only imported once it is used, see `load_parser`.
+PARSER = {
+    'binance-trades': {
+        'parser': 'deltaconv.parser.binance.BinanceTradeParser',
+        'config': {
+            'delimiter': ",",
+        },
+        'header': ['Date(UTC)', 'Market', 'Type', 'Price', 'Amount', 'Total', 'Fee', 'Fee Coin'],
+        'types': {
+            'Date(UTC)': TYPE_DATETIME,
+            'Price': TYPE_FLOAT,
+            'Amount': TYPE_FLOAT,
+            'Total': TYPE_FLOAT,
+            'Fee': TYPE_FLOAT,
+        },
+        # the time zone of the times in the files, see deltaconv.timezones
+        'timezone': 'UTC',
+        'match': MATCH_KNOWN,
+        'reader': True,
+        'writer': True,
+        # the extension the writer appends to the name of the output
+        'extension': '.xlsx',
+    },
+    'binance-deposit': {
+        'parser': 'deltaconv.parser.binance.BinanceDepositParser',
+        'config': {
+            'delimiter': ",",
+        },
+        'header': [
+            'Date(UTC)', 'Coin', 'Amount', 'TransactionFee', 'Address', 'TXID', 'SourceAddress', 'PaymentID', 'Status'
+        ],
+        'types': {
+            'Date(UTC)': TYPE_DATETIME,
+            'Amount': TYPE_FLOAT,
+            'TransactionFee': TYPE_FLOAT,
+        },
+        'records': RECORDS_DEPOSITS,
+        'timezone': 'UTC',
+        'match': MATCH_KNOWN,
+        'reader': True,
+        'writer': True,
+        'extension': '.xlsx',
+    },
+    'delta': {
+        'parser': 'deltaconv.parser.delta.DeltaParser',
+        'config': {
+            'delimiter': ',',
+        },
+        'reader': False,
+        'writer': True,
+    },
+    'binancecrawler-trades': {
+        'parser': 'deltaconv.parser.binance.BinanceCrawlerTradeParser',
+        'config': {
+            'delimiter': ';',
+        },
+        'header': [
+            'time', 'side', 'tradeId', 'qty', 'feeAsset', 'symbol', 'totalQuota', 'realPnl', 'quoteAsset',
+            'baseAsset', 'fee', 'price', 'activeBuy'
+        ],
+        'types': {
+            'time': TYPE_TIMESTAMP,
+            'tradeId': TYPE_FLOAT,
+            'qty': TYPE_FLOAT,
+            'totalQuota': TYPE_FLOAT,
+            'realPnl': TYPE_FLOAT,
+            'fee': TYPE_FLOAT,
+            'price': TYPE_FLOAT,
+        },
+        'timezone': 'UTC',
+        'match': MATCH_ALL,
+        'reader': True,
+        'writer': False,
+    },
+    'binancecrawler-deposit': {
+        'parser': 'deltaconv.parser.binance.BinanceCrawlerDepositParser',
+        'config': {
+            'delimiter': ';',
+        },
+        'header': [
+            'txId', 'coin', 'curConfirmTimes', 'status', 'id', 'confirmTimes', 'assetLabel', 'userId', 'address',
+            'transferAmount', 'txUrl', 'addressUrl', 'addressTag', 'insertTime', 'statusName'
+        ],
+        'types': {
+            'insertTime': TYPE_TIMESTAMP,
+            'transferAmount': TYPE_FLOAT,
+            'status': TYPE_FLOAT,
+            # only in files of withdrawals
+            'transactionFee': TYPE_FLOAT,
+        },
+        'records': RECORDS_DEPOSITS,
+        'timezone': 'UTC',
+        'match': MATCH_ALL,
+        'reader': True,
+        'writer': False,
+    },
+    'bitpanda': {
+        'parser': 'deltaconv.parser.bitpanda.BitpandaParser',
+        'config': {
+            'delimiter': ','
+        },
+        # the first line is a disclaimer and the second line is the title with the account email address
+        'header_row': 2,
+        'header': [
+            'ID', 'Created at', 'Type', 'In/Out', 'Fiat Currency', 'Amount Fiat', 'Cryptocoin', 'Amount Cryptocoin',
+            'Status'
+        ],
+        'types': {
+            'Created at': TYPE_DATETIME,
+            'Amount Fiat': TYPE_FLOAT,
+        },
+        'timezone': 'UTC',
+        'match': MATCH_KNOWN,
+        'reader': True,
+        'writer': False,
+    }
+}
+
+_plugins_loaded = False
+
+
+def register_format(
+    name,
+    parser,
+    delimiter=',',
+    header=None,
+    header_row=0,
+    match=MATCH_KNOWN,
+    reader=True,
+    writer=False,
+    types=None,
+    records=RECORDS_TRADES,
+    timezone='UTC',
+    extension=None
+):
+    """ Register a new format
+
+    Args:
+        name (str):             The name of the format, e.g. kraken
+        parser (str|type):      The parser class or its import path, e.g. tradingconv_kraken.parser.KrakenParser
+        delimiter (str):        The delimiter of csv files
+        header (list[str]):     The columns of the header. Without a header, the format is never detected.
+        header_row (int):       The index of the row containing the header
+        match (str):            MATCH_KNOWN or MATCH_ALL, see `matches`
+        reader (bool):          Whether the parser implements parse()
+        writer (bool):          Whether the parser implements export()
+        types (dict[str, str]): The types of the columns, e.g. {'Price': TYPE_FLOAT}, see `deltaconv.validate`
+        records (str):          The kind of records of the format; RECORDS_TRADES or RECORDS_DEPOSITS
+        timezone (str):         The time zone of the times in the files, e.g. Europe/Vienna, see
+                                `deltaconv.timezones.get_zone`
+        extension (str):        The extension the writer appends to the name of the output, e.g. .xlsx (optional)
+    """
+    PARSER[name] = {
+        'parser': parser,
+        'config': {
+            'delimiter': delimiter,
+        },
+        'header': header,
+        'header_row': header_row,
+        'match': match,
+        'reader': reader,
+        'writer': writer,
+        'types': types or {},
+        'records': records,
+        'timezone': timezone,
+        'extension': extension,
+    }
+
+
+def load_plugins():
+    """ Register the formats of all installed third-party packages
+
+    Only the modules of the entry points are imported, not the parsers.
+    """
+    global _plugins_loaded
+
+    if _plugins_loaded:
+        return
+
+    _plugins_loaded = True
+
+    from importlib import metadata
+
+    try:
+        entry_points = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # python < 3.10
+        entry_points = metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+
+    for entry_point in entry_points:
+        try:
+            spec = dict(entry_point.load())
+        except Exception as e:
+            logging.warning('Cannot load the format %s: %s', entry_point.name, e)
+            continue
+
+        if entry_point.name in PARSER:
+            logging.warning('The format %s is already registered - skip the plugin.', entry_point.name)
+            continue
+
+        register_format(
+            entry_point.name,
+            spec['parser'],
+            delimiter=spec.get('config', {}).get('delimiter', ','),
+            header=spec.get('header'),
+            header_row=spec.get('header_row', 0),
+            match=spec.get('match', MATCH_KNOWN),
+            reader=spec.get('reader', True),
+            writer=spec.get('writer', False),
+            types=spec.get('types'),
+            records=spec.get('records', RECORDS_TRADES),
+            timezone=spec.get('timezone', 'UTC'),
+            extension=spec.get('extension')
+        )
+
+
+def readers():
+    """ Get the names of all formats that can be parsed
+
+    Returns:
+        list[str]: The names of the formats
+    """
+    load_plugins()
+
+    return [name for name, choice in PARSER.items() if choice.get('reader', True)]
+
+
+def writers():
+    """ Get the names of all formats that can be exported
+
+    Returns:
+        list[str]: The names of the formats
+    """
+    load_plugins()
+
+    return [name for name, choice in PARSER.items() if choice.get('writer', True)]
+
+
+def load_parser(source_format):
+    """ Import the parser class of the given format
+
+    Args:
+        source_format: The format of the source file, e.g. binance.
+
+    Returns:
+        type: The parser class
+    """
+    load_plugins()
+
+    choice = PARSER[source_format]
+
+    if isinstance(choice['parser'], str):
+        module, name = choice['parser'].rsplit('.', 1)
+
+        # replace the path by the class to import it only once
+        choice['parser'] = getattr(importlib.import_module(module), name)
+
+    return choice['parser']
+
+
+def init_parser(source_format):
+    """ Initialize a Parser based on the given source format
+
+    Args:
+        source_format: The format of the source file, e.g. binance.
+    """
+
+    return load_parser(source_format)(**PARSER[source_format]['config'])
+
+
+def read_header(file, delimiter=',', header_row=0):
+    """ Read the header of the given file without reading the whole file
+
+    Args:
+        file (str):         The file to read (either xl(s)x or csv)
+        delimiter (str):    The delimiter of csv files
+        header_row (int):   The index of the row containing the header
+
+    Returns:
+        list[str]: The columns of the header or None if the file has no such row
+    """
+    if file.endswith('.xlsx'):
+        import xlrd
+
+        sheet = xlrd.open_workbook(file, on_demand=True).sheet_by_index(0)
+
+        if sheet.nrows <= header_row:
+            return None
+
+        return [str(c) for c in sheet.row_values(header_row)]
+
+    elif file.endswith('.csv'):
+        with open(file, 'r') as file_:
+            for idx, row in enumerate(csv.reader(file_, delimiter=delimiter)):
+                if idx == header_row:
+                    return row
+
+        return None
+
+    raise NotImplementedError('The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+
+
+def matches(header, choice):
+    """ Check whether the header of a file matches the declared header of a format
+
+    Args:
+        header (list[str]): The header of the file
+        choice (dict):      The entry of the format in `PARSER`
+
+    Returns:
+        bool: True, if the file may be of the format
+    """
+    if not header or not choice.get('header'):
+        return False
+
+    if choice.get('match', MATCH_KNOWN) == MATCH_ALL:
+        return set(choice['header']) <= set(header)
+
+    return set(header) <= set(choice['header'])
+
+
+def detect_formats(file):
+    """ Get the formats the given file may be of based on its header
+
+    Args:
+        file (str): The file to check
+
+    Returns:
+        list[str]: The names of the matching formats in the order of registration
+    """
+    result = []
+
+    # many formats share the delimiter and position of the header
+    headers = {}
+
+    for name in readers():
+        choice = PARSER[name]
+
+        key = (choice['config'].get('delimiter', ','), choice.get('header_row', 0))
+        if key not in headers:
+            headers[key] = read_header(file, *key)
+
+        if matches(headers[key], choice):
+            result.append(name)
+
+    return result
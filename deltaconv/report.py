@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Aggregates trades or deposits by period and keys, e.g. the traded volume and fees per pair and month.
+
+Each record is assigned the code of its group once, then the sums are accumulated in flat lists indexed by that code,
+so the cost per record is a dictionary lookup and a few additions. Fees are summed per fee currency, because they are
+paid in different coins.
+
+    report = aggregate(transactions, period=MONTHLY, keys=[KEY_PAIR, KEY_EXCHANGE])
+    export(report, 'monthly.csv')
+
+The command line interface is `tradingconv report`.
+"""
+import argparse
+import collections
+import csv
+import datetime
+import logging
+
+from deltaconv.holdings import DAILY, MONTHLY
+
+HOURLY = 'hourly'
+
+WEEKLY = 'weekly'
+
+YEARLY = 'yearly'
+
+PERIODS = [HOURLY, DAILY, WEEKLY, MONTHLY, YEARLY]
+
+KEY_PAIR = 'pair'
+
+KEY_CURRENCY = 'currency'
+
+KEY_EXCHANGE = 'exchange'
+
+KEY_TYPE = 'type'
+
+KEYS = [KEY_PAIR, KEY_CURRENCY, KEY_EXCHANGE, KEY_TYPE]
+
+# The sums of a group
+Aggregate = collections.namedtuple(
+    'Aggregate', ['period', 'key', 'count', 'base_amount', 'quote_amount', 'value', 'fees']
+)
+
+
+def _period_start(period):
+    """ Get a function mapping a time to the start of its period """
+    if period == HOURLY:
+        return lambda t: datetime.datetime(t.year, t.month, t.day, t.hour)
+
+    if period == DAILY:
+        return lambda t: datetime.datetime(t.year, t.month, t.day)
+
+    if period == WEEKLY:
+        # the weeks start on Monday
+        return lambda t: datetime.datetime(t.year, t.month, t.day) - datetime.timedelta(days=t.weekday())
+
+    if period == MONTHLY:
+        return lambda t: datetime.datetime(t.year, t.month, 1)
+
+    if period == YEARLY:
+        return lambda t: datetime.datetime(t.year, 1, 1)
+
+    raise ValueError('The period {} is not one of {}.'.format(period, ', '.join(PERIODS)))
+
+
+def _label(value):
+    """ Get the label of a key, e.g. ETH/BTC for a pair """
+    if isinstance(value, tuple):
+        return '/'.join(value)
+
+    return '' if value is None else value
+
+
+def aggregate(records, period=MONTHLY, keys=None):
+    """
+    Sum up the records of each period and combination of keys.
+
+    Args:
+        records (Iterable[CryptoTransaction|Deposit]):  The trades or deposits
+        period (str):                                   One of `PERIODS`
+        keys (list[str]):                               The keys to group by, see `KEYS`. Defaults to the pair.
+
+    Returns:
+        list[Aggregate]: The sums of each group in the order of the period and the keys. The key of an aggregate is a
+            tuple of the values of the keys, e.g. ('ETH/BTC', 'Binance').
+    """
+    keys = [KEY_PAIR] if keys is None else keys
+
+    unknown = set(keys) - set(KEYS)
+    if unknown:
+        raise ValueError('The keys {} are not in {}.'.format(', '.join(sorted(unknown)), ', '.join(KEYS)))
+
+    positions = [KEYS.index(k) for k in keys]
+    start_of = _period_start(period)
+
+    # the code of each group and the sums indexed by that code
+    codes = {}
+    groups = []
+    counts, base_amounts, quote_amounts, values = [], [], [], []
+    fees = []
+
+    for record in records:
+        pair = getattr(record, 'trading_pair', None)
+
+        if pair is not None:
+            quote, base = pair
+            fee, value = record.fee, record.value
+
+            time = record.datetime
+            fields = ((base.currency, quote.currency), base.currency, record.exchange, record.type.upper())
+            base_amount, quote_amount = base.amount, quote.amount
+            fee_amount, fee_currency = fee.amount, fee.currency
+            value = value.amount if value is not None else None
+        else:
+            fee = record.transactionfee
+
+            time = record.timestamp
+            fields = (None, record.currency, record.exchange, 'DEPOSIT')
+            base_amount, quote_amount = record.amount, 0.0
+            fee_amount, fee_currency = fee.amount, fee.currency or record.currency
+            value = None
+
+        group = (start_of(time), tuple([fields[p] for p in positions]))
+        code = codes.get(group)
+
+        if code is None:
+            code = codes[group] = len(groups)
+            groups.append(group)
+            counts.append(0)
+            base_amounts.append(0.0)
+            quote_amounts.append(0.0)
+            values.append(None)
+            fees.append({})
+
+        counts[code] += 1
+        base_amounts[code] += base_amount
+        quote_amounts[code] += quote_amount
+
+        if value is not None:
+            values[code] = (values[code] or 0.0) + value
+
+        if fee_amount:
+            fees_ = fees[code]
+            fees_[fee_currency] = fees_.get(fee_currency, 0.0) + fee_amount
+
+    order = sorted(range(len(groups)), key=lambda c: (groups[c][0], [_label(v) for v in groups[c][1]]))
+
+    return [
+        Aggregate(
+            period=groups[c][0],
+            key=tuple(_label(v) for v in groups[c][1]),
+            count=counts[c],
+            base_amount=base_amounts[c],
+            quote_amount=quote_amounts[c],
+            value=values[c],
+            fees=fees[c]
+        ) for c in order
+    ]
+
+
+def export(report, file, keys=None):
+    """
+    Write the report into a csv file with a column per fee currency.
+
+    Args:
+        report (list[Aggregate]):   The report
+        file (str):                 The path of the csv file
+        keys (list[str]):           The names of the keys the report is grouped by. Defaults to the pair.
+    """
+    keys = [KEY_PAIR] if keys is None else keys
+    fee_currencies = sorted({currency for a in report for currency in a.fees})
+
+    with open(file, 'w', newline='') as file_:
+        writer = csv.writer(file_)
+        writer.writerow(
+            ['Period'] + [k.capitalize() for k in keys] + ['Count', 'Base amount', 'Quote amount', 'Value'] +
+            ['Fee {}'.format(currency) for currency in fee_currencies]
+        )
+
+        for a in report:
+            writer.writerow(
+                [a.period.strftime('%Y-%m-%d %H:%M:%S')] + list(a.key) +
+                [a.count, '{:f}'.format(a.base_amount), '{:f}'.format(a.quote_amount),
+                 '' if a.value is None else '{:f}'.format(a.value)] +
+                ['{:f}'.format(a.fees.get(currency, 0.0)) for currency in fee_currencies]
+            )
+
+
+def parse_arguments(args=None):
+    """Parses the arguments of tradingconv report """
+    from deltaconv.converter import add_filter_arguments
+
+    arg_parser = argparse.ArgumentParser(
+        prog='tradingconv report',
+        description='Sums up the traded amounts, fees and number of trades or deposits by period and keys.'
+    )
+
+    arg_parser.add_argument('--file', help='The file of trades or deposits in any supported format.')
+
+    arg_parser.add_argument('--store', help='Report the trades of this SQLite database instead of a file.')
+
+    arg_parser.add_argument('--output', help='The csv file of the report.', required=True)
+
+    arg_parser.add_argument(
+        '--period', help='The period of each row. Default: %(default)s', choices=PERIODS, default=MONTHLY
+    )
+
+    arg_parser.add_argument(
+        '--by', help='The keys to group by. Default: %(default)s', choices=KEYS, nargs='+', default=[KEY_PAIR]
+    )
+
+    add_filter_arguments(arg_parser)
+
+    arguments = arg_parser.parse_args(args)
+
+    if not arguments.file and not arguments.store:
+        arg_parser.error('the following arguments are required: --file or --store')
+
+    return arguments
+
+
+def main(args=None):
+    """
+    Entry point of tradingconv report
+
+    Args:
+        args (list[str]): The command line arguments. Defaults to the ones of the process.
+
+    Returns:
+        int: The exit code
+    """
+    from deltaconv.converter import _parse_file, where_from_arguments
+
+    arguments = parse_arguments(args)
+    where = where_from_arguments(arguments)
+
+    if arguments.file:
+        records = _parse_file(arguments.file, where)
+
+        if records is None:
+            logging.error('The format of %s is currently not supported.', arguments.file)
+
+            return 1
+    else:
+        from deltaconv.store import TransactionStore
+
+        records = TransactionStore(arguments.store).trades(where)
+
+    report = aggregate(records, period=arguments.period, keys=arguments.by)
+
+    if not report:
+        logging.error('There are no transactions to report.')
+
+        return 1
+
+    export(report, arguments.output, keys=arguments.by)
+
+    logging.info('Wrote %d rows of %d transactions to %s.', len(report), sum(a.count for a in report),
+                 arguments.output)
+
+    return 0
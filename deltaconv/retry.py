@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+import logging
+import random
+import threading
+
+
+class ThrottledError(RuntimeError):
+    """ Raise this exception if Binance asks us to slow down, e.g. with HTTP 429 or 418.
+
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+
+        self.retry_after = retry_after
+
+
+class RetryError(RuntimeError):
+    """ Raise this exception if a query still fails after all retries.
+
+    """
+    pass
+
+
+class ResponseError(RuntimeError):
+    """ Raise this exception if Binance answers without records, e.g. because the session expired. Retrying such a
+    query does not help.
+
+    """
+    pass
+
+
+class RetryPolicy(object):
+    """
+    Exponential backoff with full jitter.
+
+    The delay of the n-th retry is drawn uniformly from [0, min(max_delay, base_delay * 2^n)]. If Binance sends a
+    `Retry-After` header, we never wait less than requested.
+    """
+
+    # The response headers Binance uses to report the request weight used in the current minute
+    WEIGHT_HEADERS = ['X-MBX-USED-WEIGHT-1M', 'X-MBX-USED-WEIGHT']
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=60.0, weight_limit=1200, weight_threshold=0.9):
+        """
+
+        Args:
+            max_retries (int):          The number of retries before a query is given up
+            base_delay (float):         The delay of the first retry in seconds
+            max_delay (float):          The upper bound of the delay in seconds
+            weight_limit (int):         The request weight Binance allows per minute
+            weight_threshold (float):   The fraction of `weight_limit` at which we start to throttle ourselves
+        """
+        super().__init__()
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.weight_limit = weight_limit
+        self.weight_threshold = weight_threshold
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Get the time to wait before the given retry.
+
+        Args:
+            attempt (int):          The number of the retry starting at 0
+            retry_after (float):    The delay requested by Binance in seconds (optional)
+
+        Returns:
+            float: The delay in seconds
+
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    @staticmethod
+    def retry_after(headers):
+        """
+        Get the value of the `Retry-After` header.
+
+        Args:
+            headers (dict): The response headers
+
+        Returns:
+            float: The delay in seconds or None if the header is missing or not given in seconds.
+
+        """
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def overweight(self, headers):
+        """
+        Check whether the used request weight reported by Binance is close to the limit.
+
+        Args:
+            headers (dict): The response headers
+
+        Returns:
+            bool: True, if we should slow down.
+
+        """
+        for name in self.WEIGHT_HEADERS:
+            try:
+                weight = int(headers.get(name))
+            except (TypeError, ValueError):
+                continue
+
+            return weight >= self.weight_limit * self.weight_threshold
+
+        return False
+
+
+class AdaptiveLimiter(object):
+    """
+    Limits the number of concurrent queries.
+
+    The limit is halved whenever throttling is detected and increased by one after `recovery` successful queries in
+    a row, but never exceeds the initial limit.
+    """
+
+    def __init__(self, limit, recovery=10):
+        """
+
+        Args:
+            limit (int):    The maximum number of concurrent queries
+            recovery (int): The number of successful queries before the limit is increased again
+        """
+        super().__init__()
+
+        self._max_limit = max(1, limit)
+        self._limit = self._max_limit
+        self._recovery = recovery
+
+        self._active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """
+        The current number of allowed concurrent queries.
+
+        Returns:
+            int: The current limit
+
+        """
+        return self._limit
+
+    @property
+    def max_limit(self):
+        """
+        The initial number of allowed concurrent queries.
+
+        Returns:
+            int: The initial limit
+
+        """
+        return self._max_limit
+
+    def __enter__(self):
+        with self._condition:
+            while self._active >= self._limit:
+                self._condition.wait()
+
+            self._active += 1
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def throttle(self):
+        """ Halve the limit since Binance asked us to slow down. """
+        with self._condition:
+            self._successes = 0
+
+            if self._limit > 1:
+                self._limit = max(1, self._limit // 2)
+
+                logging.warning('Throttling detected - reduce the number of concurrent queries to %d', self._limit)
+
+    def success(self):
+        """ Record a successful query and slowly increase the limit again. """
+        with self._condition:
+            self._successes += 1
+
+            if self._successes >= self._recovery and self._limit < self._max_limit:
+                self._successes = 0
+                self._limit += 1
+                self._condition.notify_all()
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+A SQLite database of trades, deposits and withdrawals.
+
+Each record is identified by a natural ID: the trade id of the exchange or the transaction id of a deposit or withdrawal
+if the source has one, otherwise its content and the number of identical records before it in the same batch, e.g.
+partial fills in the same second. Adding the same file or crawling the same interval twice thus does not duplicate any
+record. Queries stream the records in the order of their time, so their result can be passed to any exporter.
+
+    store = TransactionStore('history.db')
+    store.add(parser.parse('binance_trades.csv'))
+
+    parser.export(list(store.trades(Where(start=datetime.datetime(2019, 1, 1)))), 'delta_2019.csv')
+"""
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+from deltaconv.transaction import CryptoTransaction, Deposit, Fee, Position, Withdrawal
+
+_TRADE_COLUMNS = [
+    'id', 'datetime', 'exchange', 'type', 'base_currency', 'base_amount', 'quote_currency', 'quote_amount', 'price',
+    'fee_amount', 'fee_currency', 'value_amount', 'value_currency', 'trade_id'
+]
+
+_DEPOSIT_COLUMNS = [
+    'id', 'datetime', 'exchange', 'currency', 'amount', 'fee_amount', 'fee_currency', 'address', 'txid', 'status',
+    'kind'
+]
+
+# The kind of the records in the deposits table
+KIND_DEPOSIT = 'deposit'
+
+KIND_WITHDRAWAL = 'withdrawal'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    datetime TEXT NOT NULL,
+    exchange TEXT,
+    type TEXT,
+    base_currency TEXT,
+    base_amount REAL,
+    quote_currency TEXT,
+    quote_amount REAL,
+    price REAL,
+    fee_amount REAL,
+    fee_currency TEXT,
+    value_amount REAL,
+    value_currency TEXT,
+    trade_id TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_datetime ON trades (datetime);
+CREATE INDEX IF NOT EXISTS trades_exchange_base ON trades (exchange, base_currency);
+CREATE INDEX IF NOT EXISTS trades_exchange_quote ON trades (exchange, quote_currency);
+
+CREATE TABLE IF NOT EXISTS deposits (
+    id TEXT PRIMARY KEY,
+    datetime TEXT NOT NULL,
+    exchange TEXT,
+    currency TEXT,
+    amount REAL,
+    fee_amount REAL,
+    fee_currency TEXT,
+    address TEXT,
+    txid TEXT,
+    status,
+    kind TEXT NOT NULL DEFAULT 'deposit'
+);
+CREATE INDEX IF NOT EXISTS deposits_datetime ON deposits (datetime);
+CREATE INDEX IF NOT EXISTS deposits_exchange_currency ON deposits (exchange, currency);
+CREATE INDEX IF NOT EXISTS deposits_txid ON deposits (txid);
+"""
+
+# The columns added to the tables of databases created before, see `TransactionStore._migrate`
+_MIGRATIONS = [
+    ('trades', 'trade_id', 'TEXT'),
+    ('deposits', 'kind', "TEXT NOT NULL DEFAULT 'deposit'"),
+]
+
+
+def _upsert(table, columns):
+    # unchanged records are not updated, so they are not counted as changes
+    return 'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE SET {} WHERE {}'.format(
+        table, ', '.join(columns), ', '.join('?' * len(columns)),
+        ', '.join('{0} = excluded.{0}'.format(c) for c in columns[1:]),
+        ' OR '.join('{0} IS NOT excluded.{0}'.format(c) for c in columns[1:])
+    )
+
+
+def _iso(value):
+    """ Convert a datetime into text sorting like the time """
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ', timespec='microseconds')
+
+    return str(value)
+
+
+def _natural_id(*values):
+    return hashlib.sha1('|'.join(str(v) for v in values).encode('utf-8')).hexdigest()
+
+
+def _content_id(occurrences, *values):
+    """ Get the id of a record without an id of its source based on its content and the number of identical records
+    counted in `occurrences` before """
+    content_id = _natural_id(*values)
+    count = occurrences.get(content_id, 0)
+    occurrences[content_id] = count + 1
+
+    # the first occurrence is identified by its content alone
+    return _natural_id(content_id, count) if count else content_id
+
+
+def _trade_row(t, occurrences):
+    quote, base = t.trading_pair
+    time = _iso(t.datetime)
+
+    if t.trade_id:
+        natural_id = _natural_id('trade', t.exchange, t.trade_id)
+    else:
+        natural_id = _content_id(
+            occurrences, 'trade', t.exchange, time, str(t.type).upper(), base.currency, base.amount, quote.currency,
+            quote.amount
+        )
+
+    return (
+        natural_id,
+        time, t.exchange, t.type, base.currency, base.amount, quote.currency, quote.amount, t.price, t.fee.amount,
+        t.fee.currency, t.value.amount if t.value else None, t.value.currency if t.value else None, t.trade_id
+    )
+
+
+def _deposit_row(d, occurrences):
+    time = _iso(d.timestamp)
+    kind = KIND_WITHDRAWAL if isinstance(d, Withdrawal) else KIND_DEPOSIT
+
+    # the transaction id identifies a deposit unless it is missing, e.g. for internal transfers. A withdrawal and the
+    # deposit it resulted in share the transaction id if both are kept at the same exchange.
+    if d.txid:
+        natural_id = _natural_id(kind, d.exchange, d.currency, d.txid)
+    else:
+        natural_id = _content_id(occurrences, kind, d.exchange, d.currency, time, d.amount, d.address)
+
+    return (
+        natural_id, time, d.exchange, d.currency, d.amount, d.transactionfee.amount, d.transactionfee.currency,
+        d.address, d.txid, d._status, kind
+    )
+
+
+class _Writer(object):
+    """ Collects records and writes them in batches """
+
+    def __init__(self, store):
+        super().__init__()
+
+        self._store = store
+        self._pending = []
+
+        # the number of records of each content written so far
+        self._occurrences = {}
+
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def add(self, record):
+        self._pending.append(record)
+
+        if len(self._pending) >= self._store.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.count += self._store._write(self._pending, self._occurrences)
+            self._pending = []
+
+
+class TransactionStore(object):
+    """
+    Persists `CryptoTransaction`s, `Deposit`s and `Withdrawal`s in a SQLite database.
+
+    The store can be shared by threads - each thread uses its own connection.
+    """
+
+    def __init__(self, path, batch_size=10000):
+        """
+
+        Args:
+            path (str):         The path of the database. Will be created if it does not exist.
+            batch_size (int):   The number of records written in a single database transaction
+        """
+        super().__init__()
+
+        self.path = path
+        self.batch_size = batch_size
+
+        self._local = threading.local()
+
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+            self._migrate(connection)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=60)
+
+            # concurrent readers do not block the writer
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+
+        return connection
+
+    @staticmethod
+    def _migrate(connection):
+        """ Add the columns missing in a database created before they were introduced """
+        for table, column, definition in _MIGRATIONS:
+            columns = [row[1] for row in connection.execute('PRAGMA table_info({})'.format(table))]
+
+            if column not in columns:
+                connection.execute('ALTER TABLE {} ADD COLUMN {} {}'.format(table, column, definition))
+
+    def close(self):
+        """ Close the connection of the calling thread """
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _write(self, records, occurrences):
+        """ Write the records and get the number of inserted or changed rows """
+        trades = [_trade_row(r, occurrences) for r in records if isinstance(r, CryptoTransaction)]
+        deposits = [_deposit_row(r, occurrences) for r in records if isinstance(r, Deposit)]
+
+        with self._connection() as connection:
+            changes = connection.total_changes
+
+            if trades:
+                connection.executemany(_upsert('trades', _TRADE_COLUMNS), trades)
+
+            if deposits:
+                connection.executemany(_upsert('deposits', _DEPOSIT_COLUMNS), deposits)
+
+        return connection.total_changes - changes
+
+    def writer(self):
+        """
+        Get a writer collecting records into batches, e.g. while they are crawled
+
+            with store.writer() as writer:
+                for transaction in transactions:
+                    writer.add(transaction)
+
+        Returns:
+            The writer. All remaining records are written when the context is left.
+        """
+        return _Writer(self)
+
+    def add(self, records):
+        """
+        Insert or update the given trades, deposits and withdrawals.
+
+        Args:
+            records (Iterable[CryptoTransaction|Deposit|Withdrawal]): The records
+
+        Returns:
+            int: The number of inserted or changed records
+        """
+        with self.writer() as writer:
+            for record in records:
+                writer.add(record)
+
+        return writer.count
+
+    def _select(self, table, columns, where, exchange, currency_columns, types, kind=None):
+        """ Stream the rows of the table matching the filter in the order of their time """
+        conditions = []
+        parameters = []
+
+        if kind:
+            conditions.append('kind = ?')
+            parameters.append(kind)
+
+        if where is not None and where.start:
+            conditions.append('datetime >= ?')
+            parameters.append(_iso(where.start))
+
+        if where is not None and where.end:
+            conditions.append('datetime < ?')
+            parameters.append(_iso(where.end))
+
+        if exchange:
+            conditions.append('exchange = ?')
+            parameters.append(exchange)
+
+        if where is not None and where.currencies:
+            currencies = list(where.currencies)
+            placeholders = ', '.join('?' * len(currencies))
+
+            conditions.append(
+                '(' + ' OR '.join('UPPER({}) IN ({})'.format(c, placeholders) for c in currency_columns) + ')'
+            )
+            parameters.extend(currencies * len(currency_columns))
+
+        if types and where is not None and where.types:
+            conditions.append('UPPER(type) IN ({})'.format(', '.join('?' * len(where.types))))
+            parameters.extend(where.types)
+
+        query = 'SELECT {} FROM {}'.format(', '.join(columns), table)
+
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+
+        cursor = self._connection().execute(query + ' ORDER BY datetime', parameters)
+
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+
+            if not rows:
+                return
+
+            yield from rows
+
+    def trades(self, where=None, exchange=None):
+        """
+        Get the trades in the order of their time.
+
+        Args:
+            where (Where):  Only get the trades matching the filter (optional)
+            exchange (str): Only get the trades of this exchange, e.g. Binance (optional)
+
+        Yields:
+            CryptoTransaction: The trades
+        """
+        for row in self._select(
+            'trades', _TRADE_COLUMNS, where, exchange, ['base_currency', 'quote_currency'], True
+        ):
+            (_, time, exchange_, type_, base_currency, base_amount, quote_currency, quote_amount, price, fee_amount,
+             fee_currency, value_amount, value_currency, trade_id) = row
+
+            t = CryptoTransaction(
+                exchange=exchange_,
+                trade_id=trade_id,
+                datetime=datetime.datetime.fromisoformat(time),
+                trading_pair=(
+                    Position(amount=quote_amount, currency=quote_currency),
+                    Position(amount=base_amount, currency=base_currency)
+                ),
+                trading_type=type_,
+                price=price,
+                fee=Fee(fee_amount, fee_currency)
+            )
+
+            if value_currency is not None:
+                t.value = Position(amount=value_amount, currency=value_currency)
+
+            yield t
+
+    def deposits(self, where=None, exchange=None):
+        """
+        Get the deposits in the order of their time.
+
+        Args:
+            where (Where):  Only get the deposits matching the filter (optional)
+            exchange (str): Only get the deposits of this exchange, e.g. Binance (optional)
+
+        Yields:
+            Deposit: The deposits
+        """
+        return self._deposits(Deposit, KIND_DEPOSIT, where, exchange)
+
+    def withdrawals(self, where=None, exchange=None):
+        """
+        Get the withdrawals in the order of their time.
+
+        Args:
+            where (Where):  Only get the withdrawals matching the filter (optional)
+            exchange (str): Only get the withdrawals of this exchange, e.g. Binance (optional)
+
+        Yields:
+            Withdrawal: The withdrawals
+        """
+        return self._deposits(Withdrawal, KIND_WITHDRAWAL, where, exchange)
+
+    def _deposits(self, cls, kind, where, exchange):
+        for row in self._select('deposits', _DEPOSIT_COLUMNS, where, exchange, ['currency'], False, kind):
+            _, time, exchange_, currency, amount, fee_amount, fee_currency, address, txid, status, _ = row
+
+            yield cls(
+                timestamp=datetime.datetime.fromisoformat(time),
+                address=address,
+                txid=txid,
+                exchange=exchange_,
+                coin=currency,
+                amount=amount,
+                fee=Fee(amount=fee_amount, currency=fee_currency),
+                status=status
+            )
+
+    def count(self):
+        """
+        Get the number of stored records
+
+        Returns:
+            tuple[int, int]: The number of trades and deposits including withdrawals
+        """
+        connection = self._connection()
+
+        return (
+            connection.execute('SELECT COUNT(*) FROM trades').fetchone()[0],
+            connection.execute('SELECT COUNT(*) FROM deposits').fetchone()[0]
+        )
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Generates synthetic files of the supported formats, e.g. for benchmarks.
+
+The rows are written while they are generated, so files with millions of rows can be created with constant memory.
+The same seed always produces the same file.
+
+    python -m deltaconv.synthetic --format binance-trades --rows 1000000 --output trades.csv
+"""
+import argparse
+import csv
+import datetime
+import logging
+import os
+import random
+import sys
+
+from deltaconv.registry import PARSER, load_parser
+
+# The start of the synthetic history
+EPOCH = datetime.datetime(2018, 1, 1)
+
+# The maximum number of rows of a sheet written by xlwt
+XLSX_MAX_ROWS = 65535
+
+# The traded markets with their initial price
+_MARKETS = [('ETH', 'BTC', 0.08), ('BNB', 'BTC', 0.0015), ('ADA', 'ETH', 0.0004), ('BTC', 'USDT', 13000.0)]
+
+_COINS = ['BTC', 'ETH', 'BNB', 'ADA']
+
+_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _History(object):
+    """ A random walk of the times and prices of trades """
+
+    def __init__(self, seed, interval):
+        super().__init__()
+
+        self._random = random.Random(seed)
+        self._interval = interval
+        self._time = EPOCH
+        self._prices = [price for _, _, price in _MARKETS]
+
+    def next_time(self):
+        # exponentially distributed gaps like independent orders
+        self._time += datetime.timedelta(seconds=self._random.expovariate(1 / self._interval))
+
+        return self._time
+
+    def next_trade(self):
+        """
+        Get the next trade
+
+        Returns:
+            tuple: The time, base, quote, side, price, amount and fee
+        """
+        idx = self._random.randrange(len(_MARKETS))
+        base, quote, _ = _MARKETS[idx]
+
+        self._prices[idx] *= 1 + self._random.gauss(0, 0.002)
+
+        price = round(self._prices[idx], 8)
+        amount = round(self._random.lognormvariate(0, 1.5), 8)
+        fee = round(amount * price * 0.001, 8)
+
+        return self.next_time(), base, quote, self._random.choice(['BUY', 'SELL']), price, amount, fee
+
+    def choice(self, values):
+        return self._random.choice(values)
+
+    def random(self):
+        return self._random.random()
+
+    def hex(self, digits):
+        return '{:0{}x}'.format(self._random.getrandbits(digits * 4), digits)
+
+
+def _milliseconds(value):
+    return int((value - datetime.datetime(1970, 1, 1)).total_seconds() * 1E3)
+
+
+def _binance_trades(history):
+    while True:
+        time, base, quote, side, price, amount, fee = history.next_trade()
+
+        yield [
+            time.strftime(_DATETIME_FORMAT), base + quote, side, price, amount, round(price * amount, 8), fee, 'BNB'
+        ]
+
+
+def _binance_deposits(history):
+    while True:
+        coin = history.choice(_COINS)
+
+        yield [
+            history.next_time().strftime(_DATETIME_FORMAT), coin, round(history.random() * 10, 8), 0,
+            '0x' + history.hex(40), '0x' + history.hex(64), '', '', 'Completed'
+        ]
+
+
+def _crawler_trades(history):
+    trade_id = 0
+
+    while True:
+        time, base, quote, side, price, amount, fee = history.next_trade()
+        trade_id += 1
+
+        yield [
+            _milliseconds(time), side, trade_id, amount, 'BNB', base + quote, round(price * amount, 8), 0, quote, base,
+            fee, price, side == 'BUY'
+        ]
+
+
+def _crawler_deposits(history):
+    deposit_id = 0
+
+    while True:
+        coin = history.choice(_COINS)
+        deposit_id += 1
+
+        yield [
+            '0x' + history.hex(64), coin, 12, 1, deposit_id, '12/12', coin, 1, '0x' + history.hex(40),
+            round(history.random() * 10, 8), '', '', '', _milliseconds(history.next_time()), 'Completed'
+        ]
+
+
+def _bitpanda(history):
+    transaction_id = 0
+
+    while True:
+        time, base, _, side, price, amount, _ = history.next_trade()
+        transaction_id += 1
+
+        # every tenth transaction is a transfer of fiat
+        if history.random() < 0.1:
+            kind = history.choice(['deposit', 'withdrawal'])
+
+            yield [
+                'T' + history.hex(12), time.strftime(_DATETIME_FORMAT), kind, 'incoming' if kind == 'deposit'
+                else 'outgoing', 'EUR', round(history.random() * 1000, 2), '', '', 'finished'
+            ]
+            continue
+
+        # bitpanda sells coins for euros
+        fiat = round(amount * price * 10, 2) or 0.01
+
+        yield [
+            'T' + history.hex(12), time.strftime(_DATETIME_FORMAT), side.lower(), 'incoming' if side == 'BUY'
+            else 'outgoing', 'EUR', fiat, base, amount, 'finished'
+        ]
+
+
+def _delta(history):
+    while True:
+        time, base, quote, side, price, amount, fee = history.next_trade()
+
+        yield [
+            time.strftime(_DATETIME_FORMAT), side, 'Binance', amount, base, round(price * amount, 8), quote, fee, 'BNB',
+            '', '', 1, '', '', ''
+        ]
+
+
+# The generators of the rows of each format
+GENERATORS = {
+    'binance-trades': _binance_trades,
+    'binance-deposit': _binance_deposits,
+    'binancecrawler-trades': _crawler_trades,
+    'binancecrawler-deposit': _crawler_deposits,
+    'bitpanda': _bitpanda,
+    'delta': _delta,
+}
+
+
+def _preamble(format_name):
+    """ Get the rows in front of the header of the given format """
+    if format_name == 'bitpanda':
+        return [
+            ['Disclaimer: All data is without guarantee, errors and changes are reserved.'],
+            ['Account: synthetic@example.com'],
+        ]
+
+    return [[] for _ in range(PARSER[format_name].get('header_row', 0))]
+
+
+def generate(format_name, file, rows, seed=0, interval=600.0):
+    """
+    Write a synthetic file of the given format.
+
+    Args:
+        format_name (str):  The format, see `GENERATORS`
+        file (str):         The file to write (either xlsx or csv)
+        rows (int):         The number of rows without the header
+        seed (int):         The seed of the random values
+        interval (float):   The mean time between two rows in seconds
+
+    Returns:
+        str: The path of the file
+    """
+    header = list(load_parser(format_name)._COLUMNS)
+    preamble = _preamble(format_name)
+    content = GENERATORS[format_name](_History(seed, interval))
+
+    if file.endswith('.xlsx'):
+        if rows + len(preamble) + 1 > XLSX_MAX_ROWS:
+            raise ValueError('An xlsx file has at most {} rows.'.format(XLSX_MAX_ROWS))
+
+        import xlwt
+
+        wb = xlwt.Workbook()
+        sheet = wb.add_sheet('sheet1')
+
+        for r, row in enumerate(preamble + [header]):
+            for c, value in enumerate(row):
+                sheet.write(r, c, value)
+
+        for r in range(len(preamble) + 1, len(preamble) + 1 + rows):
+            for c, value in enumerate(next(content)):
+                sheet.write(r, c, value)
+
+        wb.save(file)
+
+    elif file.endswith('.csv'):
+        with open(file, 'w', newline='') as file_:
+            writer = csv.writer(file_, delimiter=PARSER[format_name]['config'].get('delimiter', ','))
+
+            writer.writerows(preamble)
+            writer.writerow(header)
+
+            for _ in range(rows):
+                writer.writerow(next(content))
+    else:
+        raise NotImplementedError('The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+
+    return file
+
+
+def parse_arguments():
+    """Parses the arguments the user passed to this script """
+
+    arg_parser = argparse.ArgumentParser(description='Generate synthetic files of the supported formats.')
+
+    arg_parser.add_argument('--format', help='The format of the file.', required=True, choices=list(GENERATORS))
+    arg_parser.add_argument('--rows', help='The number of rows.', type=int, default=10000)
+    arg_parser.add_argument('--output', help='The file to write (either csv or xlsx).', required=True)
+    arg_parser.add_argument('--seed', help='The seed of the random values.', type=int, default=0)
+    arg_parser.add_argument(
+        '--interval', help='The mean time between two rows in seconds.', type=float, default=600.0
+    )
+
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', stream=sys.stdout)
+
+    generate(args.format, args.output, args.rows, seed=args.seed, interval=args.interval)
+
+    logging.info('Wrote %d %s rows to %s', args.rows, args.format, args.output)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Converts the times of transactions between UTC and other time zones.
+
+Transactions hold naive datetimes in UTC. The time zone of the times in a file is registered with its format, see
+`deltaconv.registry`, so they can be converted into UTC after parsing. Exporters format the times as ISO 8601 strings
+with the offset of a target zone, e.g. 2019-03-31T03:00:00+02:00.
+
+The offset of a zone only changes at a few transitions a year, so a `ZoneConverter` caches the transitions of each year
+and converts a column of times with a comparison per value instead of a time zone calculation.
+
+    converter = ZoneConverter(get_zone('Europe/Berlin'))
+    converter.isoformat([t.datetime for t in transactions])
+"""
+import bisect
+import datetime
+import re
+
+UTC = 'UTC'
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+_HOUR = datetime.timedelta(hours=1)
+
+_OFFSET = re.compile(r'^(?:UTC)?([+-])(\d{1,2}):?(\d{2})?$')
+
+
+class TimezoneError(LookupError):
+    """ Raise this exception if a time zone is unknown. """
+    pass
+
+
+def get_zone(name):
+    """
+    Get a time zone by its name.
+
+    Args:
+        name (str): UTC, a fixed offset, e.g. +02:00, or the name of a zone of the IANA database, e.g. Europe/Berlin
+
+    Returns:
+        datetime.tzinfo: The time zone
+
+    Raises:
+        TimezoneError: If the zone is unknown
+    """
+    if name is None or name.upper() in (UTC, 'Z', 'GMT'):
+        return datetime.timezone.utc
+
+    match = _OFFSET.match(name.strip())
+
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes or 0))
+
+        return datetime.timezone(-offset if sign == '-' else offset)
+
+    try:
+        import zoneinfo
+    except ImportError:
+        raise TimezoneError('The time zone {} requires Python 3.9 or newer - use a fixed offset, e.g. +01:00.'.format(
+            name
+        ))
+
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise TimezoneError('The time zone {} is unknown.'.format(name))
+
+
+def from_milliseconds(value):
+    """
+    Convert a timestamp in milliseconds, e.g. of Binance, into a naive UTC datetime
+
+    Args:
+        value (float): The milliseconds since the epoch
+
+    Returns:
+        datetime.datetime: The datetime
+    """
+    return _EPOCH + datetime.timedelta(milliseconds=value)
+
+
+def _suffix(offset):
+    """ Format an offset as in ISO 8601, e.g. +02:00 """
+    minutes = int(offset.total_seconds()) // 60
+    sign = '-' if minutes < 0 else '+'
+
+    return '{}{:02d}:{:02d}'.format(sign, abs(minutes) // 60, abs(minutes) % 60)
+
+
+class ZoneConverter(object):
+    """
+    Converts columns of naive datetimes between UTC and a time zone.
+    """
+
+    def __init__(self, zone=None):
+        """
+
+        Args:
+            zone (datetime.tzinfo): The time zone. Defaults to UTC.
+        """
+        super().__init__()
+
+        self.zone = zone or datetime.timezone.utc
+
+        # zones with a fixed offset do not have any transitions
+        self._fixed = self.zone.utcoffset(None) if isinstance(self.zone, datetime.timezone) else None
+
+        # the times in UTC at which the offset changes and the offsets from then on of each year
+        self._transitions = {}
+
+        # the offset of each hour in local time
+        self._local_offsets = {}
+
+    @property
+    def is_utc(self):
+        return self._fixed == datetime.timedelta(0)
+
+    def _utcoffset(self, value):
+        return value.replace(tzinfo=datetime.timezone.utc).astimezone(self.zone).utcoffset()
+
+    def _segment(self, value):
+        """
+        Get the period of constant offset containing a time
+
+        Args:
+            value (datetime.datetime): The naive time in UTC
+
+        Returns:
+            tuple[datetime.datetime, datetime.datetime, datetime.timedelta]: The start (inclusive) and end (exclusive)
+                of the period in UTC and its offset
+        """
+        if self._fixed is not None:
+            return datetime.datetime.min, datetime.datetime.max, self._fixed
+
+        year = value.year
+
+        if year not in self._transitions:
+            # the transitions are found by checking each hour and then searching the minute within the hour
+            start, end = datetime.datetime(year, 1, 1), datetime.datetime(year + 1, 1, 1)
+            times, offsets = [start], [self._utcoffset(start)]
+
+            hour = start + _HOUR
+            while hour < end:
+                offset = self._utcoffset(hour)
+
+                if offset != offsets[-1]:
+                    lo, hi = 0, 60
+
+                    while lo < hi:
+                        middle = (lo + hi) // 2
+
+                        if self._utcoffset(hour - _HOUR + datetime.timedelta(minutes=middle)) == offset:
+                            hi = middle
+                        else:
+                            lo = middle + 1
+
+                    times.append(hour - _HOUR + datetime.timedelta(minutes=lo))
+                    offsets.append(offset)
+
+                hour += _HOUR
+
+            times.append(end)
+            self._transitions[year] = (times, offsets)
+
+        times, offsets = self._transitions[year]
+        idx = bisect.bisect_right(times, value) - 1
+
+        return times[idx], times[idx + 1], offsets[idx]
+
+    def offset(self, value):
+        """
+        Get the offset of the zone at a time
+
+        Args:
+            value (datetime.datetime): The naive time in UTC
+
+        Returns:
+            datetime.timedelta: The offset, e.g. one hour for Europe/Berlin in winter
+        """
+        return self._segment(value)[2]
+
+    def to_local(self, values):
+        """
+        Convert naive UTC times into naive local times of the zone
+
+        Args:
+            values (list[datetime.datetime]): The times in UTC
+
+        Returns:
+            list[datetime.datetime]: The local times
+        """
+        if self.is_utc:
+            return list(values)
+
+        start = end = offset = None
+        result = []
+
+        for value in values:
+            if start is None or not start <= value < end:
+                start, end, offset = self._segment(value)
+
+            result.append(value + offset)
+
+        return result
+
+    def to_utc(self, values):
+        """
+        Convert naive local times of the zone into naive UTC times. Ambiguous times, i.e. the hour repeated at the end
+        of the daylight saving time, are taken as the first one.
+
+        Args:
+            values (list[datetime.datetime]): The local times
+
+        Returns:
+            list[datetime.datetime]: The times in UTC
+        """
+        if self._fixed is not None:
+            return [value - self._fixed for value in values]
+
+        result = []
+
+        for value in values:
+            hour = value.replace(minute=0, second=0, microsecond=0)
+            offset = self._local_offsets.get(hour)
+
+            if offset is None:
+                offset = self._local_offsets[hour] = hour.replace(tzinfo=self.zone).utcoffset()
+
+            result.append(value - offset)
+
+        return result
+
+    def isoformat(self, values, timespec='auto'):
+        """
+        Format naive UTC times as ISO 8601 strings in the zone, e.g. 2019-03-31T03:00:00+02:00
+
+        Args:
+            values (list[datetime.datetime]):   The times in UTC
+            timespec (str):                     The precision, see `datetime.datetime.isoformat`
+
+        Returns:
+            list[str]: The formatted times
+        """
+        start = end = offset = suffix = None
+        result = []
+
+        for value in values:
+            # the values are usually sorted, so the period of the previous value is checked first
+            if start is None or not start <= value < end:
+                start, end, offset = self._segment(value)
+                suffix = _suffix(offset)
+
+            result.append((value + offset).isoformat(timespec=timespec) + suffix)
+
+        return result
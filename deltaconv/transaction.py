@@ -12,7 +12,6 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU General Public License for more details.
 import json
-import urllib.request
 
 
 class Currency(object):
@@ -84,6 +83,7 @@ class CryptoList(list):
     _COINTMARKETCAP_QUERY_LISTING = 'https://api.coinmarketcap.com/v2/listings/'
 
     def __query_coinmarketcap(self):
+        import urllib.request
 
         with urllib.request.urlopen(self._COINTMARKETCAP_QUERY_LISTING) as response:
             data = json.loads(response.read().decode())
@@ -166,6 +166,10 @@ class Transaction(object):
         """
         return self.__datetime
 
+    @datetime.setter
+    def datetime(self, value):
+        self.__datetime = value
+
     @property
     def trading_pair(self):
         """
@@ -209,6 +213,11 @@ class Transaction(object):
         """
         return self.__fee
 
+    @fee.setter
+    def fee(self, fee):
+        assert isinstance(fee, Fee), 'The fee has to be of type Fee.'
+        self.__fee = fee
+
     def __init__(self, datetime, trading_pair, trading_type, price, fee):
         """
 
@@ -230,6 +239,23 @@ class Transaction(object):
         assert isinstance(fee, Fee), 'The fee has to be of type Fee.'
         self.__fee = fee
 
+        self.__value = None
+
+    @property
+    def value(self):
+        """
+        The value of the transaction in a fiat currency, e.g. set by `deltaconv.prices.PriceStore.enrich`
+
+        Returns:
+            Position: The value or None if unknown
+
+        """
+        return self.__value
+
+    @value.setter
+    def value(self, value):
+        self.__value = value
+
     def __repr__(self):
         return ", ".join([self.datetime,
                           self.trading_pair[0],
@@ -244,11 +270,12 @@ class CryptoTransaction(Transaction):
     A transaction which took place on a certain exchange, e.g. Binance.
     """
 
-    def __init__(self, exchange, **kwargs):
+    def __init__(self, exchange, trade_id=None, **kwargs):
         """
 
         Args:
             exchange: The exchange on which the transaction took place
+            trade_id (str): The id of the trade at the exchange (optional)
 
         Keyword Args:
             Will be passed to the `Transaction` parent class.
@@ -257,6 +284,7 @@ class CryptoTransaction(Transaction):
         super().__init__(**kwargs)
 
         self._exchange = exchange
+        self._trade_id = trade_id
 
     @property
     def exchange(self):
@@ -269,6 +297,17 @@ class CryptoTransaction(Transaction):
         """
         return self._exchange
 
+    @property
+    def trade_id(self):
+        """
+        The id of the trade at the exchange.
+
+        Returns:
+            str: The id or None if the source does not provide it
+
+        """
+        return self._trade_id
+
 
 class Deposit(Position):
     """
@@ -301,6 +340,10 @@ class Deposit(Position):
     def timestamp(self):
         return self._timestamp
 
+    @timestamp.setter
+    def timestamp(self, value):
+        self._timestamp = value
+
     @property
     def address(self):
         return self._address
@@ -331,3 +374,103 @@ class Deposit(Position):
                           str(self.amount),
                           self.transactionfee.currency,
                           str(self.transactionfee.amount)])
+
+
+class Withdrawal(Deposit):
+    """
+    A withdrawal from an account with a positive amount.
+    """
+
+    @classmethod
+    def from_deposit(cls, deposit):
+        """
+        Create a withdrawal of a record parsed as `Deposit`, e.g. from a crawler file of withdrawals.
+
+        Args:
+            deposit (Deposit): The record
+
+        Returns:
+            Withdrawal: The withdrawal
+        """
+        return cls(
+            timestamp=deposit.timestamp, address=deposit.address, txid=deposit.txid, exchange=deposit.exchange,
+            coin=deposit.currency, amount=deposit.amount, fee=deposit.transactionfee, status=deposit._status
+        )
+
+
+class Transfer(object):
+    """
+    A transfer of a currency between two accounts, i.e. a withdrawal linked to the deposit it resulted in.
+    """
+
+    def __init__(self, withdrawal, deposit):
+        """
+
+        Args:
+            withdrawal (Deposit):   The withdrawal from the source account with a positive amount
+            deposit (Deposit):      The deposit into the destination account
+        """
+        super().__init__()
+
+        self._withdrawal = withdrawal
+        self._deposit = deposit
+
+    @property
+    def withdrawal(self):
+        return self._withdrawal
+
+    @property
+    def deposit(self):
+        return self._deposit
+
+    @property
+    def datetime(self):
+        """ The time of the withdrawal """
+        return self._withdrawal.timestamp
+
+    @property
+    def type(self):
+        return "Transfer"
+
+    @property
+    def currency(self):
+        return self._deposit.currency
+
+    @property
+    def amount(self):
+        """ The amount received by the destination account, i.e. excluding fees """
+        return self._deposit.amount
+
+    @property
+    def fee(self):
+        """
+        The fee of the withdrawal. If the withdrawal does not state it, it is the difference of the withdrawn and the
+        received amount.
+
+        Returns:
+            Fee: The fee
+        """
+        fee = self._withdrawal.transactionfee
+
+        if fee.amount:
+            return Fee(amount=fee.amount, currency=fee.currency or self.currency)
+
+        return Fee(amount=max(self._withdrawal.amount - self._deposit.amount, 0), currency=self.currency)
+
+    @property
+    def exchange(self):
+        """ The exchange of the source account """
+        return self._withdrawal.exchange
+
+    @property
+    def destination(self):
+        """ The exchange of the destination account """
+        return self._deposit.exchange
+
+    @property
+    def txid(self):
+        return self._deposit.txid or self._withdrawal.txid
+
+    def __repr__(self):
+        return "{} {} {} from {} to {}".format(self.datetime, self.amount, self.currency, self.exchange,
+                                               self.destination)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Links withdrawals to the deposits they resulted in, e.g. a transfer from Binance to Bitpanda.
+
+Withdrawals and deposits are joined in two passes:
+
+1. by their transaction id through a hash index of the deposits
+2. the remaining ones by currency and amount within a time window around the withdrawal. The deposits of each currency
+   are sorted by amount, so the candidates of a withdrawal are found by a binary search.
+
+The deposit amount of a transfer is either the withdrawn amount minus the fee or, if the exchange reports the net
+amount, the withdrawn amount.
+
+    transfers, withdrawals, deposits = match_transfers(withdrawals, deposits)
+"""
+import bisect
+import datetime
+
+from deltaconv.transaction import Transfer
+
+# The maximum time between a withdrawal and its deposit
+WINDOW = datetime.timedelta(hours=24)
+
+# The maximum time a deposit may be recorded before its withdrawal due to the clocks of the exchanges
+SKEW = datetime.timedelta(minutes=10)
+
+# The relative difference of amounts still considered equal
+TOLERANCE = 1e-6
+
+
+def _amounts(withdrawal):
+    """ Get the amounts a deposit of the withdrawal may have """
+    fee = withdrawal.transactionfee
+
+    if fee.amount and fee.currency in ('', None, withdrawal.currency):
+        return [withdrawal.amount - fee.amount, withdrawal.amount]
+
+    return [withdrawal.amount]
+
+
+def match_transfers(withdrawals, deposits, window=WINDOW, skew=SKEW, tolerance=TOLERANCE):
+    """
+    Link each withdrawal to a deposit.
+
+    Args:
+        withdrawals (Iterable[Deposit]):    The withdrawals with positive amounts
+        deposits (Iterable[Deposit]):       The deposits
+        window (datetime.timedelta):        The maximum time between a withdrawal and its deposit
+        skew (datetime.timedelta):          The maximum time a deposit may be recorded before its withdrawal
+        tolerance (float):                  The relative difference of amounts still considered equal
+
+    Returns:
+        tuple[list[Transfer], list[Deposit], list[Deposit]]: The transfers in the order of time, the withdrawals and
+            the deposits without a match
+    """
+    withdrawals = sorted(withdrawals, key=lambda w: w.timestamp)
+    deposits = list(deposits)
+
+    # the withdrawal of each matched deposit
+    matched = {}
+
+    # the unmatched withdrawals
+    remaining = []
+
+    # 1. join on the transaction id and the currency
+    by_txid = {}
+
+    for idx, d in enumerate(deposits):
+        if d.txid:
+            by_txid.setdefault((d.txid, d.currency), []).append(idx)
+
+    for w in withdrawals:
+        candidates = [idx for idx in by_txid.get((w.txid, w.currency), []) if idx not in matched] if w.txid else []
+
+        if candidates:
+            # the same id may be used for several transfers, e.g. 'Internal transfer', so take the closest one
+            idx = min(candidates, key=lambda i: abs(deposits[i].timestamp - w.timestamp))
+            matched[idx] = w
+        else:
+            remaining.append(w)
+
+    # 2. join the remaining ones on the currency and the amount, then check the time window of the candidates
+    amounts, indices = {}, {}
+
+    for idx in sorted((i for i in range(len(deposits)) if i not in matched), key=lambda i: deposits[i].amount):
+        currency = deposits[idx].currency
+
+        amounts.setdefault(currency, []).append(deposits[idx].amount)
+        indices.setdefault(currency, []).append(idx)
+
+    unmatched = []
+
+    for w in remaining:
+        amounts_, indices_ = amounts.get(w.currency, []), indices.get(w.currency, [])
+        candidates = []
+
+        for amount in _amounts(w):
+            delta = tolerance * max(abs(amount), 1.0)
+
+            for position in range(bisect.bisect_left(amounts_, amount - delta),
+                                  bisect.bisect_right(amounts_, amount + delta)):
+                idx = indices_[position]
+
+                if idx not in matched and w.timestamp - skew <= deposits[idx].timestamp <= w.timestamp + window:
+                    candidates.append(idx)
+
+        if candidates:
+            # the deposit closest to the withdrawal
+            matched[min(candidates, key=lambda i: abs(deposits[i].timestamp - w.timestamp))] = w
+        else:
+            unmatched.append(w)
+
+    transfers = sorted((Transfer(w, deposits[idx]) for idx, w in matched.items()), key=lambda t: t.datetime)
+
+    return transfers, unmatched, [d for idx, d in enumerate(deposits) if idx not in matched]
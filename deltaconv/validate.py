@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+"""
+Checks whether a file can be converted without parsing it.
+
+By default, only the header and a bounded sample of rows are checked. The rows of csv files are sampled by seeking to
+random byte offsets - one in each of `sample` equally sized strata of the file - so the time of a check does not depend
+on the size of the file. Use `full=True` to check every row instead.
+"""
+import collections
+import csv
+import io
+import os
+import random
+
+from deltaconv.registry import PARSER, TYPE_DATETIME, TYPE_FLOAT, TYPE_TIMESTAMP, detect_formats, matches, read_header
+
+# The default number of rows to check
+SAMPLE_SIZE = 1000
+
+# The location of a problem in a sampled row is its byte offset in the file, not its line number
+Problem = collections.namedtuple('Problem', ['line', 'offset', 'column', 'value', 'message'])
+
+
+class ValidationResult(object):
+    """ The result of the validation of a file """
+
+    def __init__(self, file, format_name=None):
+        super().__init__()
+
+        self.file = file
+        self.format = format_name
+        self.checked = 0
+        self.problems = []
+
+    @property
+    def valid(self):
+        return self.format is not None and not self.problems
+
+
+def _is_float(value):
+    if isinstance(value, float):
+        return True
+
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_timestamp(value):
+    try:
+        return float(value) >= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_datetime(value):
+    from deltaconv.parser.parser import Where
+
+    if not isinstance(value, str) or _is_float(value):
+        return False
+
+    return Where.to_datetime(value) is not None
+
+
+_CHECKS = {
+    TYPE_FLOAT: _is_float,
+    TYPE_DATETIME: _is_datetime,
+    TYPE_TIMESTAMP: _is_timestamp,
+}
+
+
+def _check_row(result, header, types, row, line=None, offset=None):
+    """ Append the problems of the given row to the result """
+    result.checked += 1
+
+    if len(row) != len(header):
+        result.problems.append(Problem(
+            line, offset, None, None, 'Expected {} columns, got {}'.format(len(header), len(row))
+        ))
+        return
+
+    for idx, check in types:
+        value = row[idx]
+
+        # missing values are allowed, e.g. the fee of a deposit
+        if value == '' or value is None:
+            continue
+
+        if not _CHECKS[check](value):
+            result.problems.append(Problem(line, offset, header[idx], value, 'Expected a {}'.format(check)))
+
+
+def _sample_offsets(start, end, size, rng):
+    """ Get one random offset in each of `size` equally sized strata of the range [start, end) """
+    if end <= start or size <= 0:
+        return []
+
+    step = (end - start) / size
+
+    return sorted({int(start + i * step + rng.random() * step) for i in range(size)})
+
+
+def _validate_csv(result, delimiter, header_row, types, sample, full, rng):
+    with open(result.file, 'rb') as file_:
+        for _ in range(header_row):
+            file_.readline()
+
+        header = next(csv.reader([file_.readline().decode('utf-8-sig')], delimiter=delimiter), [])
+        types = [(header.index(c), t) for c, t in types.items() if c in header]
+
+        start = file_.tell()
+        end = os.fstat(file_.fileno()).st_size
+
+        # small files are checked completely
+        if full or end - start <= sample * 256:
+            text = io.TextIOWrapper(file_, encoding='utf-8', errors='replace', newline='')
+            reader = csv.reader(text, delimiter=delimiter)
+
+            for row in reader:
+                if row:
+                    _check_row(result, header, types, row, line=header_row + 1 + reader.line_num)
+
+            return
+
+        for offset in _sample_offsets(start, end, sample, rng):
+            file_.seek(offset)
+
+            # the offset is within a row - skip to the start of the next one
+            file_.readline()
+            position = file_.tell()
+
+            line = file_.readline()
+            if not line:
+                continue
+
+            row = next(csv.reader([line.decode('utf-8', errors='replace')], delimiter=delimiter), [])
+
+            if row:
+                _check_row(result, header, types, row, offset=position)
+
+
+def _validate_xlsx(result, header_row, types, sample, full, rng):
+    import xlrd
+
+    sheet = xlrd.open_workbook(result.file, on_demand=True).sheet_by_index(0)
+
+    header = [str(c) for c in sheet.row_values(header_row)]
+    types = [(header.index(c), t) for c, t in types.items() if c in header]
+
+    rows = range(header_row + 1, sheet.nrows)
+
+    if not full and len(rows) > sample:
+        rows = sorted(rng.sample(rows, sample))
+
+    for idx in rows:
+        _check_row(result, header, types, sheet.row_values(idx), line=idx + 1)
+
+
+def validate(file, format_name=None, sample=SAMPLE_SIZE, full=False, seed=None):
+    """
+    Check the header, the delimiter and the types of the columns of the given file.
+
+    Args:
+        file (str):         The file to check (either xlsx or csv)
+        format_name (str):  The expected format. Will be detected if not given.
+        sample (int):       The number of rows to check
+        full (bool):        Check every row instead of a sample
+        seed (int):         The seed of the random sample
+
+    Returns:
+        ValidationResult: The result. Its format is None if the header does not match any format.
+    """
+    if format_name is None:
+        formats = detect_formats(file)
+        format_name = formats[0] if formats else None
+
+    result = ValidationResult(file, format_name)
+
+    if format_name is None:
+        return result
+
+    choice = PARSER[format_name]
+    types = choice.get('types', {})
+    header_row = choice.get('header_row', 0)
+
+    # e.g. a wrong delimiter or a file of another format
+    if not matches(read_header(file, choice['config'].get('delimiter', ','), header_row), choice):
+        result.problems.append(Problem(header_row + 1, None, None, None, 'The header does not match the format'))
+        return result
+
+    rng = random.Random(seed)
+
+    if file.endswith('.xlsx'):
+        _validate_xlsx(result, header_row, types, sample, full, rng)
+    elif file.endswith('.csv'):
+        _validate_csv(result, choice['config'].get('delimiter', ','), header_row, types, sample, full, rng)
+    else:
+        raise NotImplementedError('The file format {} is currently not supported.'.format(os.path.splitext(file)[1]))
+
+    return result
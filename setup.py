@@ -34,19 +34,21 @@ setuptools.setup(
     author_email='Lars.Klitzke@gmail.com',
     classifiers=(
         "Operating System :: OS Independent",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
         "License :: OSI Approved :: GNU Lesser General Public License v3 or later (LGPLv3+)",
         "Natural Language :: English",
     ),
     entry_points={
         'console_scripts': [
-            'tradingconv = deltaconv.convert:main',
+            'tradingconv = deltaconv.converter:main',
             'binancecrawler = deltaconv.crawler:main'
         ]
     },
     packages=setuptools.find_packages(),
+    python_requires='>=3.8',
     install_requires=[
         'requests',
         'xlrd',
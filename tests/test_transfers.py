@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2019 by Lars Klitzke, Lars.Klitzke@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+import datetime
+import os
+import tempfile
+import unittest
+
+from deltaconv.crawler import WITHDRAWAL_COLUMNS
+from deltaconv.registry import init_parser
+from deltaconv.transaction import Deposit, Fee
+from deltaconv.transfers import match_transfers
+
+
+class MatchTransfersTest(unittest.TestCase):
+
+    def test_crawler_withdrawal_matches_deposit_without_fee(self):
+        withdrawal = {
+            'txId': 'w1',
+            'coin': 'ETH',
+            'status': '6',
+            'address': '0x1',
+            'transferAmount': '1.5',
+            'insertTime': '1546300800000',
+            'transactionFee': '0.01',
+            'applyTime': '1546300800000',
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'withdrawals.csv')
+
+            with open(file, 'w') as f:
+                f.write(';'.join(WITHDRAWAL_COLUMNS) + '\n')
+                f.write(';'.join(withdrawal.get(c, '') for c in WITHDRAWAL_COLUMNS) + '\n')
+
+            withdrawals = init_parser('binancecrawler-deposit').parse(file)
+
+        self.assertEqual(0.01, withdrawals[0].transactionfee.amount)
+        self.assertEqual('ETH', withdrawals[0].transactionfee.currency)
+
+        # the other exchange records the net amount under its own transaction id
+        deposit = Deposit(
+            timestamp=datetime.datetime(2019, 1, 1, 0, 30), address='0x1', txid='d1', exchange='Bitpanda', coin='ETH',
+            amount=1.49, fee=Fee(amount=0, currency=''), status=1
+        )
+
+        transfers, unmatched_withdrawals, unmatched_deposits = match_transfers(withdrawals, [deposit])
+
+        self.assertEqual(1, len(transfers))
+        self.assertIs(deposit, transfers[0].deposit)
+        self.assertEqual([], unmatched_withdrawals)
+        self.assertEqual([], unmatched_deposits)
+
+
+if __name__ == '__main__':
+    unittest.main()